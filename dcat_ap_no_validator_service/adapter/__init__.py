@@ -1,5 +1,25 @@
 """Package for all adapters."""
 
+from .cache_warm_up import known_vocabulary_urls, warm_up
+from .circuit_breaker import CircuitBreakers, CircuitState
+from .fetch_scheduler import FetchScheduler
+from .graph_cache import GraphCache, MemoryGraphCache
+from .graph_registry import GraphRegistry
 from .ontology_graph_adapter import OntologyGraphAdapter
-from .remote_graph_adapter import fetch_graph, FetchError, parse_text
+from .remote_graph_adapter import (
+    circuit_breaker_states,
+    CircuitOpenError,
+    clear_graph_cache,
+    content_identifier,
+    DeadlineExceededError,
+    digest_identifier,
+    fetch_document,
+    fetch_graph,
+    FetchError,
+    memory_graph_cache_metrics,
+    open_circuit_hosts,
+    parse_file,
+    parse_text,
+)
+from .result_cache import result_key, ResultCache
 from .shapes_graph_adapter import ShapesGraphAdapter
@@ -0,0 +1,52 @@
+"""Module for warming up the caches of remote graphs."""
+
+import asyncio
+import logging
+import os
+from typing import List, Set
+
+from aiohttp_client_cache import CachedSession
+from dotenv import load_dotenv
+from rdflib import Graph, OWL
+
+from .fetch_scheduler import FetchScheduler
+from .ontology_graph_adapter import OntologyGraphAdapter
+
+load_dotenv()
+CACHE_WARM_UP_URLS = [
+    url.strip() for url in os.getenv("CACHE_WARM_UP_URLS", "").split(",") if url.strip()
+]
+
+
+async def known_vocabulary_urls() -> List[str]:
+    """Return the urls of the ontology graphs in the store, and of extra vocabularies."""
+    return [x.url for x in await OntologyGraphAdapter.get_all()] + CACHE_WARM_UP_URLS
+
+
+async def warm_up(
+    session: CachedSession, fetch_scheduler: FetchScheduler, urls: List[str]
+) -> int:
+    """Fetch the graphs at urls, and the ontologies they import, into the caches.
+
+    Returns the number of graphs fetched. Graphs that cannot be fetched are skipped.
+    """
+    fetched: Set[str] = set()
+    pending = set(urls)
+    count = 0
+    while pending:
+        ordered = sorted(pending)
+        results = await asyncio.gather(
+            *[fetch_scheduler.fetch_graph(session, url) for url in ordered],
+            return_exceptions=True,
+        )
+        fetched.update(ordered)
+        pending = set()
+        for url, result in zip(ordered, results, strict=False):
+            if isinstance(result, Graph):
+                count += 1
+                pending.update(str(o) for o in result.objects(None, OWL.imports))
+            else:
+                logging.warning(f"Could not warm up cache with {url}: {result}")
+        pending -= fetched
+    logging.info(f"Warmed up cache with {count} graphs.")
+    return count
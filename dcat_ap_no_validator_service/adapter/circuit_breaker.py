@@ -0,0 +1,103 @@
+"""Module for circuit breakers on remote hosts."""
+
+from enum import Enum
+import logging
+import time
+from typing import Dict, List
+
+
+class CircuitState(str, Enum):
+    """Enum representing the states of a circuit breaker."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+
+class _Circuit:
+    __slots__ = ("state", "failures", "opened_at", "trial_in_flight")
+
+    def __init__(self) -> None:
+        self.state = CircuitState.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+
+
+class CircuitBreakers:
+    """Class representing a circuit breaker per remote host.
+
+    A circuit is closed while calls to the host succeed. After
+    `failure_threshold` failures in a row, the circuit opens, and calls to the
+    host fail right away. After `reset_timeout` seconds, the circuit is half-open:
+    one trial call is let through, while other calls still fail right away. If
+    the trial call succeeds, the circuit is closed again, otherwise it opens again.
+    """
+
+    __slots__ = ("_failure_threshold", "_reset_timeout", "_circuits")
+
+    def __init__(self, failure_threshold: int, reset_timeout: float) -> None:
+        """Initialize the circuit breakers."""
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._circuits: Dict[str, _Circuit] = dict()
+
+    def allow_call(self, host: str) -> bool:
+        """Return True if a call to the host may be made now.
+
+        A call allowed must be followed by record_success or record_failure.
+        """
+        circuit = self._circuits.get(host)
+        if circuit is None or circuit.state is CircuitState.CLOSED:
+            return True
+        if circuit.state is CircuitState.OPEN:
+            if time.monotonic() - circuit.opened_at < self._reset_timeout:
+                return False
+            logging.info(f"Circuit breaker for {host} is half-open.")
+            circuit.state = CircuitState.HALF_OPEN
+        if circuit.trial_in_flight:
+            return False
+        circuit.trial_in_flight = True
+        return True
+
+    def record_success(self, host: str) -> None:
+        """Record that a call to the host succeeded."""
+        circuit = self._circuits.pop(host, None)
+        if circuit is not None and circuit.state is not CircuitState.CLOSED:
+            logging.info(f"Circuit breaker for {host} is closed.")
+
+    def record_failure(self, host: str) -> None:
+        """Record that a call to the host failed."""
+        circuit = self._circuits.setdefault(host, _Circuit())
+        circuit.failures += 1
+        circuit.trial_in_flight = False
+        if (
+            circuit.state is CircuitState.HALF_OPEN
+            or circuit.failures >= self._failure_threshold
+        ):
+            if circuit.state is not CircuitState.OPEN:
+                logging.warning(f"Circuit breaker for {host} is open.")
+            circuit.state = CircuitState.OPEN
+            circuit.opened_at = time.monotonic()
+
+    def abandon_call(self, host: str) -> None:
+        """Record that a call to the host was given up, e.g. cancelled."""
+        circuit = self._circuits.get(host)
+        if circuit is not None:
+            circuit.trial_in_flight = False
+
+    def states(self) -> Dict[str, str]:
+        """Return the state of the circuits that are not closed, by host."""
+        return {
+            host: circuit.state.value
+            for host, circuit in self._circuits.items()
+            if circuit.state is not CircuitState.CLOSED
+        }
+
+    def open_hosts(self) -> List[str]:
+        """Return the hosts with an open circuit."""
+        return [
+            host
+            for host, circuit in self._circuits.items()
+            if circuit.state is CircuitState.OPEN
+        ]
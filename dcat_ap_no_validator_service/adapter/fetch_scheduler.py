@@ -0,0 +1,224 @@
+"""Module for scheduling fetches of remote graphs."""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urldefrag, urlparse
+
+from aiohttp import ClientOSError, ServerDisconnectedError
+from aiohttp_client_cache import CachedSession
+from dotenv import load_dotenv
+from rdflib import Graph
+
+from .remote_graph_adapter import (
+    CircuitOpenError,
+    DeadlineExceededError,
+    fetch_document,
+    FetchError,
+)
+
+load_dotenv()
+FETCH_MAX_CONCURRENCY = int(os.getenv("FETCH_MAX_CONCURRENCY", "20"))
+FETCH_MAX_CONCURRENCY_PER_HOST = int(os.getenv("FETCH_MAX_CONCURRENCY_PER_HOST", "4"))
+NEGATIVE_CACHE_TTL = float(os.getenv("NEGATIVE_CACHE_TTL", "60"))
+
+# Maximum number of redirect targets and of failures remembered:
+_MAX_LOCATIONS = 10000
+_MAX_FAILURES = 10000
+# Causes of a fetch error telling that the host, not only the url, is unreachable.
+# A timeout may be caused by the url alone, e.g. a large document, so it is not one:
+_UNREACHABLE = (ClientOSError, ServerDisconnectedError)
+
+
+class FetchScheduler:
+    """Class representing a scheduler of fetches of remote graphs.
+
+    At most `max_concurrency` fetches run at the same time, and at most
+    `max_concurrency_per_host` of them against the same host. Further fetches wait
+    in line. Urls are fetched by document, i.e. without fragment. A fetch of a
+    document that is already being fetched, e.g. by another request, is not
+    started again, but shares the result of the running fetch. When a document
+    is found at another url after redirects, later fetches of the document go
+    straight to that url. When a fetch fails, later fetches of the url, or of any
+    url at the host if the host is unreachable, fail right away for
+    `negative_cache_ttl` seconds. Graphs returned are shared between the callers
+    and must not be changed.
+    """
+
+    __slots__ = (
+        "_semaphore",
+        "_max_concurrency_per_host",
+        "_host_semaphores",
+        "_host_pending",
+        "_in_flight",
+        "_locations",
+        "_negative_cache_ttl",
+        "_failures",
+        "_fetches",
+        "_negative_hits",
+        "_coalesced",
+        "_waiting",
+        "_running",
+        "_queue_wait_total",
+        "_queue_wait_max",
+    )
+
+    def __init__(
+        self,
+        max_concurrency: int = FETCH_MAX_CONCURRENCY,
+        max_concurrency_per_host: int = FETCH_MAX_CONCURRENCY_PER_HOST,
+        negative_cache_ttl: float = NEGATIVE_CACHE_TTL,
+    ) -> None:
+        """Initialize the scheduler."""
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._max_concurrency_per_host = max_concurrency_per_host
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = dict()
+        self._host_pending: Dict[str, int] = dict()
+        self._in_flight: Dict[str, asyncio.Future] = dict()
+        self._locations: Dict[str, str] = dict()
+        self._negative_cache_ttl = negative_cache_ttl
+        # Failures by url, or by host if unreachable, with the time they expire:
+        self._failures: Dict[str, Tuple[float, Exception]] = dict()
+        self._fetches = 0
+        self._negative_hits = 0
+        self._coalesced = 0
+        self._waiting = 0
+        self._running = 0
+        self._queue_wait_total = 0.0
+        self._queue_wait_max = 0.0
+
+    async def fetch_graph(
+        self, session: CachedSession, url: str, deadline: Optional[float] = None
+    ) -> Graph:
+        """Fetch remote graph at url when there is room for it, cf fetch_graph.
+
+        If a deadline is given, as a time.monotonic() time, the caller stops
+        waiting at the deadline, while the fetch goes on for other callers.
+        """
+        if deadline is not None and deadline <= time.monotonic():
+            raise DeadlineExceededError(f"Skipped fetch of {url}: Deadline exceeded.")
+        document = urldefrag(url).url
+        location = self._locations.get(document, document)
+        failure = self._known_failure(location)
+        if failure is not None:
+            logging.debug(f"Skipping fetch of {location}, failed recently: {failure}")
+            self._negative_hits += 1
+            raise type(failure)(str(failure))
+        fetch = self._in_flight.get(location)
+        if fetch is None:
+            fetch = asyncio.ensure_future(self._fetch(session, document, location))
+            self._in_flight[location] = fetch
+            fetch.add_done_callback(lambda f: self._done(location, f))
+        else:
+            logging.debug(f"Joining fetch of {location} already in flight.")
+            self._coalesced += 1
+        # A caller giving up should not cancel the fetch for the other callers:
+        if deadline is None:
+            return await asyncio.shield(fetch)
+        try:
+            return await asyncio.wait_for(
+                asyncio.shield(fetch), deadline - time.monotonic()
+            )
+        except asyncio.TimeoutError:
+            raise DeadlineExceededError(
+                f"Gave up fetch of {url}: Deadline exceeded."
+            ) from None
+
+    def metrics(self) -> Dict[str, Any]:
+        """Return counters on fetches, failures and time spent waiting in line."""
+        return {
+            "fetches": self._fetches,
+            "coalesced": self._coalesced,
+            "negativeHits": self._negative_hits,
+            "knownFailures": len(self._failures),
+            "waiting": self._waiting,
+            "running": self._running,
+            "locationsLearned": len(self._locations),
+            "queueWaitSecondsTotal": self._queue_wait_total,
+            "queueWaitSecondsMax": self._queue_wait_max,
+        }
+
+    async def _fetch(
+        self, session: CachedSession, document: str, location: str
+    ) -> Graph:
+        host = urlparse(location).netloc
+        host_semaphore = self._host_semaphores.setdefault(
+            host, asyncio.Semaphore(self._max_concurrency_per_host)
+        )
+        self._host_pending[host] = self._host_pending.get(host, 0) + 1
+        self._fetches += 1
+        self._waiting += 1
+        queued = time.monotonic()
+        acquired = False
+        try:
+            # Wait for the host first, so that fetches waiting for a busy host
+            # do not hold on to slots other hosts could use:
+            async with host_semaphore, self._semaphore:
+                acquired = True
+                self._record_queue_wait(time.monotonic() - queued)
+                self._running += 1
+                try:
+                    g, found_at = await fetch_document(session, location)
+                except FetchError as e:
+                    # The document may have moved since we learned where it was:
+                    self._locations.pop(document, None)
+                    unreachable = isinstance(e, CircuitOpenError) or isinstance(
+                        e.__cause__, _UNREACHABLE
+                    )
+                    self._remember_failure(host if unreachable else location, e)
+                    raise
+                except SyntaxError as e:
+                    self._remember_failure(location, e)
+                    raise
+                finally:
+                    self._running -= 1
+                self._learn_location(document, found_at)
+                return g
+        finally:
+            if not acquired:  # pragma: no cover
+                # Cancelled while waiting in line:
+                self._waiting -= 1
+            self._host_pending[host] -= 1
+            if self._host_pending[host] == 0:
+                del self._host_pending[host]
+                del self._host_semaphores[host]
+
+    def _learn_location(self, document: str, found_at: str) -> None:
+        if found_at != document and document not in self._locations:
+            logging.debug(f"Learned that {document} is found at {found_at}.")
+            if len(self._locations) >= _MAX_LOCATIONS:
+                # Forget the oldest redirect target:
+                del self._locations[next(iter(self._locations))]
+            self._locations[document] = found_at
+
+    def _known_failure(self, location: str) -> Optional[Exception]:
+        now = time.monotonic()
+        for key in (urlparse(location).netloc, location):
+            failure = self._failures.get(key)
+            if failure is not None:
+                if failure[0] > now:
+                    return failure[1]
+                del self._failures[key]
+        return None
+
+    def _remember_failure(self, key: str, e: Exception) -> None:
+        if self._negative_cache_ttl <= 0:
+            return
+        self._failures.pop(key, None)
+        if len(self._failures) >= _MAX_FAILURES:
+            # Forget the oldest failure:
+            del self._failures[next(iter(self._failures))]
+        self._failures[key] = (time.monotonic() + self._negative_cache_ttl, e)
+
+    def _record_queue_wait(self, wait: float) -> None:
+        self._waiting -= 1
+        self._queue_wait_total += wait
+        self._queue_wait_max = max(self._queue_wait_max, wait)
+
+    def _done(self, url: str, fetch: asyncio.Future) -> None:
+        del self._in_flight[url]
+        # Retrieve the exception, in case all callers have given up:
+        if not fetch.cancelled():
+            fetch.exception()
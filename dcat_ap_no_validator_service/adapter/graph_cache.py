@@ -0,0 +1,185 @@
+"""Module for caching parsed remote graphs on disk and in memory."""
+
+from collections import OrderedDict
+import hashlib
+import logging
+import os
+import pickle  # noqa: S403
+import stat
+import tempfile
+import time
+import traceback
+from typing import Any, Dict, Optional, Tuple
+
+from rdflib import Graph
+
+
+class GraphCache:
+    """Class representing a cache of parsed graphs in a directory.
+
+    Graphs are stored pickled, which loads many times faster than parsing them
+    again. The directory may be shared by the processes of this user on a host.
+    Since loading a pickle may run any code, the directory must be private to
+    the user: it is created readable and writable by the user only, and neither
+    it nor its parents may be writable by other users. Raises PermissionError
+    if it is not. When the files in the directory take up more than `max_size`
+    bytes, the least recently used graphs are removed.
+    """
+
+    __slots__ = ("_directory", "_max_size")
+
+    def __init__(self, directory: str, max_size: int) -> None:
+        """Initialize the cache."""
+        self._directory = directory
+        self._max_size = max_size
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        _check_private(directory)
+
+    def get(self, key: str) -> Optional[Graph]:
+        """Get the graph cached by key, or None if not cached."""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as file:
+                # Only this user can write to the directory, cf _check_private:
+                g = pickle.load(file)  # noqa: S301
+            os.utime(path)  # Mark as recently used.
+        except FileNotFoundError:
+            logging.debug(f"Graph cache miss: {key}.")
+            return None
+        except Exception:
+            logging.warning(f"Could not load cached graph {key}.")
+            logging.debug(traceback.format_exc())
+            self._remove(path)
+            return None
+        logging.debug(f"Graph cache hit: {key}.")
+        return g
+
+    def put(self, key: str, g: Graph) -> None:
+        """Cache the graph by key."""
+        try:
+            # Write to a temporary file first, so that readers never see half a graph:
+            with tempfile.NamedTemporaryFile(
+                dir=self._directory, suffix=".tmp", delete=False
+            ) as file:
+                pickle.dump(g, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(file.name, self._path(key))
+        except OSError:
+            logging.warning(f"Could not cache graph {key}.")
+            logging.debug(traceback.format_exc())
+            return
+        self._evict()
+
+    def clear(self) -> None:
+        """Remove all cached graphs."""
+        for entry in os.scandir(self._directory):
+            if entry.name.endswith(".pickle"):
+                self._remove(entry.path)
+
+    def _evict(self) -> None:
+        entries = [
+            entry
+            for entry in os.scandir(self._directory)
+            if entry.name.endswith(".pickle")
+        ]
+        size = sum(entry.stat().st_size for entry in entries)
+        # Remove the least recently used graphs first:
+        for entry in sorted(entries, key=lambda entry: entry.stat().st_mtime):
+            if size <= self._max_size:
+                break
+            size -= entry.stat().st_size
+            self._remove(entry.path)
+
+    def _path(self, key: str) -> str:
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        return os.path.join(self._directory, f"{digest}.pickle")
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:  # pragma: no cover
+            pass  # Removed by another process.
+
+
+def _check_private(directory: str) -> None:
+    """Raise PermissionError if other users may write to the directory.
+
+    The directory must be owned by the user, and not be readable or writable by
+    others. Its parents must be owned by the user or root, and not be writable
+    by others, unless sticky like /tmp, so the directory cannot be replaced.
+    """
+    uid = os.getuid()
+    path = os.path.abspath(directory)
+    st = os.stat(path)
+    if st.st_uid != uid or st.st_mode & 0o077:
+        raise PermissionError(f"Graph cache directory {path} is not private.")
+    while path != os.path.dirname(path):
+        path = os.path.dirname(path)
+        st = os.stat(path)
+        if st.st_uid not in (0, uid) or (
+            st.st_mode & 0o022 and not st.st_mode & stat.S_ISVTX
+        ):
+            raise PermissionError(
+                f"Graph cache directory {directory} is in unsafe directory {path}."
+            )
+
+
+class MemoryGraphCache:
+    """Class representing a cache of parsed graphs in the memory of this process.
+
+    The size of a graph is counted as the size of the text it was parsed from.
+    When the graphs add up to more than `max_size`, the least recently used
+    graphs are removed. Graphs older than `ttl` seconds are not used.
+    """
+
+    __slots__ = ("_max_size", "_ttl", "_entries", "_size", "_hits", "_misses")
+
+    def __init__(self, max_size: int, ttl: float) -> None:
+        """Initialize the cache."""
+        self._max_size = max_size
+        self._ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, int, Any]]" = OrderedDict()
+        self._size = 0
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get the value cached by key, or None if not cached or expired."""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                self._remove(key)
+            self._misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self._hits += 1
+        return entry[2]
+
+    def put(self, key: str, value: Any, size: int) -> None:
+        """Cache the value by key, counting it as size bytes."""
+        if key in self._entries:
+            self._remove(key)
+        if size > self._max_size:
+            return
+        self._entries[key] = (time.monotonic() + self._ttl, size, value)
+        self._size += size
+        while self._size > self._max_size:
+            self._remove(next(iter(self._entries)))
+
+    def clear(self) -> None:
+        """Remove all cached values."""
+        self._entries.clear()
+        self._size = 0
+
+    def metrics(self) -> Dict[str, Any]:
+        """Return counters on hits and misses, and the size of the cache."""
+        return {
+            "hits": self._hits,
+            "misses": self._misses,
+            "entries": len(self._entries),
+            "size": self._size,
+        }
+
+    def _remove(self, key: str) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._size -= size
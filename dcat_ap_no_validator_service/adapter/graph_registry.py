@@ -0,0 +1,110 @@
+"""Module for keeping parsed graphs from a graph store in memory."""
+
+import asyncio
+import logging
+import traceback
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from aiohttp_client_cache import CachedSession
+from rdflib import Graph
+
+from .remote_graph_adapter import fetch_graph, FetchError
+
+
+class GraphRegistry:
+    """Class representing a registry of parsed graphs.
+
+    The graphs are described by a graph adapter, e.g. ShapesGraphAdapter.
+    Each graph is fetched and parsed the first time it is asked for, and is
+    kept in memory until it is refreshed. Graphs in the registry are shared
+    between requests and must not be changed. If `resolve` is given, each graph
+    is resolved by it when loaded, e.g. with the ontologies it imports. `resolve`
+    returns the resolved graph, and whether it is complete. Incomplete graphs are
+    not kept, and are loaded again when next asked for.
+    """
+
+    __slots__ = ("_adapter", "_resolve", "_graphs", "_locks")
+
+    def __init__(
+        self,
+        adapter: Any,
+        resolve: Optional[
+            Callable[[CachedSession, Graph], Awaitable[Tuple[Graph, bool]]]
+        ] = None,
+    ) -> None:
+        """Initialize the registry."""
+        self._adapter = adapter
+        self._resolve = resolve
+        self._graphs: Dict[str, Graph] = dict()
+        self._locks: Dict[str, asyncio.Lock] = dict()
+
+    async def get(self, session: CachedSession, id: str) -> Optional[Graph]:
+        """Get the parsed graph given by id, or None if id is not in the store."""
+        if id not in self._graphs:
+            lock = self._locks.setdefault(id, asyncio.Lock())
+            async with lock:
+                # Another request may have loaded the graph while we waited:
+                if id not in self._graphs:
+                    loaded = await self._load(session, id)
+                    if loaded is None:
+                        return None
+                    g, complete = loaded
+                    if not complete:
+                        return g
+                    self._graphs[id] = g
+        return self._graphs[id]
+
+    async def preload(self, session: CachedSession) -> None:
+        """Load all graphs in the store, e.g. at startup.
+
+        Graphs that cannot be loaded are skipped, and loaded when first asked for.
+        """
+        for description in await self._adapter.get_all():
+            try:
+                await self.get(session, description.id)
+            except (FetchError, SyntaxError):
+                logging.warning(f"Could not preload graph with id {description.id}.")
+                logging.debug(traceback.format_exc())
+        logging.info(f"Preloaded {len(self._graphs)} graphs.")
+
+    async def refresh(self, session: CachedSession) -> None:
+        """Fetch and parse all loaded graphs again.
+
+        If a graph cannot be fetched or parsed, or is incomplete, the graph already
+        loaded is kept.
+        """
+        for id in list(self._graphs):
+            try:
+                loaded = await self._load(session, id)
+            except (FetchError, SyntaxError):
+                logging.warning(f"Could not refresh graph with id {id}.")
+                logging.debug(traceback.format_exc())
+                continue
+            if loaded is None:
+                # The graph is no longer in the store:
+                del self._graphs[id]
+            elif loaded[1]:
+                self._graphs[id] = loaded[0]
+            else:
+                logging.warning(f"Kept graph with id {id}, refreshed incompletely.")
+
+    async def refresh_periodically(
+        self, session: CachedSession, interval: float
+    ) -> None:
+        """Refresh the loaded graphs every interval seconds."""
+        while True:
+            await asyncio.sleep(interval)
+            logging.debug(f"Refreshing {len(self._graphs)} graphs.")
+            await self.refresh(session)
+
+    async def _load(
+        self, session: CachedSession, id: str
+    ) -> Optional[Tuple[Graph, bool]]:
+        description = await self._adapter.get_by_id(id)
+        if description is None:
+            return None
+        logging.debug(f"Loading graph with id {id} from {description.url}.")
+        g = await fetch_graph(session, description.url, use_cache=False)
+        if self._resolve is not None:
+            return await self._resolve(session, g)
+        return (g, True)
@@ -1,11 +1,19 @@
 """Module for fetching remote graph."""
 
 import asyncio
+import hashlib
 import logging
 import os
+import posixpath
+import re
+import tempfile
+import time
 import traceback
+from typing import Any, BinaryIO, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
 
 from aiohttp import (
+    ClientConnectionError,
     ClientError,
     ClientOSError,
     ClientTimeout,
@@ -13,13 +21,88 @@ from aiohttp import (
     ServerDisconnectedError,
 )
 from aiohttp_client_cache import CachedSession
+from aiohttp_client_cache.cache_control import DO_NOT_CACHE
 from dotenv import load_dotenv
-from rdflib import Graph
+from rdflib import Graph, URIRef
+from rdflib.parser import InputSource
+
+from .circuit_breaker import CircuitBreakers
+from .graph_cache import GraphCache, MemoryGraphCache
 
 load_dotenv()
 TIMEOUT = int(os.getenv("TIMEOUT", "5"))
+CONFIG = os.getenv("CONFIG", "production")
+CACHE_VERSION = os.getenv("CACHE_VERSION", "1")
+GRAPH_CACHE_DIR = os.getenv(
+    "GRAPH_CACHE_DIR",
+    os.path.join(tempfile.gettempdir(), "dcat-ap-no-validator-service", "graphs"),
+)
+GRAPH_CACHE_MAX_SIZE = int(os.getenv("GRAPH_CACHE_MAX_SIZE", str(256 * 1024 * 1024)))
+GRAPH_MEMORY_CACHE_MAX_SIZE = int(
+    os.getenv("GRAPH_MEMORY_CACHE_MAX_SIZE", str(16 * 1024 * 1024))
+)
+GRAPH_MEMORY_CACHE_TTL = float(os.getenv("GRAPH_MEMORY_CACHE_TTL", "300"))
+CIRCUIT_BREAKER_FAILURE_THRESHOLD = int(
+    os.getenv("CIRCUIT_BREAKER_FAILURE_THRESHOLD", "5")
+)
+CIRCUIT_BREAKER_RESET_TIMEOUT = float(os.getenv("CIRCUIT_BREAKER_RESET_TIMEOUT", "30"))
+
+# Media types and file extensions, and the format we parse them as:
+_FORMAT_BY_MEDIA_TYPE: Dict[str, str] = {
+    "text/turtle": "text/turtle",
+    "application/x-turtle": "text/turtle",
+    "application/n-triples": "text/turtle",  # n-triples is a subset of turtle
+    "application/ld+json": "application/ld+json",
+    "application/json": "application/ld+json",
+    "application/rdf+xml": "application/rdf+xml",
+    "application/xml": "application/rdf+xml",
+    "text/xml": "application/rdf+xml",
+}
+_FORMAT_BY_EXTENSION: Dict[str, str] = {
+    ".ttl": "text/turtle",
+    ".nt": "text/turtle",
+    ".jsonld": "application/ld+json",
+    ".json": "application/ld+json",
+    ".rdf": "application/rdf+xml",
+    ".owl": "application/rdf+xml",
+    ".xml": "application/rdf+xml",
+}
+# An xml start tag, e.g. `<rdf:RDF ...`, as opposed to an IRI, e.g. `<http://...>`:
+_XML_START_TAG = re.compile(r"<[A-Za-z_][\w.-]*(:[A-Za-z_][\w.-]*)?(\s|>|/>)")
+_SNIFF_SIZE = 1024
 
-SUPPORTED_FORMATS = set(["text/turtle", "application/ld+json", "application/rdf+xml"])
+
+def _create_graph_cache() -> Optional[GraphCache]:
+    # Parsed remote graphs are cached in all other cases than test and dev, like
+    # responses. Graphs cached by another version of the cache are not used:
+    if CONFIG in {"test", "dev"}:
+        return None
+    try:  # pragma: no cover
+        return GraphCache(
+            os.path.join(GRAPH_CACHE_DIR, f"v{CACHE_VERSION}"), GRAPH_CACHE_MAX_SIZE
+        )
+    except OSError as e:  # pragma: no cover
+        logging.warning(f"Graph cache disabled: {e}")
+        return None
+
+
+_GRAPH_CACHE: Optional[GraphCache] = _create_graph_cache()
+
+
+# Fetches from hosts that are down fail right away, in all other cases than test and dev:
+_CIRCUIT_BREAKERS: Optional[CircuitBreakers] = (
+    None
+    if CONFIG in {"test", "dev"}
+    else CircuitBreakers(
+        CIRCUIT_BREAKER_FAILURE_THRESHOLD, CIRCUIT_BREAKER_RESET_TIMEOUT
+    )
+)
+# The hottest graphs are kept parsed in memory, in front of the response cache:
+_MEMORY_GRAPH_CACHE: Optional[MemoryGraphCache] = (
+    None
+    if CONFIG in {"test", "dev"}
+    else MemoryGraphCache(GRAPH_MEMORY_CACHE_MAX_SIZE, GRAPH_MEMORY_CACHE_TTL)
+)
 
 
 class FetchError(Exception):
@@ -31,29 +114,94 @@ class FetchError(Exception):
         super().__init__(message)
 
 
+class CircuitOpenError(FetchError):
+    """Class representing custom exception for a fetch from a host that is down."""
+
+    def __init__(self, message: str) -> None:
+        """Initialize the error."""
+        # Call the base class constructor with the parameters it needs
+        super().__init__(message)
+
+
+class DeadlineExceededError(FetchError):
+    """Class representing custom exception for a fetch given up at the deadline."""
+
+    def __init__(self, message: str) -> None:
+        """Initialize the error."""
+        # Call the base class constructor with the parameters it needs
+        super().__init__(message)
+
+
+def clear_graph_cache() -> None:
+    """Remove all parsed remote graphs from the graph cache, and from memory."""
+    if _GRAPH_CACHE:
+        _GRAPH_CACHE.clear()
+    if _MEMORY_GRAPH_CACHE:
+        _MEMORY_GRAPH_CACHE.clear()
+
+
+def circuit_breaker_states() -> Dict[str, str]:
+    """Return the state of the circuit breakers that are not closed, by host."""
+    return _CIRCUIT_BREAKERS.states() if _CIRCUIT_BREAKERS else dict()
+
+
+def open_circuit_hosts() -> List[str]:
+    """Return the hosts that fetches fail right away for."""
+    return _CIRCUIT_BREAKERS.open_hosts() if _CIRCUIT_BREAKERS else []
+
+
+def memory_graph_cache_metrics() -> Optional[Dict[str, Any]]:
+    """Return the counters of the in-memory graph cache, or None if not used."""
+    return _MEMORY_GRAPH_CACHE.metrics() if _MEMORY_GRAPH_CACHE else None
+
+
 async def fetch_graph(
-    session: CachedSession, url: str, use_cache: bool = True
+    session: CachedSession,
+    url: str,
+    use_cache: bool = True,
+    deadline: Optional[float] = None,
 ) -> Graph:
     """Fetch remote graph at url and return as Graph."""
+    g, _ = await fetch_document(session, url, use_cache=use_cache, deadline=deadline)
+    return g
+
+
+async def fetch_document(
+    session: CachedSession,
+    url: str,
+    use_cache: bool = True,
+    deadline: Optional[float] = None,
+) -> Tuple[Graph, str]:
+    """Fetch remote graph at url and return as Graph, with the url it was found at.
+
+    The url found at is the url of the response after any redirects. If use_cache,
+    a graph fetched recently by this process may be returned. Such graphs are
+    shared between the callers and must not be changed. If a deadline is given,
+    as a time.monotonic() time, the fetch is given up at the deadline.
+    """
+    if use_cache and _MEMORY_GRAPH_CACHE:
+        cached = _MEMORY_GRAPH_CACHE.get(url)
+        if cached is not None:
+            return cached
     logging.debug(f"Trying to fetch remote graph {url}.")
     timeout = ClientTimeout(total=TIMEOUT)
+    # Whether the timeout is cut short by the deadline, rather than the host's own:
+    capped = False
 
     max_retries = 5
     attempt = 0
 
     while True:
-        try:
-            if use_cache:
-                response = await session.get(
-                    url, headers={hdrs.ACCEPT: "text/turtle"}, timeout=timeout
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise DeadlineExceededError(
+                    f"Could not fetch remote graph from {url}: Deadline exceeded."
                 )
-                body = await response.text()
-            else:
-                async with session.disabled():
-                    response = await session.get(
-                        url, headers={hdrs.ACCEPT: "text/turtle"}, timeout=timeout
-                    )
-                    body = await response.text()
+            capped = remaining < TIMEOUT
+            timeout = ClientTimeout(total=min(TIMEOUT, remaining))
+        try:
+            response, body = await _get(session, url, use_cache, timeout, capped)
             break
         except (
             ClientOSError,
@@ -75,32 +223,224 @@ async def fetch_graph(
             raise FetchError(
                 f"Could not fetch remote graph from {url}: UnicodeDecodeError."
             ) from e
+        except asyncio.TimeoutError as e:
+            logging.debug(traceback.format_exc())
+            if deadline is not None and deadline <= time.monotonic():
+                raise DeadlineExceededError(
+                    f"Could not fetch remote graph from {url}: Deadline exceeded."
+                ) from e
+            raise FetchError(
+                f"Could not fetch remote graph from {url}: Timeout."
+            ) from e
 
     logging.debug(f"Got status_code {response.status}.")
     if response.status == 200:
-        logging.debug(f"Trying to parse response from {url}")
-        try:
-            return parse_text(input_graph=body)
-        except SyntaxError as e:
-            raise SyntaxError(f"Bad syntax in graph {url}.") from e
+        location = str(response.url)
+        g = await _parse_response(url, location, response, body, use_cache)
+        if use_cache and _MEMORY_GRAPH_CACHE:
+            _MEMORY_GRAPH_CACHE.put(url, (g, location), len(body))
+        return (g, location)
     else:
         raise FetchError(
             f"Could not fetch remote graph from {url}: Status = {response.status}."
         ) from None
 
 
-def parse_text(input_graph: str) -> Graph:
-    """Try to parse text as graph."""
-    for _format in SUPPORTED_FORMATS:
-        # the following is flagged by S110 Try, Except, Pass. But there is
-        # no easy way to catch specific errors from the parse function.
-        # TODO: find a way to solve this without ignoring S110
+async def _get(
+    session: CachedSession,
+    url: str,
+    use_cache: bool,
+    timeout: ClientTimeout,
+    capped: bool,
+) -> Tuple[Any, str]:
+    """Get the response and its text, through the circuit breaker of the host.
+
+    A timeout counts as a failure of the host only if the host was given its own
+    TIMEOUT, i.e. the timeout was not capped by the deadline of the caller.
+    """
+    host = urlparse(url).netloc
+    if _CIRCUIT_BREAKERS and not _CIRCUIT_BREAKERS.allow_call(host):
+        raise CircuitOpenError(
+            f"Could not fetch remote graph from {url}: Circuit breaker for {host} is open."
+        )
+    try:
+        # The session is shared, so the cache is bypassed by request, not disabled:
+        response = await session.get(
+            url,
+            headers={hdrs.ACCEPT: "text/turtle"},
+            timeout=timeout,
+            expire_after=None if use_cache else DO_NOT_CACHE,
+        )
+        body = await response.text()
+    except asyncio.TimeoutError:
+        if _CIRCUIT_BREAKERS:
+            if capped:
+                _CIRCUIT_BREAKERS.abandon_call(host)
+            else:
+                _CIRCUIT_BREAKERS.record_failure(host)
+        raise
+    except ClientConnectionError:
+        if _CIRCUIT_BREAKERS:
+            _CIRCUIT_BREAKERS.record_failure(host)
+        raise
+    except asyncio.CancelledError:
+        if _CIRCUIT_BREAKERS:
+            _CIRCUIT_BREAKERS.abandon_call(host)
+        raise
+    except Exception:
+        # The host answered:
+        if _CIRCUIT_BREAKERS:
+            _CIRCUIT_BREAKERS.record_success(host)
+        raise
+    if _CIRCUIT_BREAKERS:
+        if response.status >= 500:
+            _CIRCUIT_BREAKERS.record_failure(host)
+        else:
+            _CIRCUIT_BREAKERS.record_success(host)
+    return (response, body)
+
+
+async def _parse_response(
+    url: str, location: str, response: Any, body: str, use_cache: bool
+) -> Graph:
+    # The same version of a graph is parsed once, and then loaded from the cache.
+    # Graphs fetched without the cache, e.g. data graphs given by url, are not kept:
+    graph_cache = _GRAPH_CACHE if use_cache else None
+    etag = response.headers.get(hdrs.ETAG)
+    cache_key = f"{location} {etag}" if etag else str(content_identifier(body))
+    if graph_cache:
+        # Reading and unpickling the file is done off the event loop, as writing it:
+        loop = asyncio.get_running_loop()
+        g = await loop.run_in_executor(None, graph_cache.get, cache_key)
+        if g is not None:
+            return g
+    logging.debug(f"Trying to parse response from {url}")
+    try:
+        g = parse_text(
+            input_graph=body,
+            content_type=response.headers.get(hdrs.CONTENT_TYPE),
+            filename=urlparse(location).path,
+        )
+    except SyntaxError as e:
+        raise SyntaxError(f"Bad syntax in graph {url}.") from e
+    if graph_cache:
+        # Writing the file and evicting old ones is done off the event loop:
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, graph_cache.put, cache_key, g)
+    return g
+
+
+def parse_text(
+    input_graph: str,
+    content_type: Optional[str] = None,
+    filename: Optional[str] = None,
+) -> Graph:
+    """Parse text as graph.
+
+    The format is given by the content type, or else by the extension of the
+    filename, or else by the first characters of the text. If the text cannot be
+    parsed in the given format, it is parsed once more in the format given by its
+    first characters, since content types and filenames are not always correct,
+    and at last as Turtle, the most common format.
+
+    The graph is named by the digest of the text, cf content_identifier.
+    """
+    identifier = content_identifier(input_graph)
+
+    def parse(_format: str) -> Graph:
+        return Graph(identifier=identifier).parse(data=input_graph, format=_format)
+
+    return _parse(parse, input_graph[:_SNIFF_SIZE], content_type, filename)
+
+
+def parse_file(
+    input_file: BinaryIO,
+    identifier: URIRef,
+    content_type: Optional[str] = None,
+    filename: Optional[str] = None,
+) -> Graph:
+    """Parse file as graph, without reading the whole file into a string.
+
+    The format is found as in parse_text. The file must be a real file, e.g. a
+    tempfile.TemporaryFile, and is left open.
+    """
+    input_file.seek(0)
+    head = input_file.read(_SNIFF_SIZE).decode(errors="ignore")
+
+    def parse(_format: str) -> Graph:
+        # Some of rdflib's parsers close the file, so we give them a file of their own:
+        with open(os.dup(input_file.fileno()), "rb") as f:
+            f.seek(0)
+            source = InputSource()
+            source.setByteStream(f)
+            return Graph(identifier=identifier).parse(source=source, format=_format)
+
+    return _parse(parse, head, content_type, filename)
+
+
+def _parse(
+    parse: Callable[[str], Graph],
+    head: str,
+    content_type: Optional[str],
+    filename: Optional[str],
+) -> Graph:
+    sniffed_format = _sniff_format(head)
+    given_format = (
+        _format_from_content_type(content_type)
+        or _format_from_filename(filename)
+        or sniffed_format
+    )
+    # Turtle is tried last, since also Turtle may start as JSON-LD, with a "[" blank node:
+    for _format in dict.fromkeys([given_format, sniffed_format, "text/turtle"]):
+        start = time.perf_counter()
+        # rdflib's parsers raise many different kinds of errors on bad input,
+        # so we have to catch them all.
         try:
-            return Graph().parse(
-                data=input_graph,
-                format=_format,
-            )
-        except Exception:
-            pass
+            g = parse(_format)
+        except Exception as e:
+            logging.debug(f"Could not parse input graph as {_format}: {e!r}")
+            continue
+        logging.debug(
+            f"Parsed {len(g)} triples as {_format} "
+            f"in {time.perf_counter() - start:.3f} seconds."
+        )
+        return g
     # If we reached this point, we were unable to parse.
     raise SyntaxError("Bad syntax in input graph.")
+
+
+def _format_from_content_type(content_type: Optional[str]) -> Optional[str]:
+    if not content_type:
+        return None
+    media_type = content_type.split(";")[0].strip().lower()
+    return _FORMAT_BY_MEDIA_TYPE.get(media_type)
+
+
+def _format_from_filename(filename: Optional[str]) -> Optional[str]:
+    if not filename:
+        return None
+    extension = posixpath.splitext(filename)[1].lower()
+    return _FORMAT_BY_EXTENSION.get(extension)
+
+
+def _sniff_format(head: str) -> str:
+    head = head.lstrip("\ufeff \t\r\n")
+    if head.startswith(("{", "[")):
+        return "application/ld+json"
+    if head.startswith(("<?xml", "<!")) or _XML_START_TAG.match(head):
+        return "application/rdf+xml"
+    return "text/turtle"
+
+
+def content_identifier(input_graph: str) -> URIRef:
+    """Return an identifier for a graph, given by the digest of its text.
+
+    Graphs parsed from the same text get the same identifier, which can be used
+    as a key when caching objects derived from the graph.
+    """
+    return digest_identifier(hashlib.sha256(input_graph.encode()).hexdigest())
+
+
+def digest_identifier(digest: str) -> URIRef:
+    """Return an identifier for a graph, given by the sha256 digest of its content."""
+    return URIRef(f"urn:sha256:{digest}")
@@ -0,0 +1,94 @@
+"""Module for caching serialized validation results in redis."""
+
+import hashlib
+import json
+import logging
+import time
+import traceback
+from typing import Any, Optional
+
+from redis.exceptions import RedisError
+
+
+def result_key(**parts: Any) -> str:
+    """Return a key for a validation result, given by the digest of its inputs."""
+    return hashlib.sha256(
+        json.dumps(parts, sort_keys=True, default=str).encode()
+    ).hexdigest()
+
+
+class ResultCache:
+    """Class representing a cache of serialized validation results in redis.
+
+    Results are kept for `ttl` seconds. Results larger than `max_entry_size`
+    bytes are not cached, and when more than `max_entries` results are cached,
+    the oldest results are removed. Clearing the cache starts a new snapshot:
+    results cached before are not used again, and expire in their own time.
+    Errors from redis are logged and count as misses.
+    """
+
+    __slots__ = ("_redis", "_namespace", "_ttl", "_max_entries", "_max_entry_size")
+
+    def __init__(
+        self,
+        redis: Any,
+        namespace: str,
+        ttl: int,
+        max_entries: int,
+        max_entry_size: int,
+    ) -> None:
+        """Initialize the cache."""
+        self._redis = redis
+        self._namespace = namespace
+        self._ttl = ttl
+        self._max_entries = max_entries
+        self._max_entry_size = max_entry_size
+
+    async def get(self, key: str) -> Optional[bytes]:
+        """Get the result cached by key, or None if not cached."""
+        try:
+            result = await self._redis.get(await self._entry_key(key))
+        except RedisError:
+            logging.warning(f"Could not get cached result {key}.")
+            logging.debug(traceback.format_exc())
+            return None
+        logging.debug(f"Result cache {'miss' if result is None else 'hit'}: {key}.")
+        return result
+
+    async def put(self, key: str, result: bytes) -> None:
+        """Cache the result by key, unless it is too large."""
+        if len(result) > self._max_entry_size:
+            logging.debug(f"Result {key} is too large to be cached.")
+            return
+        index = f"{self._namespace}:index"
+        now = time.time()
+        try:
+            entry_key = await self._entry_key(key)
+            await self._redis.set(entry_key, result, ex=self._ttl)
+            await self._redis.zadd(index, {entry_key: now})
+            # Forget the results that have expired, then the oldest results:
+            await self._redis.zremrangebyscore(index, "-inf", now - self._ttl)
+            excess = await self._redis.zcard(index) - self._max_entries
+            if excess > 0:
+                evicted = await self._redis.zpopmin(index, excess)
+                await self._redis.delete(*[k for k, _ in evicted])
+        except RedisError:
+            logging.warning(f"Could not cache result {key}.")
+            logging.debug(traceback.format_exc())
+
+    async def clear(self) -> bool:
+        """Start a new snapshot, so that no result cached before is used.
+
+        Returns False if the cache could not be cleared.
+        """
+        try:
+            await self._redis.incr(f"{self._namespace}:snapshot")
+        except RedisError:
+            logging.warning("Could not clear the result cache.")
+            logging.debug(traceback.format_exc())
+            return False
+        return True
+
+    async def _entry_key(self, key: str) -> str:
+        snapshot = await self._redis.get(f"{self._namespace}:snapshot")
+        return f"{self._namespace}:{int(snapshot or 0)}:{key}"
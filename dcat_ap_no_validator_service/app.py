@@ -1,22 +1,65 @@
 """Package for exposing validation endpoint."""
 
+import asyncio
 from datetime import timedelta
 import logging
 import os
-from typing import Any
+from typing import Any, Tuple
 
-from aiohttp import web
+from aiohttp import TCPConnector, web
+from aiohttp_client_cache import CachedSession
 from aiohttp_client_cache.backends.redis import RedisBackend
 from aiohttp_middlewares import cors_middleware, error_middleware
 from dotenv import load_dotenv
+from rdflib import Graph
 
-from .view import Ontologies, Ontology, Ping, Ready, Shapes, ShapesCollection, Validator
+from .adapter import (
+    FetchScheduler,
+    GraphRegistry,
+    known_vocabulary_urls,
+    OntologyGraphAdapter,
+    ResultCache,
+    ShapesGraphAdapter,
+    warm_up,
+)
+from .service import ValidationPool, ValidatorService
+from .view import (
+    BatchValidator,
+    Cache,
+    Metrics,
+    Ontologies,
+    Ontology,
+    Ping,
+    Ready,
+    Shapes,
+    ShapesCollection,
+    Validator,
+)
 
 load_dotenv()
 LOGGING_LEVEL = os.getenv("LOGGING_LEVEL", "INFO")
 CONFIG = os.getenv("CONFIG", "production")
 REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
 REDIS_PASSWORD = os.getenv("REDIS_PASSWORD")
+SHAPES_GRAPH_REFRESH_INTERVAL = float(
+    os.getenv("SHAPES_GRAPH_REFRESH_INTERVAL", "3600")
+)
+ONTOLOGY_GRAPH_REFRESH_INTERVAL = float(
+    os.getenv("ONTOLOGY_GRAPH_REFRESH_INTERVAL", "3600")
+)
+CACHE_VERSION = os.getenv("CACHE_VERSION", "1")
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_CONNECTIONS_PER_HOST = int(os.getenv("HTTP_MAX_CONNECTIONS_PER_HOST", "10"))
+HTTP_KEEPALIVE_TIMEOUT = float(os.getenv("HTTP_KEEPALIVE_TIMEOUT", "60"))
+DNS_CACHE_TTL = int(os.getenv("DNS_CACHE_TTL", "300"))
+RESULT_CACHE_TTL = int(os.getenv("RESULT_CACHE_TTL", "0"))
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "1000"))
+RESULT_CACHE_MAX_ENTRY_SIZE = int(
+    os.getenv("RESULT_CACHE_MAX_ENTRY_SIZE", str(10 * 1024 * 1024))
+)
+VALIDATION_EXECUTOR = os.getenv("VALIDATION_EXECUTOR", "inline")
+VALIDATION_MAX_WORKERS = int(os.getenv("VALIDATION_MAX_WORKERS", "2"))
+VALIDATION_MAX_QUEUE = int(os.getenv("VALIDATION_MAX_QUEUE", "10"))
 
 
 async def create_app() -> web.Application:
@@ -40,7 +83,10 @@ async def create_app() -> web.Application:
         [
             web.view("/ping", Ping),
             web.view("/ready", Ready),
+            web.view("/metrics", Metrics),
+            web.view("/cache", Cache),
             web.view("/validator", Validator),
+            web.view("/validator/batch", BatchValidator),
             web.view("/shapes", ShapesCollection),
             web.view("/shapes/{id}", Shapes),
             web.view("/ontologies", Ontologies),
@@ -61,14 +107,14 @@ async def create_app() -> web.Application:
         if CONFIG in {"test", "dev"}:
             cache = None
         else:  # pragma: no cover
+            # The cache is kept across restarts. Responses cached by another
+            # version of the cache are not used:
             cache = RedisBackend(
-                "aiohttp-cache",
+                f"aiohttp-cache-v{CACHE_VERSION}",
                 address=f"redis://:{REDIS_PASSWORD}@{REDIS_HOST}",
                 expire_after=timedelta(days=1),
             )
             logging.debug(f"Cache enabled: {cache}")
-            await cache.clear()
-            logging.debug(f"Cache cleared: {cache}")
         app["cache"] = cache
 
         yield
@@ -78,4 +124,134 @@ async def create_app() -> web.Application:
 
     app.cleanup_ctx.append(redis_context)
 
+    async def session_context(app: Any) -> Any:
+        # One pooled session for all outgoing requests of this worker. Connections,
+        # and the TLS sessions on them, are kept alive and reused between requests:
+        connector = TCPConnector(
+            limit=HTTP_MAX_CONNECTIONS,
+            limit_per_host=HTTP_MAX_CONNECTIONS_PER_HOST,
+            keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+            ttl_dns_cache=DNS_CACHE_TTL,
+        )
+        session = CachedSession(cache=app["cache"], connector=connector)
+        app["session"] = session
+
+        yield
+
+        await session.close()
+
+    app.cleanup_ctx.append(session_context)
+
+    async def result_cache_context(app: Any) -> Any:
+        # Keep the reports of validations in redis, if configured, to return
+        # them again for identical requests:
+        if app["cache"] and RESULT_CACHE_TTL > 0:  # pragma: no cover
+            result_cache = ResultCache(
+                await app["cache"].responses.get_connection(),
+                f"validation-results-v{CACHE_VERSION}",
+                ttl=RESULT_CACHE_TTL,
+                max_entries=RESULT_CACHE_MAX_ENTRIES,
+                max_entry_size=RESULT_CACHE_MAX_ENTRY_SIZE,
+            )
+            logging.debug("Result cache enabled.")
+        else:
+            result_cache = None
+        app["result_cache"] = result_cache
+
+        yield
+
+    app.cleanup_ctx.append(result_cache_context)
+
+    async def shapes_graph_registry_context(app: Any) -> Any:
+        # Keep parsed shapes graphs from the store, and refresh them on a schedule:
+        shapes_graph_registry = GraphRegistry(ShapesGraphAdapter)
+        app["shapes_graph_registry"] = shapes_graph_registry
+        refresh_task = asyncio.create_task(
+            shapes_graph_registry.refresh_periodically(
+                app["session"], SHAPES_GRAPH_REFRESH_INTERVAL
+            )
+        )
+
+        yield
+
+        refresh_task.cancel()
+
+    app.cleanup_ctx.append(shapes_graph_registry_context)
+
+    async def fetch_scheduler_context(app: Any) -> Any:
+        # Share limits on fetches of remote triples, and fetches in flight, between requests:
+        app["fetch_scheduler"] = FetchScheduler()
+
+        yield
+
+    app.cleanup_ctx.append(fetch_scheduler_context)
+
+    async def ontology_graph_registry_context(app: Any) -> Any:
+        # Keep the ontology graphs from the store with their imports resolved, and
+        # refresh them on a schedule:
+        async def resolve(session: CachedSession, g: Graph) -> Tuple[Graph, bool]:
+            return await ValidatorService.resolve_ontology_graph(
+                session, g, app["fetch_scheduler"]
+            )
+
+        ontology_graph_registry = GraphRegistry(OntologyGraphAdapter, resolve=resolve)
+        app["ontology_graph_registry"] = ontology_graph_registry
+        tasks = [
+            asyncio.create_task(
+                ontology_graph_registry.refresh_periodically(
+                    app["session"], ONTOLOGY_GRAPH_REFRESH_INTERVAL
+                )
+            )
+        ]
+        # Resolve the imports at startup, rather than in the first requests:
+        if app["cache"]:  # pragma: no cover
+            tasks.append(
+                asyncio.create_task(ontology_graph_registry.preload(app["session"]))
+            )
+
+        yield
+
+        for task in tasks:
+            task.cancel()
+
+    app.cleanup_ctx.append(ontology_graph_registry_context)
+
+    async def cache_warm_up_context(app: Any) -> Any:
+        # Preload known vocabularies into the caches, in the background:
+        if app["cache"]:  # pragma: no cover
+            warm_up_task = asyncio.create_task(
+                warm_up(
+                    app["session"],
+                    app["fetch_scheduler"],
+                    await known_vocabulary_urls(),
+                )
+            )
+        else:
+            warm_up_task = None
+
+        yield
+
+        if warm_up_task:  # pragma: no cover
+            warm_up_task.cancel()
+
+    app.cleanup_ctx.append(cache_warm_up_context)
+
+    async def validation_pool_context(app: Any) -> Any:
+        # Run validations in a process pool if configured, otherwise inline:
+        if VALIDATION_EXECUTOR == "process":
+            validation_pool = ValidationPool(
+                max_workers=VALIDATION_MAX_WORKERS, max_queue=VALIDATION_MAX_QUEUE
+            )
+            logging.debug(f"Validation pool enabled: {VALIDATION_MAX_WORKERS} workers")
+        else:
+            validation_pool = None
+        app["validation_pool"] = validation_pool
+
+        yield
+
+        if validation_pool:
+            validation_pool.shutdown()
+
+    app.cleanup_ctx.append(validation_pool_context)
+
     return app
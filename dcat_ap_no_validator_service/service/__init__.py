@@ -1,3 +1,4 @@
 """Package for all services."""
 
-from .validator_service import Config, ValidatorService
+from .validation_pool import ValidationPool, ValidationQueueFullError
+from .validator_service import Config, GraphFile, ValidatorService
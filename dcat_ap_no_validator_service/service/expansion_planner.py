@@ -0,0 +1,60 @@
+"""Module for planning which objects of a data graph to expand with remote triples."""
+
+from typing import Set
+
+from rdflib import Graph, RDFS, SH
+from rdflib.graph import ReadOnlyGraphAggregate
+from rdflib.term import Node
+
+from dcat_ap_no_validator_service.service.focus_graph import ShapePaths
+from dcat_ap_no_validator_service.service.inference_planner import (
+    get_shape_dependencies,
+    UNBOUNDED_PARAMETERS,
+)
+
+
+class ExpansionPlan:
+    """Class representing the objects of a data graph whose remote triples the shapes read.
+
+    The remote triples of an object can only change the results if a shape reads the
+    description of the object: checks its class by sh:class, validates it against
+    shapes of its own, e.g. by sh:node, or follows it further, e.g. in a sequence
+    path, cf ShapePaths. Objects that are focus nodes are read by the shapes too:
+    objects of the predicates of sh:targetObjectsOf, and objects typed into the
+    classes of the shapes by the ranges of their predicates in the shapes or
+    ontology graph, including the ranges that are sub-classes of those classes.
+    `predicates` are the predicates whose objects are expanded, with their
+    sub-properties. Node kinds, values and other checks of the object itself do
+    not depend on its triples. `unbounded` is set when the shapes may read any
+    triple, e.g. by SPARQL-based constraints, and the objects of all predicates
+    are expanded.
+    """
+
+    __slots__ = ("predicates", "unbounded")
+
+    def __init__(self, shapes_graph: Graph, ontology_graph: Graph) -> None:
+        """Initialize the plan from the shapes and the schema of the ontology."""
+        paths = ShapePaths(shapes_graph)
+        schema_graph = ReadOnlyGraphAggregate([shapes_graph, ontology_graph])
+        predicates: Set[Node] = paths.nested | paths.typed
+        predicates.update(shapes_graph.objects(None, SH.targetObjectsOf))
+        classes = get_shape_dependencies(shapes_graph).classes
+        for p, c in schema_graph.subject_objects(RDFS.range):
+            if not classes.isdisjoint(
+                schema_graph.transitive_objects(c, RDFS.subClassOf)
+            ):
+                predicates.add(p)
+        # Triples of sub-properties are inferred for their super-properties too:
+        self.predicates: Set[Node] = set()
+        for p in predicates:
+            for q in schema_graph.transitive_subjects(RDFS.subPropertyOf, p):
+                if q is not None:
+                    self.predicates.add(q)
+        self.unbounded = any(
+            (None, parameter, None) in shapes_graph
+            for parameter in UNBOUNDED_PARAMETERS
+        )
+
+    def expands(self, predicate: Node) -> bool:
+        """Return True if the objects of the predicate are to be expanded."""
+        return self.unbounded or predicate in self.predicates
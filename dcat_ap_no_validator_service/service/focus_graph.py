@@ -0,0 +1,218 @@
+"""Module for finding the triples the validation of focus nodes depends on."""
+
+import hashlib
+from typing import Dict, Iterable, Iterator, Optional, Set, Tuple
+
+from rdflib import BNode, Graph, Literal, RDF, SH, URIRef
+from rdflib.collection import Collection
+from rdflib.compare import to_isomorphic
+from rdflib.term import Node
+
+# Parameters of a property shape that validate the values against shapes of their own:
+_NESTING_PARAMETERS = (
+    SH.node,
+    SH.property,
+    SH.qualifiedValueShape,
+    SH["and"],
+    SH["or"],
+    SH.xone,
+    SH["not"],
+)
+
+
+class ShapePaths:
+    """Class representing the predicates followed by the shapes of a shapes graph.
+
+    `nested` are the predicates whose values are validated against shapes of their
+    own, e.g. by sh:node, or that are followed more than one step, e.g. in a sequence
+    path. `typed` are the predicates whose values must be of a class, by sh:class.
+    `inverse` are the predicates followed from object to subject.
+    """
+
+    __slots__ = ("nested", "typed", "inverse")
+
+    def __init__(self, shapes_graph: Graph) -> None:
+        """Initialize the paths from the property shapes in the shapes graph."""
+        self.nested: Set[Node] = set()
+        self.typed: Set[Node] = set()
+        self.inverse: Set[Node] = set()
+        for shape, path in shapes_graph.subject_objects(SH.path):
+            nested = isinstance(path, BNode) or any(
+                (shape, parameter, None) in shapes_graph
+                for parameter in _NESTING_PARAMETERS
+            )
+            typed = (shape, SH["class"], None) in shapes_graph
+            for predicate, inverse in path_predicates(shapes_graph, path):
+                if inverse:
+                    self.inverse.add(predicate)
+                if nested:
+                    self.nested.add(predicate)
+                if typed:
+                    self.typed.add(predicate)
+
+
+def owner(data_graph: Graph, node: Node) -> Node:
+    """Return the node if an IRI, or else the first IRI it is found under, if any."""
+    seen: Set[Node] = set()
+    while not isinstance(node, URIRef) and node not in seen:
+        seen.add(node)
+        subject = next(data_graph.subjects(None, node), None)
+        if subject is None:
+            break
+        node = subject
+    return node
+
+
+def focus_graph(
+    data_graph: Graph, focus_nodes: Iterable[Node], paths: ShapePaths
+) -> Graph:
+    """Return the triples of the data graph the validation of the focus nodes depends on.
+
+    These are the descriptions of the focus nodes, including the blank nodes found
+    under them, and of the nodes they refer to, the triples referring to the focus
+    nodes, e.g. for sh:targetObjectsOf, and the same for the nodes reached by the
+    nested and inverse predicates of the shapes.
+    """
+    g = Graph()
+    # Keep the prefixes, which show in the messages of the results:
+    for prefix, namespace in data_graph.namespaces():
+        g.bind(prefix, namespace, replace=True)
+    described: Set[Node] = set()
+    visited: Set[Node] = set()
+    pending = list(focus_nodes)
+    while pending:
+        node = pending.pop()
+        if node in visited:
+            continue
+        visited.add(node)
+        description = data_graph.cbd(node)
+        g += description
+        for _, predicate, o in description:
+            if not isinstance(o, Literal) and o not in described:
+                described.add(o)
+                g += data_graph.cbd(o)
+            if predicate in paths.nested:
+                pending.append(o)
+        for s, predicate in data_graph.subject_predicates(node):
+            g.add((s, predicate, node))
+            if predicate in paths.inverse:
+                pending.append(s)
+    return g
+
+
+def changed_nodes(old: Graph, new: Graph) -> Set[Node]:
+    """Return the nodes with triples added or removed between the old and new graph.
+
+    Blank nodes are compared by the description of the node they are found under,
+    since their labels differ each time a graph is parsed. That node is returned.
+    """
+    changed: Set[Node] = set()
+    ground_old = {t for t in old if not _has_blank_node(t)}
+    ground_new = {t for t in new if not _has_blank_node(t)}
+    for s, _, o in ground_old ^ ground_new:
+        changed.add(s)
+        if not isinstance(o, Literal):
+            changed.add(o)
+    old_digests = _blank_node_digests(old)
+    new_digests = _blank_node_digests(new)
+    for node in old_digests.keys() | new_digests.keys():
+        if old_digests.get(node) != new_digests.get(node):
+            if node is None:
+                # Blank nodes not found under any other node:
+                changed.update(_root_blank_nodes(new))
+            else:
+                changed.add(node)
+    return changed
+
+
+def affected_nodes(
+    old: Graph, new: Graph, paths: ShapePaths, changed: Set[Node]
+) -> Set[Node]:
+    """Return the nodes whose validation may differ between the old and new graph.
+
+    These are the nodes changed, and the nodes they are reached from by the nested
+    and inverse predicates of the shapes, e.g. the dataset of a changed distribution.
+    Nodes with a class changed also affect the nodes they are reached from by the
+    typed predicates of the shapes. Changed nodes not described in either graph,
+    e.g. remote nodes, count as having their class changed.
+    """
+    affected = set(changed)
+    pending = list(changed)
+    while pending:
+        node = pending.pop()
+        retyped = set(old.objects(node, RDF.type)) != set(
+            new.objects(node, RDF.type)
+        ) or ((node, None, None) not in old and (node, None, None) not in new)
+        for g in (old, new):
+            dependents = [
+                s
+                for s, predicate in g.subject_predicates(node)
+                if predicate in paths.nested or (retyped and predicate in paths.typed)
+            ]
+            dependents.extend(
+                o
+                for predicate, o in g.predicate_objects(node)
+                if predicate in paths.inverse
+            )
+            for dependent in dependents:
+                dependent = owner(g, dependent)
+                if dependent not in affected:
+                    affected.add(dependent)
+                    pending.append(dependent)
+    return affected
+
+
+def path_predicates(shapes_graph: Graph, path: Node) -> Iterator[Tuple[Node, bool]]:
+    """Yield the predicates of the path, and whether they are followed inversely."""
+    if not isinstance(path, BNode):
+        yield (path, False)
+        return
+    if (path, RDF.first, None) in shapes_graph:
+        # A sequence path:
+        for member in Collection(shapes_graph, path):
+            yield from path_predicates(shapes_graph, member)
+        return
+    for parameter, value in shapes_graph.predicate_objects(path):
+        if parameter == SH.inversePath:
+            for predicate, inverse in path_predicates(shapes_graph, value):
+                yield (predicate, not inverse)
+        elif parameter == SH.alternativePath:
+            for member in Collection(shapes_graph, value):
+                yield from path_predicates(shapes_graph, member)
+        else:
+            # sh:zeroOrMorePath, sh:oneOrMorePath or sh:zeroOrOnePath:
+            yield from path_predicates(shapes_graph, value)
+
+
+def _has_blank_node(triple: Tuple[Node, Node, Node]) -> bool:
+    return isinstance(triple[0], BNode) or isinstance(triple[2], BNode)
+
+
+def _blank_node_digests(g: Graph) -> Dict[Optional[Node], str]:
+    """Return a digest of the blank nodes found under each node, by that node.
+
+    Blank nodes not found under any other node are digested together, by None.
+    """
+    descriptions: Dict[Optional[Node], Graph] = dict()
+    for s, p, o in g:
+        if isinstance(o, BNode) and not isinstance(s, BNode):
+            description = descriptions.setdefault(s, Graph())
+            description.add((s, p, o))
+            description += g.cbd(o)
+    roots = _root_blank_nodes(g)
+    if roots:
+        description = descriptions.setdefault(None, Graph())
+        for root in roots:
+            description += g.cbd(root)
+    return {
+        node: hashlib.sha256(
+            str(to_isomorphic(description).graph_digest()).encode()
+        ).hexdigest()
+        for node, description in descriptions.items()
+    }
+
+
+def _root_blank_nodes(g: Graph) -> Set[Node]:
+    return {
+        s for s in g.subjects() if isinstance(s, BNode) and (None, None, s) not in g
+    }
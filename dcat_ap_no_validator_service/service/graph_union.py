@@ -0,0 +1,40 @@
+"""Module for reading graphs as one graph, without merging them into a new graph."""
+
+from typing import Any, Generator, List, Tuple
+
+from rdflib import Graph, URIRef
+from rdflib.graph import ReadOnlyGraphAggregate
+
+
+class GraphUnion(ReadOnlyGraphAggregate):
+    """Class representing a read-only view over the union of graphs.
+
+    Graphs in the union are not copied, so a graph shared between requests, e.g. an
+    ontology graph from the registry, can be read together with triples of the
+    request. Unions in the union are replaced by their graphs. Unlike rdflib's
+    ReadOnlyGraphAggregate, the union can be pickled, e.g. to a worker process,
+    and has the prefixes of its graphs.
+    """
+
+    def __init__(self, graphs: List[Graph]) -> None:
+        """Initialize the union of the graphs."""
+        super().__init__(
+            [
+                member
+                for g in graphs
+                for member in (g.graphs if isinstance(g, GraphUnion) else [g])
+            ]
+        )
+
+    def namespaces(self) -> Generator[Tuple[str, URIRef], None, None]:
+        """Yield the prefixes of the graphs, the first graph binding a prefix first."""
+        seen = set()
+        for g in self.graphs:
+            for prefix, namespace in g.namespaces():
+                if prefix not in seen:
+                    seen.add(prefix)
+                    yield (prefix, namespace)
+
+    def __reduce__(self) -> Tuple[Any, ...]:  # type: ignore[override]
+        """Pickle the graphs of the union."""
+        return (GraphUnion, (self.graphs,))
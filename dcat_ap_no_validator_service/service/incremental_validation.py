@@ -0,0 +1,152 @@
+"""Module for revalidating only the focus nodes affected by changes to a catalog."""
+
+from collections import OrderedDict
+from dataclasses import dataclass
+import os
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from dotenv import load_dotenv
+from rdflib import BNode, Graph, Literal, RDF, RDFS, SH, URIRef
+from rdflib.term import Node
+
+from dcat_ap_no_validator_service.service.focus_graph import (
+    affected_nodes,
+    changed_nodes,
+    owner,
+    ShapePaths,
+)
+from dcat_ap_no_validator_service.service.inference_planner import (
+    get_shape_dependencies,
+)
+
+load_dotenv()
+INCREMENTAL_VALIDATION_CACHE_SIZE = int(
+    os.getenv("INCREMENTAL_VALIDATION_CACHE_SIZE", "8")
+)
+INCREMENTAL_VALIDATION_MAX_TRIPLES = int(
+    os.getenv("INCREMENTAL_VALIDATION_MAX_TRIPLES", "1000000")
+)
+
+# Predicates of the ontology that change what is inferred about any node:
+_SCHEMA_PREDICATES = (RDFS.subClassOf, RDFS.subPropertyOf, RDFS.domain, RDFS.range)
+
+# The previous validations are kept per process, i.e. per gunicorn worker, and a
+# catalog validated again by another worker is validated whole:
+_PREVIOUS_VALIDATIONS: "OrderedDict[str, PreviousValidation]" = OrderedDict()
+
+
+@dataclass
+class PreviousValidation:
+    """Class for keeping track of the previous validation of a catalog.
+
+    The results are the validation results of the report, by the node of the data
+    graph their focus node is found under, cf owner.
+    """
+
+    shapes_graph_identifier: Node
+    data_graph: Graph
+    ontology_graph: Graph
+    results: Dict[Node, Graph]
+
+    def size(self) -> int:
+        """Return the number of triples kept for the validation."""
+        return (
+            len(self.data_graph)
+            + len(self.ontology_graph)
+            + sum(len(g) for g in self.results.values())
+        )
+
+
+def get_previous_validation(catalog_key: str) -> Optional[PreviousValidation]:
+    """Get the previous validation of the catalog, if kept."""
+    previous = _PREVIOUS_VALIDATIONS.get(catalog_key)
+    if previous is not None:
+        _PREVIOUS_VALIDATIONS.move_to_end(catalog_key)
+    return previous
+
+
+def put_previous_validation(catalog_key: str, previous: PreviousValidation) -> None:
+    """Keep the validation of the catalog, forgetting the oldest if too many.
+
+    The oldest validations are forgotten too when the validations kept hold more
+    than INCREMENTAL_VALIDATION_MAX_TRIPLES triples, and a validation holding more
+    than that is not kept at all.
+    """
+    _PREVIOUS_VALIDATIONS.pop(catalog_key, None)
+    if previous.size() > INCREMENTAL_VALIDATION_MAX_TRIPLES:
+        return
+    _PREVIOUS_VALIDATIONS[catalog_key] = previous
+    while len(_PREVIOUS_VALIDATIONS) > INCREMENTAL_VALIDATION_CACHE_SIZE or (
+        sum(p.size() for p in _PREVIOUS_VALIDATIONS.values())
+        > INCREMENTAL_VALIDATION_MAX_TRIPLES
+    ):
+        _PREVIOUS_VALIDATIONS.popitem(last=False)
+
+
+def plan_revalidation(
+    previous: PreviousValidation,
+    data_graph: Graph,
+    ontology_graph: Graph,
+    shapes_graph: Graph,
+    paths: ShapePaths,
+) -> Optional[Set[Node]]:
+    """Return the nodes to revalidate, or None if the whole data graph must be.
+
+    The whole data graph must be revalidated when the shapes graph is another, or
+    is not identified by its content, or may read triples beyond those of the
+    focus nodes, e.g. by SPARQL-based constraints, cf ShapeDependencies, or when
+    the schema of the ontology changed.
+    Otherwise the nodes affected by the changes to the data graph and to the
+    descriptions of remote nodes in the ontology graph are revalidated, and the
+    nodes with results referring to blank nodes, whose labels are not kept.
+    """
+    if (
+        not _is_content_identifier(shapes_graph.identifier)
+        or shapes_graph.identifier != previous.shapes_graph_identifier
+        or get_shape_dependencies(shapes_graph).unbounded
+    ):
+        return None
+    ontology_changes = changed_nodes(previous.ontology_graph, ontology_graph)
+    for node in ontology_changes:
+        for g in (previous.ontology_graph, ontology_graph):
+            if any((node, p, None) in g for p in _SCHEMA_PREDICATES):
+                return None
+    changed = changed_nodes(previous.data_graph, data_graph) | ontology_changes
+    nodes = affected_nodes(previous.data_graph, data_graph, paths, changed)
+    for node, results in previous.results.items():
+        if any(
+            isinstance(o, BNode)
+            for p in (SH.focusNode, SH.value)
+            for o in results.objects(None, p)
+        ):
+            nodes.add(node)
+    return nodes
+
+
+def split_results(results_graph: Graph, data_graph: Graph) -> Dict[Node, Graph]:
+    """Return the validation results of the report by the owner of their focus node."""
+    results: Dict[Node, Graph] = dict()
+    for result in results_graph.subjects(RDF.type, SH.ValidationResult):
+        focus_node = next(results_graph.objects(result, SH.focusNode))
+        g = results.setdefault(owner(data_graph, focus_node), Graph())
+        g += results_graph.cbd(result)
+    return results
+
+
+def merge_results(results: Iterable[Graph]) -> Tuple[bool, Graph]:
+    """Return a validation report of the validation results, and whether it conforms."""
+    results_graph = Graph()
+    results_graph.bind("sh", SH)
+    report = BNode()
+    results_graph.add((report, RDF.type, SH.ValidationReport))
+    for g in results:
+        results_graph += g
+        for result in g.subjects(RDF.type, SH.ValidationResult):
+            results_graph.add((report, SH.result, result))
+    conforms = (report, SH.result, None) not in results_graph
+    results_graph.add((report, SH.conforms, Literal(conforms)))
+    return (conforms, results_graph)
+
+
+def _is_content_identifier(identifier: Node) -> bool:
+    return isinstance(identifier, URIRef) and identifier.startswith("urn:sha256:")
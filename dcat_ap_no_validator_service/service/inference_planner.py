@@ -0,0 +1,338 @@
+"""Module for planning the RDFS inference a validation needs."""
+
+from collections import OrderedDict
+import logging
+import os
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+
+from dotenv import load_dotenv
+from rdflib import BNode, Graph, Literal, OWL, RDF, RDFS, SH, URIRef
+from rdflib.term import Node
+
+from dcat_ap_no_validator_service.service.focus_graph import path_predicates
+from dcat_ap_no_validator_service.service.graph_union import GraphUnion
+from dcat_ap_no_validator_service.service.shapes_graph_cache import content_key
+
+load_dotenv()
+RDFS_SCHEMA_CACHE_SIZE = int(os.getenv("RDFS_SCHEMA_CACHE_SIZE", "16"))
+
+Triple = Tuple[Node, Node, Node]
+
+_SCHEMA_PREDICATES = (RDFS.subClassOf, RDFS.subPropertyOf, RDFS.domain, RDFS.range)
+
+# Parameters of a shape comparing the values of its path to those of a predicate:
+_PROPERTY_PAIR_PARAMETERS = (
+    SH.equals,
+    SH.disjoint,
+    SH.lessThan,
+    SH.lessThanOrEquals,
+)
+
+# Parameters of a shape whose results may depend on any triple of the data graph:
+UNBOUNDED_PARAMETERS = (
+    SH.sparql,
+    SH.target,
+    SH.validator,
+    SH.nodeValidator,
+    SH.propertyValidator,
+)
+
+# Predicates RDFS inference adds triples of by rules of the RDF and RDFS vocabularies:
+_VOCABULARY_PREDICATES = (RDF.type, RDFS.subClassOf, RDFS.subPropertyOf, RDFS.member)
+
+# The caches are kept per process, like the shapes graph cache:
+_SHAPE_DEPENDENCIES: "OrderedDict[str, ShapeDependencies]" = OrderedDict()
+_RDFS_SCHEMAS: "OrderedDict[FrozenSet[Triple], RdfsSchema]" = OrderedDict()
+_ONTOLOGY_INFERENCES: "OrderedDict[Tuple[str, str], Optional[OntologyInference]]" = (
+    OrderedDict()
+)
+
+
+class ShapeDependencies:
+    """Class representing the triples of a data graph the shapes of a shapes graph read.
+
+    `predicates` are the predicates followed by the paths of the shapes, compared
+    by property pair constraints, or targeted by sh:targetSubjectsOf and
+    sh:targetObjectsOf. `classes` are the classes of sh:class and of class targets.
+    `unbounded` is set when the results may depend on other triples too, e.g. for
+    closed shapes, SPARQL-based constraints, or shapes on the types and hierarchies
+    of the RDF and RDFS vocabularies, which RDFS inference adds triples of to every
+    node.
+    """
+
+    __slots__ = ("predicates", "classes", "unbounded")
+
+    def __init__(self, shapes_graph: Graph) -> None:
+        """Initialize the dependencies from the shapes in the shapes graph."""
+        self.predicates: Set[Node] = set()
+        self.classes: Set[Node] = set()
+        for path in shapes_graph.objects(None, SH.path):
+            self.predicates.update(p for p, _ in path_predicates(shapes_graph, path))
+        for parameter in (
+            *_PROPERTY_PAIR_PARAMETERS,
+            SH.targetSubjectsOf,
+            SH.targetObjectsOf,
+        ):
+            self.predicates.update(shapes_graph.objects(None, parameter))
+        self.classes.update(shapes_graph.objects(None, SH["class"]))
+        self.classes.update(shapes_graph.objects(None, SH.targetClass))
+        # Shapes that are classes target their instances, cf implicit class targets:
+        class_types: Set[Node] = {RDFS.Class, OWL.Class}
+        class_types.update(shapes_graph.subjects(RDFS.subClassOf, RDFS.Class))
+        for class_type in class_types:
+            self.classes.update(shapes_graph.subjects(RDF.type, class_type))
+        self.unbounded = (
+            any(
+                (None, parameter, None) in shapes_graph
+                for parameter in UNBOUNDED_PARAMETERS
+            )
+            or any(
+                closed != Literal(False)
+                for closed in shapes_graph.objects(None, SH.closed)
+            )
+            or any(p in self.predicates for p in _VOCABULARY_PREDICATES)
+            or any(_in_rdfs_vocabulary(c) for c in self.classes)
+        )
+
+
+class RdfsSchema:
+    """Class representing the RDFS closure of the schema triples of a graph.
+
+    `super_properties` and `super_classes` are the properties and classes each
+    property and class is a sub-property and sub-class of, transitively. `domains`
+    and `ranges` are the classes of the subjects and objects of each property,
+    including those of its super-properties.
+    """
+
+    __slots__ = ("super_properties", "super_classes", "domains", "ranges")
+
+    def __init__(self, schema_triples: FrozenSet[Triple]) -> None:
+        """Initialize the closure of the schema triples."""
+        by_predicate: Dict[Node, Dict[Node, Set[Node]]] = {
+            p: dict() for p in _SCHEMA_PREDICATES
+        }
+        for s, p, o in schema_triples:
+            by_predicate[p].setdefault(s, set()).add(o)
+        self.super_properties = _transitive_closure(by_predicate[RDFS.subPropertyOf])
+        self.super_classes = _transitive_closure(by_predicate[RDFS.subClassOf])
+        self.domains = _inherit(by_predicate[RDFS.domain], self.super_properties)
+        self.ranges = _inherit(by_predicate[RDFS.range], self.super_properties)
+
+
+class OntologyInference:
+    """Class representing the inference of an ontology graph for a shapes graph.
+
+    `schema_triples` are the schema triples of the ontology graph, and
+    `entailments` the entailments of its triples that the shapes read, by the
+    RDFS closure of its schema, cf plan_inference.
+    """
+
+    __slots__ = ("schema_triples", "entailments")
+
+    def __init__(
+        self, schema_triples: FrozenSet[Triple], entailments: FrozenSet[Triple]
+    ) -> None:
+        """Initialize the inference."""
+        self.schema_triples = schema_triples
+        self.entailments = entailments
+
+
+def get_shape_dependencies(shapes_graph: Graph) -> ShapeDependencies:
+    """Get the dependencies of the shapes, cached by the content of the shapes graph."""
+    key = content_key(shapes_graph)
+    if key is None:
+        return ShapeDependencies(shapes_graph)
+    if key in _SHAPE_DEPENDENCIES:
+        _SHAPE_DEPENDENCIES.move_to_end(key)
+        return _SHAPE_DEPENDENCIES[key]
+    dependencies = ShapeDependencies(shapes_graph)
+    _SHAPE_DEPENDENCIES[key] = dependencies
+    while len(_SHAPE_DEPENDENCIES) > RDFS_SCHEMA_CACHE_SIZE:
+        _SHAPE_DEPENDENCIES.popitem(last=False)
+    return dependencies
+
+
+def get_rdfs_schema(schema_triples: FrozenSet[Triple]) -> RdfsSchema:
+    """Get the RDFS closure of the schema triples, cached by the schema triples.
+
+    The schema triples are mostly those of the ontology graph, which are the same
+    between validations, e.g. of the ontology graphs in the store, while the data
+    graphs seldom have any.
+    """
+    if schema_triples in _RDFS_SCHEMAS:
+        logging.debug("RDFS schema cache hit.")
+        _RDFS_SCHEMAS.move_to_end(schema_triples)
+        return _RDFS_SCHEMAS[schema_triples]
+    logging.debug(f"RDFS schema cache miss: {len(schema_triples)} schema triples.")
+    schema = RdfsSchema(schema_triples)
+    _RDFS_SCHEMAS[schema_triples] = schema
+    while len(_RDFS_SCHEMAS) > RDFS_SCHEMA_CACHE_SIZE:
+        _RDFS_SCHEMAS.popitem(last=False)
+    return schema
+
+
+def get_ontology_inference(
+    ontology_graph: Graph, shapes_graph: Graph, dependencies: ShapeDependencies
+) -> Optional[OntologyInference]:
+    """Get the inference of the ontology graph alone, cached by the graph contents.
+
+    The cache is keyed by the content identifiers of the ontology graph and the
+    shapes graph, since the entailments depend on both. Graphs without a content
+    identifier are not cached. Returns None when the full RDFS inference is needed.
+    """
+    ontology_key = content_key(ontology_graph)
+    shapes_key = content_key(shapes_graph)
+    if ontology_key is None or shapes_key is None:
+        return _ontology_inference(ontology_graph, dependencies)
+    key = (ontology_key, shapes_key)
+    if key in _ONTOLOGY_INFERENCES:
+        logging.debug("Ontology inference cache hit.")
+        _ONTOLOGY_INFERENCES.move_to_end(key)
+        return _ONTOLOGY_INFERENCES[key]
+    logging.debug(f"Ontology inference cache miss: {ontology_key}.")
+    inference = _ontology_inference(ontology_graph, dependencies)
+    _ONTOLOGY_INFERENCES[key] = inference
+    while len(_ONTOLOGY_INFERENCES) > RDFS_SCHEMA_CACHE_SIZE:
+        _ONTOLOGY_INFERENCES.popitem(last=False)
+    return inference
+
+
+def plan_inference(
+    data_graph: Graph, ontology_graph: Graph, shapes_graph: Graph
+) -> Optional[Set[Triple]]:
+    """Return the RDFS entailments that can change the results of the shapes.
+
+    These are the triples of the super-properties the shapes read, and the types
+    given by domains and ranges whose classes are, or are sub-classes of, the
+    classes of the shapes. Types given by sub-classes are not needed, since
+    instances of sub-classes are instances of the class in SHACL too. Without any
+    such entailment, no inference is needed. Returns None when the full RDFS
+    inference is needed, i.e. when the shapes depend on other triples, or the
+    schema has blank node classes or properties.
+
+    The entailments of the ontology graph alone are cached, cf
+    get_ontology_inference. Of a union of graphs, cf GraphUnion, only the first
+    graph, e.g. the ontology graph from the registry, is cached, while the other
+    graphs, e.g. of remote triples, are read per validation, as the data graph.
+    As long as these have no schema triples, only their own entailments are found.
+    """
+    dependencies = get_shape_dependencies(shapes_graph)
+    if dependencies.unbounded:
+        return None
+    if isinstance(ontology_graph, GraphUnion):
+        static_graph, *graphs = ontology_graph.graphs
+    else:
+        static_graph, graphs = ontology_graph, []
+    graphs.insert(0, data_graph)
+    inference = get_ontology_inference(static_graph, shapes_graph, dependencies)
+    schema_triples = _schema_triples(graphs)
+    if inference is None or schema_triples is None:
+        return None
+    if schema_triples:
+        # The schema of the ontology graph is extended, so the inference is redone:
+        schema_triples.update(inference.schema_triples)
+        graphs.append(static_graph)
+        entailments: Set[Triple] = set()
+    elif not inference.schema_triples:
+        return set()
+    else:
+        schema_triples = set(inference.schema_triples)
+        entailments = set(inference.entailments)
+    schema = get_rdfs_schema(frozenset(schema_triples))
+    entailments.update(_entailments(schema, dependencies, graphs))
+    return entailments
+
+
+def _ontology_inference(
+    ontology_graph: Graph, dependencies: ShapeDependencies
+) -> Optional[OntologyInference]:
+    schema_triples = _schema_triples([ontology_graph])
+    if schema_triples is None:
+        return None
+    if not schema_triples:
+        return OntologyInference(frozenset(), frozenset())
+    schema = get_rdfs_schema(frozenset(schema_triples))
+    return OntologyInference(
+        frozenset(schema_triples),
+        frozenset(_entailments(schema, dependencies, [ontology_graph])),
+    )
+
+
+def _schema_triples(graphs: List[Graph]) -> Optional[Set[Triple]]:
+    """Return the schema triples of the graphs, or None if any has a blank node subject."""
+    schema_triples: Set[Triple] = set()
+    for g in graphs:
+        for schema_predicate in _SCHEMA_PREDICATES:
+            for s, p, o in g.triples((None, schema_predicate, None)):
+                if isinstance(s, BNode):
+                    return None
+                # The closure of a blank node class, e.g. a union, is not needed,
+                # since a blank node class is not a sub-class of any class:
+                if not isinstance(o, BNode):
+                    schema_triples.add((s, p, o))
+    return schema_triples
+
+
+def _entailments(
+    schema: RdfsSchema, dependencies: ShapeDependencies, graphs: List[Graph]
+) -> Set[Triple]:
+    rules: Dict[Node, Tuple[List[Node], List[Node], List[Node]]] = dict()
+    entailments: Set[Triple] = set()
+    for g in graphs:
+        for s, p, o in g:
+            if p not in rules:
+                rules[p] = _entailment_rule(schema, dependencies, p)
+            super_properties, domains, ranges = rules[p]
+            entailments.update((s, q, o) for q in super_properties)
+            entailments.update((s, RDF.type, c) for c in domains)
+            entailments.update((o, RDF.type, c) for c in ranges)
+    return entailments
+
+
+def _entailment_rule(
+    schema: RdfsSchema, dependencies: ShapeDependencies, p: Node
+) -> Tuple[List[Node], List[Node], List[Node]]:
+    """Return the super-properties, domains and ranges of p that the shapes read."""
+
+    def is_read(c: Node) -> bool:
+        return c in dependencies.classes or not dependencies.classes.isdisjoint(
+            schema.super_classes.get(c, ())
+        )
+
+    return (
+        [q for q in schema.super_properties.get(p, ()) if q in dependencies.predicates],
+        [c for c in schema.domains.get(p, ()) if is_read(c)],
+        [c for c in schema.ranges.get(p, ()) if is_read(c)],
+    )
+
+
+def _transitive_closure(edges: Dict[Node, Set[Node]]) -> Dict[Node, Set[Node]]:
+    closure: Dict[Node, Set[Node]] = dict()
+    for start in edges:
+        reached: Set[Node] = set()
+        pending = list(edges[start])
+        while pending:
+            node = pending.pop()
+            if node not in reached:
+                reached.add(node)
+                pending.extend(edges.get(node, ()))
+        closure[start] = reached
+    return closure
+
+
+def _inherit(
+    values: Dict[Node, Set[Node]], super_properties: Dict[Node, Set[Node]]
+) -> Dict[Node, Set[Node]]:
+    """Add the values of the super-properties of each property to its own."""
+    inherited: Dict[Node, Set[Node]] = {p: set(v) for p, v in values.items()}
+    for p, supers in super_properties.items():
+        for q in supers:
+            if q in values:
+                inherited.setdefault(p, set()).update(values[q])
+    return inherited
+
+
+def _in_rdfs_vocabulary(term: Node) -> bool:
+    return isinstance(term, URIRef) and (
+        term.startswith(str(RDF)) or term.startswith(str(RDFS))
+    )
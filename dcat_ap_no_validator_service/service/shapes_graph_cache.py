@@ -0,0 +1,48 @@
+"""Module for caching pyshacl's shapes graphs between validations."""
+
+from collections import OrderedDict
+import logging
+import os
+from typing import Optional
+
+from dotenv import load_dotenv
+from pyshacl.shapes_graph import ShapesGraph
+from rdflib import Graph, URIRef
+
+load_dotenv()
+SHAPES_GRAPH_CACHE_SIZE = int(os.getenv("SHAPES_GRAPH_CACHE_SIZE", "16"))
+
+# The cache is kept per process, i.e. per gunicorn worker and per worker in the validation pool:
+_SHAPES_GRAPH_CACHE: "OrderedDict[str, ShapesGraph]" = OrderedDict()
+
+
+def get_shapes_graph(shapes_graph: Graph) -> ShapesGraph:
+    """Get pyshacl's shapes graph, with shapes already built if cached.
+
+    pyshacl finds the node shapes, resolves the targets and builds the shapes the
+    first time the shapes of a ShapesGraph are asked for. The cache is keyed by the
+    content identifier of the shapes graph. Shapes graphs without a content
+    identifier are not cached.
+    """
+    key = content_key(shapes_graph)
+    if key is None:
+        return ShapesGraph(shapes_graph)
+    if key in _SHAPES_GRAPH_CACHE:
+        logging.debug(f"Shapes graph cache hit: {key}.")
+        _SHAPES_GRAPH_CACHE.move_to_end(key)
+        return _SHAPES_GRAPH_CACHE[key]
+    logging.debug(f"Shapes graph cache miss: {key}.")
+    sg = ShapesGraph(shapes_graph)
+    _ = sg.shapes  # This property getter triggers shapes harvest.
+    _SHAPES_GRAPH_CACHE[key] = sg
+    while len(_SHAPES_GRAPH_CACHE) > SHAPES_GRAPH_CACHE_SIZE:
+        _SHAPES_GRAPH_CACHE.popitem(last=False)
+    return sg
+
+
+def content_key(shapes_graph: Graph) -> Optional[str]:
+    """Return the content identifier of the shapes graph, if it has one."""
+    identifier = shapes_graph.identifier
+    if isinstance(identifier, URIRef) and identifier.startswith("urn:sha256:"):
+        return str(identifier)
+    return None
@@ -0,0 +1,79 @@
+"""Module for splitting a data graph into shards validated in parallel."""
+
+from dataclasses import dataclass
+from typing import List, Set, Tuple
+
+from rdflib import Graph, RDF, URIRef
+from rdflib.term import Node
+
+from dcat_ap_no_validator_service.service.focus_graph import (
+    focus_graph,
+    owner,
+    ShapePaths,
+)
+from dcat_ap_no_validator_service.service.incremental_validation import (
+    merge_results,
+    split_results,
+)
+
+
+@dataclass
+class Shard:
+    """Class for keeping track of a shard of a data graph.
+
+    The data graph of the shard holds the triples the validation of its nodes
+    depends on, cf focus_graph. Only the results of its nodes are kept.
+    """
+
+    nodes: Set[Node]
+    data_graph: Graph
+
+
+def shard_data_graph(
+    data_graph: Graph, paths: ShapePaths, shard_size: int
+) -> List[Shard]:
+    """Split the data graph into shards of at most shard_size nodes.
+
+    The nodes are the nodes of the data graph that may be focus nodes, with the
+    blank nodes found under them, cf owner. A data graph with no more nodes than
+    that is returned whole, as one shard.
+    """
+    nodes = {owner(data_graph, s) for s in data_graph.subjects()}
+    nodes.update(
+        o
+        for p, o in data_graph.predicate_objects()
+        if p != RDF.type and isinstance(o, URIRef)
+    )
+    if len(nodes) <= shard_size:
+        return [Shard(nodes=nodes, data_graph=data_graph)]
+    ordered = sorted(nodes, key=str)
+    shards = []
+    for start in range(0, len(ordered), shard_size):
+        end = start + shard_size
+        shard_nodes = set(ordered[start:end])
+        shards.append(
+            Shard(
+                nodes=shard_nodes,
+                data_graph=focus_graph(data_graph, shard_nodes, paths),
+            )
+        )
+    return shards
+
+
+def merge_shard_results(
+    data_graph: Graph, shards: List[Shard], results_graphs: List[Graph]
+) -> Tuple[bool, Graph]:
+    """Merge the results of the nodes of each shard into one validation report.
+
+    Results of focus nodes not in the data graph, e.g. nodes described in the
+    ontology graph, are found in every shard, and are taken from the first.
+    """
+    all_nodes = set().union(*(shard.nodes for shard in shards))
+    results = dict()
+    for i, (shard, results_graph) in enumerate(
+        zip(shards, results_graphs, strict=True)
+    ):
+        for node, g in split_results(results_graph, data_graph).items():
+            if node in shard.nodes or (i == 0 and node not in all_nodes):
+                results[node] = g
+    return merge_results(results.values())
@@ -0,0 +1,226 @@
+"""Module for running shacl validation in a bounded process pool."""
+
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+import logging
+import multiprocessing
+from typing import Any, List, Optional, Tuple
+
+from pyshacl import Validator
+from pyshacl.monkey import apply_patches
+from pyshacl.rdfutil import clone_graph
+from pyshacl.shapes_graph import ShapesGraph
+from rdflib import Graph
+from rdflib.term import Node
+
+from dcat_ap_no_validator_service.service.graph_union import GraphUnion
+from dcat_ap_no_validator_service.service.inference_planner import plan_inference
+from dcat_ap_no_validator_service.service.shapes_graph_cache import get_shapes_graph
+
+
+class ValidationQueueFullError(Exception):
+    """Class representing custom exception for a full validation queue."""
+
+    def __init__(self, message: str) -> None:
+        """Initialize the error."""
+        # Call the base class constructor with the parameters it needs
+        super().__init__(message)
+
+
+def run_validation(
+    data_graph: Graph,
+    ontology_graph: Graph,
+    shapes_graph: Graph,
+    inplace: bool = False,
+) -> Tuple[bool, Graph]:
+    """Validate the data graph against the shapes graph.
+
+    This function is run either directly in the request handler or in a worker process.
+    The shapes are taken from the shapes graph cache of the process. The RDFS inference
+    is planned from the shapes, cf plan_inference: only the entailments that can change
+    the results are added, unless the full RDFS inference is needed.
+
+    The ontology graph and the inferred triples are added to a copy of the data graph,
+    unless inplace, for data graphs owned by the caller. They are then added to the
+    data graph itself, which saves the memory of the copy, and removed again after
+    validation, so the data graph holds the asserted triples only. The ontology graph
+    may be a union of graphs, cf GraphUnion, whose graphs are added one by one.
+    """
+    apply_patches()
+    if not inplace:
+        return _validate(data_graph, ontology_graph, shapes_graph, inplace=False)
+    target_graph = _RecordingGraph(data_graph)
+    try:
+        return _validate(target_graph, ontology_graph, shapes_graph, inplace=True)
+    finally:
+        target_graph.remove_added()
+
+
+def _validate(
+    data_graph: Graph, ontology_graph: Graph, shapes_graph: Graph, inplace: bool
+) -> Tuple[bool, Graph]:
+    entailments = plan_inference(data_graph, ontology_graph, shapes_graph)
+    if entailments is None:
+        inference = "rdfs"
+    else:
+        inference = "none"
+        if entailments:
+            logging.debug(f"Adding {len(entailments)} RDFS entailments.")
+            if not inplace:
+                data_graph = clone_graph(data_graph)
+                # The ontology graph may be mixed into the copy too:
+                inplace = True
+            for t in entailments:
+                data_graph.add(t)
+    ont_graph: Optional[Graph] = ontology_graph
+    if isinstance(ontology_graph, GraphUnion):
+        # pyshacl cannot mix a union of graphs into the data graph, so we do:
+        if not inplace:
+            data_graph = clone_graph(data_graph)
+            inplace = True
+        for g in ontology_graph.graphs:
+            clone_graph(g, target_graph=data_graph)
+        ont_graph = None
+    # `inference` should be set to one of the followoing {"none", "rdfs", "owlrl", "both"}
+    validator = _CachedShapesValidator(
+        data_graph,
+        shapes_graph=get_shapes_graph(shapes_graph),
+        ont_graph=ont_graph,
+        options={
+            "inference": inference,
+            "inplace": inplace,
+            "advanced": False,
+        },
+    )
+    conforms, results_graph, _ = validator.run()
+    return (conforms, results_graph)
+
+
+class _RecordingGraph(Graph):
+    """Graph over the store of a data graph, recording the triples added to it.
+
+    Triples already in the data graph are not recorded, so removing the recorded
+    triples leaves the data graph as it was.
+    """
+
+    def __init__(self, data_graph: Graph) -> None:
+        super().__init__(
+            store=data_graph.store,
+            identifier=data_graph.identifier,
+            namespace_manager=data_graph.namespace_manager,
+        )
+        self.added: List[Tuple[Node, Node, Node]] = []
+
+    def add(self, triple: Tuple[Node, Node, Node]) -> "_RecordingGraph":
+        if triple not in self:
+            self.added.append(triple)
+            super().add(triple)
+        return self
+
+    def remove_added(self) -> None:
+        logging.debug(f"Removing {len(self.added)} added triples.")
+        for triple in self.added:
+            self.remove(triple)
+        self.added = []
+
+
+class _CachedShapesValidator(Validator):
+    """pyshacl validator using a shapes graph with shapes already built."""
+
+    def __init__(
+        self, data_graph: Graph, shapes_graph: ShapesGraph, **kwargs: Any
+    ) -> None:
+        super().__init__(data_graph, shacl_graph=shapes_graph.graph, **kwargs)
+        self.shacl_graph = shapes_graph
+
+
+class ValidationPool:
+    """Class representing a bounded pool of validation worker processes.
+
+    At most `max_workers` validations run at the same time. Up to `max_queue` further
+    validations may wait for a free worker. Beyond that, new validations are rejected.
+    The graphs are pickled when sent to the worker, and the results graph is pickled
+    when sent back.
+    """
+
+    __slots__ = ("_executor", "_semaphore", "_max_pending", "_pending")
+
+    def __init__(self, max_workers: int, max_queue: int) -> None:
+        """Initialize the pool."""
+        self._executor = ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        self._semaphore = asyncio.Semaphore(max_workers)
+        self._max_pending = max_workers + max_queue
+        self._pending = 0
+
+    @property
+    def pending(self) -> int:
+        """Number of validations running or waiting for a worker."""
+        return self._pending
+
+    async def validate(
+        self, data_graph: Graph, ontology_graph: Graph, shapes_graph: Graph
+    ) -> Tuple[bool, Graph]:
+        """Run validation in a worker process when one is free."""
+        if self._pending >= self._max_pending:
+            raise ValidationQueueFullError(
+                f"Validation queue is full: {self._pending} validations pending."
+            )
+        self._pending += 1
+        try:
+            # Graphs are only sent to the pool when a worker is free:
+            async with self._semaphore:
+                logging.debug(f"Validating in worker, {self._pending} pending.")
+                loop = asyncio.get_running_loop()
+                # The data graph unpickled in the worker is the worker's own:
+                return await loop.run_in_executor(
+                    self._executor,
+                    run_validation,
+                    data_graph,
+                    ontology_graph,
+                    shapes_graph,
+                    True,
+                )
+        finally:
+            self._pending -= 1
+
+    async def validate_shards(
+        self, data_graphs: List[Graph], ontology_graph: Graph, shapes_graph: Graph
+    ) -> List[Tuple[bool, Graph]]:
+        """Run validation of each data graph in the worker processes, in parallel.
+
+        The data graphs, e.g. shards of one data graph, count as one validation
+        in the queue, and are validated as workers get free.
+        """
+        if self._pending >= self._max_pending:
+            raise ValidationQueueFullError(
+                f"Validation queue is full: {self._pending} validations pending."
+            )
+        self._pending += 1
+        try:
+            logging.debug(
+                f"Validating {len(data_graphs)} shards in workers, "
+                f"{self._pending} pending."
+            )
+            loop = asyncio.get_running_loop()
+
+            async def validate_shard(data_graph: Graph) -> Tuple[bool, Graph]:
+                async with self._semaphore:
+                    return await loop.run_in_executor(
+                        self._executor,
+                        run_validation,
+                        data_graph,
+                        ontology_graph,
+                        shapes_graph,
+                        True,
+                    )
+
+            return await asyncio.gather(*[validate_shard(g) for g in data_graphs])
+        finally:
+            self._pending -= 1
+
+    def shutdown(self) -> None:
+        """Shut down the worker processes."""
+        self._executor.shutdown(wait=True, cancel_futures=True)
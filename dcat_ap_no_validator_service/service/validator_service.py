@@ -5,16 +5,54 @@ from __future__ import annotations
 import asyncio
 from dataclasses import dataclass
 from enum import Enum
+import hashlib
 import logging
+import os
+import time
 import traceback
-from typing import Any, Optional, Tuple
+from typing import Any, BinaryIO, Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import urldefrag
 
 from aiohttp_client_cache import CachedSession
-from pyshacl import validate
-from rdflib import Graph, OWL, RDF, URIRef
+from dotenv import load_dotenv
+from rdflib import Graph, Literal, OWL, RDF, RDFS, SH, URIRef
 
+from dcat_ap_no_validator_service.adapter import (
+    DeadlineExceededError,
+    digest_identifier,
+    fetch_graph,
+    FetchError,
+    FetchScheduler,
+    GraphRegistry,
+    parse_file,
+)
+from dcat_ap_no_validator_service.service.expansion_planner import ExpansionPlan
+from dcat_ap_no_validator_service.service.focus_graph import focus_graph, ShapePaths
+from dcat_ap_no_validator_service.service.graph_union import GraphUnion
+from dcat_ap_no_validator_service.service.incremental_validation import (
+    get_previous_validation,
+    merge_results,
+    plan_revalidation,
+    PreviousValidation,
+    put_previous_validation,
+    split_results,
+)
+from dcat_ap_no_validator_service.service.inference_planner import (
+    get_shape_dependencies,
+)
+from dcat_ap_no_validator_service.service.sharded_validation import (
+    merge_shard_results,
+    shard_data_graph,
+)
+from dcat_ap_no_validator_service.service.validation_pool import (
+    run_validation,
+    ValidationPool,
+)
 
-from dcat_ap_no_validator_service.adapter import fetch_graph, FetchError, parse_text
+load_dotenv()
+VALIDATION_DEADLINE = float(os.getenv("VALIDATION_DEADLINE", "30"))
+VALIDATION_SHARD_SIZE = int(os.getenv("VALIDATION_SHARD_SIZE", "0"))
+ONTOLOGY_IMPORT_MAX_DEPTH = int(os.getenv("ONTOLOGY_IMPORT_MAX_DEPTH", "10"))
 
 SUPPORTED_FORMATS = set(["text/turtle", "application/ld+json", "application/rdf+xml"])
 
@@ -33,6 +71,21 @@ class Config:
 
     expand: bool = True
     include_expanded_triples: bool = False
+    deadline: float = VALIDATION_DEADLINE
+    catalog_key: Optional[str] = None
+
+
+@dataclass
+class GraphFile:
+    """Class for keeping track of a graph given as file, with hints to its format.
+
+    The content is a temporary file, which is closed when the graph is parsed.
+    """
+
+    content: BinaryIO
+    identifier: URIRef
+    content_type: Optional[str] = None
+    filename: Optional[str] = None
 
 
 class ValidatorService(object):
@@ -45,21 +98,31 @@ class ValidatorService(object):
         "shapes_graph_url",
         "ontology_graph",
         "ontology_graph_url",
+        "remote_graph",
+        "imports_handled",
         "config",
         "session",
+        "fetch_scheduler",
+        "deadline",
+        "skipped_uris",
     )
 
     # Instance variables:
     data_graph: Any
     shapes_graph: Any
     ontology_graph: Any
+    remote_graph: Graph
+    imports_handled: Set[Tuple[Any, Any, Any]]
     config: Config
     session: CachedSession
+    fetch_scheduler: FetchScheduler
+    deadline: float
+    skipped_uris: Set[str]
 
     @classmethod
     async def create(
         cls: Any,
-        cache: Any,
+        session: CachedSession,
         data_graph_url: Any,
         data_graph: Any,
         shapes_graph: Any,
@@ -67,166 +130,513 @@ class ValidatorService(object):
         ontology_graph_url: Any,
         ontology_graph: Any,
         config: Optional[Config] = None,
+        shapes_graph_id: Optional[str] = None,
+        shapes_graph_registry: Optional[GraphRegistry] = None,
+        ontology_graph_id: Optional[str] = None,
+        ontology_graph_registry: Optional[GraphRegistry] = None,
     ) -> ValidatorService:
-        """Initialize service instance."""
+        """Initialize service instance.
+
+        A shapes graph given by id is taken from the shapes graph registry. An
+        ontology graph given by id is taken from the ontology graph registry, with
+        its imports already resolved, cf resolve_ontology_graph. The ontology graph
+        is not changed: the remote triples fetched when validating, i.e. of imported
+        ontologies and of expanded objects, are added to the remote graph, and read
+        together with the ontology graph through a union of the graphs.
+        The deadline of the config starts to run now, and bounds the fetches of
+        the graphs given by url, and of remote triples when validating. Without a
+        data graph, the service holds the shapes and ontology graphs for the data
+        graphs given later, cf with_data_graph.
+        """
         self = ValidatorService()
-        async with CachedSession(cache=cache) as session:
-            all_graph_urls = dict()
-            # Process data graph:
-            self.data_graph = (
-                all_graph_urls.update({GraphType.DATA_GRAPH: data_graph_url})
-                if data_graph_url
-                else parse_text(data_graph)
-            )
-            # Process shapes graph:
-            self.shapes_graph = (
-                all_graph_urls.update({GraphType.SHAPES_GRAPH: shapes_graph_url})
-                if shapes_graph_url
-                else parse_text(shapes_graph)
-            )
-            # Process ontology graph if given:
-            if ontology_graph_url:
-                all_graph_urls.update({GraphType.ONTOLOGY_GRAPH: ontology_graph_url})
-            elif ontology_graph:
-                self.ontology_graph = parse_text(ontology_graph)
-            else:
-                self.ontology_graph = Graph()
-            # Process all_graph_urls:
-            logging.debug(f"all_graph_urls len: {len(all_graph_urls)}")
-            results = await asyncio.gather(
-                *[
-                    fetch_graph(session, url, use_cache=False)
-                    for url in all_graph_urls.values()
-                ]
-            )
-            # Store the resulting graphs:
-            # The order of result values corresponds to the order of awaitables in all_graph_urls.
-            # Ref: https://docs.python.org/3/library/asyncio-task.html#running-tasks-concurrently
-            for key, g in zip(all_graph_urls.keys(), results, strict=False):
-                # Did not find any other solution than this brute force chain of ifs
-                if key == GraphType.DATA_GRAPH:
-                    self.data_graph = g
-                elif key == GraphType.SHAPES_GRAPH:
-                    self.shapes_graph = g
-                elif key == GraphType.ONTOLOGY_GRAPH:
-                    self.ontology_graph = g
-            # Config:
-            if config is None:
-                self.config = Config()
-            else:
-                self.config = config
-            return self
-
-    async def validate(self, cache: Any) -> Tuple[bool, Graph, Graph, Graph]:
-        """Validate function."""
-        async with CachedSession(cache=cache) as session:
-            # Do some sanity checks on preconditions:
-            tasks = []
-            # If user has given an ontology graph, we check for and do imports:
-            if self.ontology_graph and len(self.ontology_graph) > 0:
-                logging.debug("Add import ontologies task to tasks.")
-                tasks.append(self._import_ontologies(session))
-
-            # Add triples from remote predicates if user has asked for that:
-            if self.config.expand is True:
-                logging.debug("Add expand object triples task to tasks.")
-                tasks.append(self._expand_objects_triples(session))
-
-            await asyncio.wait(
-                tasks,
-                return_when=asyncio.ALL_COMPLETED,
-            )
-
-            # Validate!
-            # `inference` should be set to one of the followoing {"none", "rdfs", "owlrl", "both"}
-            logging.debug(f"Validating with following config: {self.config}.")
-            conforms, results_graph, _ = validate(
-                data_graph=self.data_graph,
-                ont_graph=self.ontology_graph,
-                shacl_graph=self.shapes_graph,
-                inference="rdfs",
-                inplace=False,
-                meta_shacl=False,
-                debug=False,
-                do_owl_imports=False,  # owl_imports in pyshacl represent performance penalty
-                advanced=False,
-            )
-            logging.debug(f"Validation result: {conforms}")
-            return (conforms, self.data_graph, self.ontology_graph, results_graph)
+        # Config:
+        if config is None:
+            self.config = Config()
+        else:
+            self.config = config
+        self.deadline = time.monotonic() + self.config.deadline
+        self.skipped_uris = set()
+        self.remote_graph = Graph()
+        self.imports_handled = set()
+        all_graph_urls = dict()
+        # Process data graph:
+        if data_graph_url:
+            all_graph_urls.update({GraphType.DATA_GRAPH: data_graph_url})
+        elif data_graph:
+            self.data_graph = _parse_graph_file(data_graph)
+        else:
+            self.data_graph = Graph()
+        # Process shapes graph:
+        if shapes_graph_id and shapes_graph_registry:
+            self.shapes_graph = await shapes_graph_registry.get(
+                session, shapes_graph_id
+            )
+        elif shapes_graph_url:
+            all_graph_urls.update({GraphType.SHAPES_GRAPH: shapes_graph_url})
+        else:
+            self.shapes_graph = _parse_graph_file(shapes_graph)
+        # Process ontology graph if given:
+        if ontology_graph_id and ontology_graph_registry:
+            # The registry graph is shared, and only read:
+            registry_graph = await ontology_graph_registry.get(
+                session, ontology_graph_id
+            )
+            self.ontology_graph = (
+                registry_graph if registry_graph is not None else Graph()
+            )
+        elif ontology_graph_url:
+            all_graph_urls.update({GraphType.ONTOLOGY_GRAPH: ontology_graph_url})
+        elif ontology_graph:
+            self.ontology_graph = _parse_graph_file(ontology_graph)
+        else:
+            self.ontology_graph = Graph()
+        # Process all_graph_urls:
+        logging.debug(f"all_graph_urls len: {len(all_graph_urls)}")
+        results = await asyncio.gather(
+            *[
+                fetch_graph(session, url, use_cache=False, deadline=self.deadline)
+                for url in all_graph_urls.values()
+            ]
+        )
+        # Store the resulting graphs:
+        # The order of result values corresponds to the order of awaitables in all_graph_urls.
+        # Ref: https://docs.python.org/3/library/asyncio-task.html#running-tasks-concurrently
+        for key, g in zip(all_graph_urls.keys(), results, strict=False):
+            # Did not find any other solution than this brute force chain of ifs
+            if key == GraphType.DATA_GRAPH:
+                self.data_graph = g
+            elif key == GraphType.SHAPES_GRAPH:
+                self.shapes_graph = g
+            elif key == GraphType.ONTOLOGY_GRAPH:
+                self.ontology_graph = g
+        return self
+
+    async def with_data_graph(
+        self, session: CachedSession, data_graph_url: Any, data_graph: Any
+    ) -> ValidatorService:
+        """Return a service for another data graph, with the same other graphs.
+
+        The shapes graph and the ontology graph, with the ontologies imported, are
+        shared, while the remote triples of expanded objects are added to a remote
+        graph of the other service. The deadline of the config starts to run again,
+        for the fetches of the data graph and remote triples.
+        """
+        other = ValidatorService()
+        other.config = self.config
+        other.deadline = time.monotonic() + self.config.deadline
+        other.skipped_uris = set(self.skipped_uris)
+        other.shapes_graph = self.shapes_graph
+        other.ontology_graph = self.ontology_union()
+        other.remote_graph = Graph()
+        other.imports_handled = set(self.imports_handled)
+        if data_graph_url:
+            other.data_graph = await fetch_graph(
+                session, data_graph_url, use_cache=False, deadline=other.deadline
+            )
+        else:
+            other.data_graph = _parse_graph_file(data_graph)
+        return other
+
+    @classmethod
+    async def resolve_ontology_graph(
+        cls: Any,
+        session: CachedSession,
+        ontology_graph: Graph,
+        fetch_scheduler: FetchScheduler,
+    ) -> Tuple[Graph, bool]:
+        """Return the ontology graph with the ontologies it imports, e.g. for a registry.
+
+        The imports are resolved as when validating, cf import_ontologies, by the
+        default deadline. Returns the graph, and whether all imports were resolved.
+        A graph with imports is returned as a new graph, named by the digest of its
+        triples, so that objects derived from it can be cached by its content, cf
+        plan_inference.
+        The import statements of ontologies not fetched, by the deadline or at all,
+        are kept in the graph. Validations with the graph then try them again, and
+        report those skipped, as for ontology graphs given by url.
+        """
+        self = ValidatorService()
+        self.config = Config()
+        self.deadline = time.monotonic() + self.config.deadline
+        self.skipped_uris = set()
+        self.data_graph = Graph()
+        self.ontology_graph = ontology_graph
+        self.remote_graph = Graph()
+        self.imports_handled = set()
+        self.fetch_scheduler = fetch_scheduler
+        not_imported = await self._import_ontologies(session)
+        if not self.imports_handled:
+            return (ontology_graph, True)
+        if not_imported:
+            logging.warning(
+                f"Could not import ontologies imported by {ontology_graph.identifier}: "
+                f"{sorted({str(uri) for (_s, _p, uri) in not_imported})}."
+            )
+        loop = asyncio.get_running_loop()
+        resolved_graph = await loop.run_in_executor(
+            None, _resolved_graph, ontology_graph, self.remote_graph, not_imported
+        )
+        return (resolved_graph, not not_imported)
+
+    async def import_ontologies(
+        self,
+        session: CachedSession,
+        fetch_scheduler: Optional[FetchScheduler] = None,
+    ) -> None:
+        """Import the ontologies of the ontology graph now, rather than when validating.
+
+        Services for other data graphs, cf with_data_graph, then get the ontology
+        graph with the ontologies already imported.
+        """
+        self.fetch_scheduler = (
+            fetch_scheduler if fetch_scheduler is not None else FetchScheduler()
+        )
+        await self._import_ontologies(session)
+
+    async def validate(
+        self,
+        session: CachedSession,
+        validation_pool: Optional[ValidationPool] = None,
+        fetch_scheduler: Optional[FetchScheduler] = None,
+    ) -> Tuple[bool, Graph, Graph, Graph]:
+        """Validate function.
+
+        If a validation pool is given, the validation is run in a worker process.
+        Remote triples are fetched through the fetch scheduler, which is shared
+        between requests if given. Remote triples not fetched by the deadline are
+        skipped, and their uris are listed in the report. If the config has a
+        catalog key, only the focus nodes affected by the changes since the previous
+        validation of the catalog are validated again, cf _validate_incrementally.
+        """
+        self.fetch_scheduler = (
+            fetch_scheduler if fetch_scheduler is not None else FetchScheduler()
+        )
+        # If user has given an ontology graph, we check for and do imports:
+        if len(self.ontology_graph) > 0:
+            logging.debug("Import ontologies.")
+            await self._import_ontologies(session)
+
+        # Add triples from remote predicates if user has asked for that. The
+        # expansion is planned with the ranges of the imported ontologies:
+        if self.config.expand is True:
+            logging.debug("Expand object triples.")
+            await self._expand_objects_triples(session)
+
+        # Validate!
+        logging.debug(f"Validating with following config: {self.config}.")
+        if self.config.catalog_key is not None:
+            conforms, results_graph = await self._validate_incrementally(
+                self.config.catalog_key, validation_pool
+            )
+        else:
+            conforms, results_graph = await self._run_validation(
+                self.data_graph, validation_pool
+            )
+        if self.skipped_uris:
+            _report_skipped_uris(results_graph, self.skipped_uris)
+        logging.debug(f"Validation result: {conforms}")
+        return (conforms, self.data_graph, self.ontology_union(), results_graph)
+
+    def ontology_union(self) -> GraphUnion:
+        """Return the union of the ontology graph and the remote graph."""
+        return GraphUnion([self.ontology_graph, self.remote_graph])
+
+    async def _validate_incrementally(
+        self, catalog_key: str, validation_pool: Optional[ValidationPool]
+    ) -> Tuple[bool, Graph]:
+        """Validate the focus nodes affected by changes since the previous validation.
+
+        The results of the other focus nodes are taken from the previous validation
+        of the catalog, and merged into one report. Without a previous validation
+        to build on, the whole data graph is validated. The validation is kept for
+        the next time, unless remote triples were skipped.
+        """
+        paths = ShapePaths(self.shapes_graph)
+        ontology_graph = self.ontology_union()
+        previous = get_previous_validation(catalog_key)
+        nodes = (
+            plan_revalidation(
+                previous,
+                self.data_graph,
+                ontology_graph,
+                self.shapes_graph,
+                paths,
+            )
+            if previous is not None
+            else None
+        )
+        if previous is None or nodes is None:
+            conforms, results_graph = await self._run_validation(
+                self.data_graph, validation_pool
+            )
+            results = split_results(results_graph, self.data_graph)
+        else:
+            logging.debug(f"Revalidating {len(nodes)} nodes of {catalog_key}.")
+            _, focus_results_graph = await self._run_validation(
+                focus_graph(self.data_graph, nodes, paths), validation_pool
+            )
+            results = {
+                node: g for node, g in previous.results.items() if node not in nodes
+            }
+            results.update(
+                (node, g)
+                for node, g in split_results(
+                    focus_results_graph, self.data_graph
+                ).items()
+                if node in nodes
+            )
+            conforms, results_graph = merge_results(results.values())
+        if not self.skipped_uris:
+            put_previous_validation(
+                catalog_key,
+                PreviousValidation(
+                    shapes_graph_identifier=self.shapes_graph.identifier,
+                    data_graph=self.data_graph,
+                    ontology_graph=ontology_graph,
+                    results=results,
+                ),
+            )
+        return (conforms, results_graph)
+
+    async def _run_validation(
+        self, data_graph: Graph, validation_pool: Optional[ValidationPool]
+    ) -> Tuple[bool, Graph]:
+        """Validate the data graph, in the validation pool if given.
+
+        In the validation pool, data graphs with more than VALIDATION_SHARD_SIZE
+        nodes are split into shards, which are validated in parallel, unless the
+        shapes may read any triple of the data graph, e.g. by SPARQL-based
+        constraints. The shards are split and merged in a thread, not to block the
+        event loop. Otherwise, the data graph, which belongs to this service, is
+        validated in place, cf run_validation.
+        """
+        ontology_graph = self.ontology_union()
+        if validation_pool:
+            if (
+                VALIDATION_SHARD_SIZE > 0
+                and not get_shape_dependencies(self.shapes_graph).unbounded
+            ):
+                loop = asyncio.get_running_loop()
+                shards = await loop.run_in_executor(
+                    None,
+                    shard_data_graph,
+                    data_graph,
+                    ShapePaths(self.shapes_graph),
+                    VALIDATION_SHARD_SIZE,
+                )
+                if len(shards) > 1:
+                    logging.debug(f"Validating {len(shards)} shards.")
+                    shard_results = await validation_pool.validate_shards(
+                        [shard.data_graph for shard in shards],
+                        ontology_graph,
+                        self.shapes_graph,
+                    )
+                    return await loop.run_in_executor(
+                        None,
+                        merge_shard_results,
+                        data_graph,
+                        shards,
+                        [results_graph for _, results_graph in shard_results],
+                    )
+            return await validation_pool.validate(
+                data_graph, ontology_graph, self.shapes_graph
+            )
+        return run_validation(
+            data_graph, ontology_graph, self.shapes_graph, inplace=True
+        )
 
     async def _expand_objects_triples(self, session: CachedSession) -> None:
         """Get triples of objects and add to ontology graph.
 
         Search and collect all objects _o_ that is an URI, ignoring
         - objects of the property RDF.type,
+        - objects of properties whose objects the shapes do not read the triples of,
+          cf ExpansionPlan,
         - objects that points to a triple already in the given data_graph.
 
         Add all _o_'s to a set, which implies that only unique _o_'s are in the resulting set.
-        Iterate over the set, and fetch the triples _t_ that _o_ is reffering to.
-        The triple _t_ is finally added to the ontology_graph.
+        Group the _o_'s by the document they are found in, i.e. without fragment.
+        Iterate over the documents, and fetch the triples _t_ the _o_'s are reffering to.
+        The triple _t_ is finally added to the remote_graph.
         """
         all_remote_triples = set()
+        plan = ExpansionPlan(self.shapes_graph, self.ontology_union())
         # 1. Collect all relevant remote triples:
         for p, o in self.data_graph.predicate_objects(subject=None):
             if p == RDF.type:
                 pass
+            elif not plan.expands(p):
+                pass
             elif type(o) is URIRef:
                 if (o, None, None) not in self.data_graph:
                     all_remote_triples.add(o)
         if len(all_remote_triples) == 0:
             # no remote_triples whatsoever, we can go on...
             return
-        # 2.Get all remote triples:
-        logging.debug(f"Trying to expand {len(all_remote_triples)} remote triples .")
+        # 2. Group by document, e.g. all terms of a vocabulary with hash uris:
+        all_documents: Dict[str, List[URIRef]] = dict()
+        for o in all_remote_triples:
+            all_documents.setdefault(urldefrag(o).url, []).append(o)
+        # 3.Get all remote triples:
+        logging.debug(
+            f"Trying to expand {len(all_remote_triples)} remote triples "
+            f"from {len(all_documents)} documents."
+        )
         await asyncio.gather(
-            *[self.add_triples(uri, session) for uri in all_remote_triples],
+            *[
+                self._add_document_triples(document, uris, session)
+                for document, uris in all_documents.items()
+            ],
             return_exceptions=True,
         )
 
-    async def _import_ontologies(self, session: CachedSession) -> None:
-        """Import relevant ontologies into ontology graph.
+    async def _import_ontologies(
+        self, session: CachedSession
+    ) -> List[Tuple[Any, Any, Any]]:
+        """Import relevant ontologies into the remote graph.
 
         Interpret the owl import statements. Essentially, recursively merge with all the objects in the owl import
-        statement, and remove the corresponding triples from the graph.
+        statement, and mark the corresponding triples as handled.
 
         Based on https://owl-rl.readthedocs.io/en/latest/_modules/owlrl.html#interpret_owl_imports
+
+        The import closure is imported level by level, with the ontologies of each
+        level fetched in parallel. Each ontology is imported at most once, also when
+        ontologies import each other, or do not describe their own uri. Imports
+        deeper than ONTOLOGY_IMPORT_MAX_DEPTH levels are left out. The import
+        statements are not removed, since the ontology graph may be shared, but are
+        handled once, also by the services for other data graphs, cf with_data_graph.
+        Returns the import statements of the ontologies that could not be fetched.
         """
-        while True:
-            # 1. collect the import statements:
-            all_imports = [
-                t for t in self.ontology_graph.triples((None, OWL.imports, None))
+        not_imported: List[Tuple[Any, Any, Any]] = []
+        visited: Set[Any] = set()
+        ontology_graph = self.ontology_union()
+        for depth in range(ONTOLOGY_IMPORT_MAX_DEPTH + 1):
+            # 1. collect the import statements not handled yet:
+            all_imports: List[Tuple[Any, Any, Any]] = [
+                t
+                for t in ontology_graph.triples((None, OWL.imports, None))
+                if t not in self.imports_handled
             ]
             if len(all_imports) == 0:
                 # no import statement whatsoever, we can go on...
-                return
-            # 2. remove all the import statements from the graph
-            for t in all_imports:
-                self.ontology_graph.remove(t)
-            # 3. get all the imported vocabularies and import them
-            logging.debug(f"Trying to import {len(all_imports)} ontologies.")
-            await asyncio.gather(
-                *[self.add_triples(uri, session) for (_s, _p, uri) in all_imports],
+                break
+            # 2. mark the import statements as handled
+            self.imports_handled.update(all_imports)
+            if depth == ONTOLOGY_IMPORT_MAX_DEPTH:
+                logging.warning(
+                    f"Ontology imports deeper than {ONTOLOGY_IMPORT_MAX_DEPTH} levels "
+                    f"left out: {sorted({str(uri) for (_s, _p, uri) in all_imports})}."
+                )
+                break
+            # 3. get the imported vocabularies not visited yet, and import them
+            uris = list({uri for (_s, _p, uri) in all_imports} - visited)
+            visited.update(uris)
+            logging.debug(f"Trying to import {len(uris)} ontologies at level {depth}.")
+            results = await asyncio.gather(
+                *[self.add_triples(uri, session) for uri in uris],
                 return_exceptions=True,
             )
+            failed = {
+                uri
+                for uri, added in zip(uris, results, strict=True)
+                if added is not True
+            }
+            not_imported.extend(t for t in all_imports if t[2] in failed)
             # 4. start all over again to see if import statements have been imported
+        return not_imported
 
-    async def add_triples(self, uri: str, session: CachedSession) -> None:
-        """Fetch remote triples and add them to the ontology_graph.
+    async def add_triples(self, uri: str, session: CachedSession) -> bool:
+        """Fetch remote triples and add them to the remote_graph.
 
-        Only triples that are not allready in the data_graph and/or ontology_graph are added.
+        Only triples that are not allready in the data_graph, ontology_graph and/or remote_graph are added.
+        Returns False if the remote triples could not be fetched.
         """
         if (uri, None, None) not in self.data_graph:
-            if (uri, None, None) not in self.ontology_graph:
-                logging.debug(f"Trying to fetch remote triples {uri}.")
+            if not any(
+                (uri, None, None) in g for g in (self.ontology_graph, self.remote_graph)
+            ):
                 try:
-                    _g = await fetch_graph(session, uri)
-                    if _g:
-                        self.ontology_graph += _g
-                        logging.debug("Remote triples added to graph")
-
-                except FetchError:
-                    logging.debug(traceback.format_exc())
-                    pass
-                except SyntaxError:
-                    logging.debug(traceback.format_exc())
-                    pass
+                    return await self._fetch_triples(uri, session)
+                except DeadlineExceededError:
+                    self.skipped_uris.add(str(uri))
+                    return False
+        return True
+
+    async def _add_document_triples(
+        self, document: str, uris: List[URIRef], session: CachedSession
+    ) -> None:
+        """Fetch the document once for all uris, unless all of them are already known."""
+        ontology_graph = self.ontology_union()
+        if any((uri, None, None) not in ontology_graph for uri in uris):
+            try:
+                await self._fetch_triples(document, session)
+            except DeadlineExceededError:
+                self.skipped_uris.update(str(uri) for uri in uris)
+
+    async def _fetch_triples(self, uri: str, session: CachedSession) -> bool:
+        logging.debug(f"Trying to fetch remote triples {uri}.")
+        try:
+            _g = await self.fetch_scheduler.fetch_graph(
+                session, uri, deadline=self.deadline
+            )
+            if _g:
+                self.remote_graph += _g
+                logging.debug("Remote triples added to graph")
+
+        except DeadlineExceededError:
+            logging.debug(f"Skipped remote triples {uri}: Deadline exceeded.")
+            raise
+        except FetchError:
+            logging.debug(traceback.format_exc())
+            return False
+        except SyntaxError:
+            logging.debug(traceback.format_exc())
+            return False
+        return True
+
+
+def _report_skipped_uris(results_graph: Graph, uris: Iterable[str]) -> None:
+    report = next(results_graph.subjects(RDF.type, SH.ValidationReport))
+    for uri in sorted(uris):
+        results_graph.add(
+            (
+                report,
+                RDFS.comment,
+                Literal(f"Remote triples of {uri} were skipped: Deadline exceeded."),
+            )
+        )
+
+
+def _resolved_graph(
+    ontology_graph: Graph,
+    remote_graph: Graph,
+    not_imported: List[Tuple[Any, Any, Any]],
+) -> Graph:
+    """Return the ontology graph with the imported ontologies, named by its content.
+
+    The import statements are left out, except those of the ontologies not imported.
+    """
+    triples: Set[Tuple[Any, Any, Any]] = {
+        t for g in (ontology_graph, remote_graph) for t in g if t[1] != OWL.imports
+    }
+    triples.update(not_imported)
+    digest = hashlib.sha256()
+    for line in sorted(" ".join(term.n3() for term in t) for t in triples):
+        digest.update(f"{line}\n".encode())
+    resolved_graph = Graph(identifier=digest_identifier(digest.hexdigest()))
+    for prefix, namespace in ontology_graph.namespaces():
+        resolved_graph.bind(prefix, namespace, replace=True)
+    for t in triples:
+        resolved_graph.add(t)
+    return resolved_graph
+
+
+def _parse_graph_file(graph_file: GraphFile) -> Graph:
+    with graph_file.content:
+        return parse_file(
+            graph_file.content,
+            graph_file.identifier,
+            content_type=graph_file.content_type,
+            filename=graph_file.filename,
+        )
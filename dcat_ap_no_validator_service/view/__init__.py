@@ -1,6 +1,8 @@
 """Package for all views."""
 
+from .cache import Cache
 from .liveness import Ping, Ready
+from .metrics import Metrics
 from .ontologies import Ontologies, Ontology
 from .shapes import Shapes, ShapesCollection
-from .validator import Validator
+from .validator import BatchValidator, Validator
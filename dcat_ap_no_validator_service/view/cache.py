@@ -0,0 +1,39 @@
+"""Resource module for cache resources."""
+
+import hmac
+import logging
+import os
+
+from aiohttp import hdrs, web
+from dotenv import load_dotenv
+
+from dcat_ap_no_validator_service.adapter import clear_graph_cache
+
+load_dotenv()
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+
+class Cache(web.View):
+    """Class representing the caches of remote graphs."""
+
+    async def delete(self) -> web.Response:
+        """Clear the response cache, the parsed graph cache and the result cache.
+
+        Requires the admin token as bearer token. Without an admin token
+        configured, the caches cannot be cleared. If the result cache cannot
+        be reached, Service Unavailable is returned.
+        """
+        authorization = self.request.headers.get(hdrs.AUTHORIZATION, "")
+        if not ADMIN_TOKEN or not hmac.compare_digest(
+            authorization.encode(), f"Bearer {ADMIN_TOKEN}".encode()
+        ):
+            raise web.HTTPForbidden()
+        cache = self.request.app["cache"]
+        if cache:  # pragma: no cover
+            await cache.clear()
+        clear_graph_cache()
+        result_cache = self.request.app["result_cache"]
+        if result_cache and not await result_cache.clear():
+            raise web.HTTPServiceUnavailable(reason="Could not clear the result cache.")
+        logging.info("Caches cleared.")
+        return web.Response(status=204)
@@ -5,6 +5,8 @@ import os
 from aiohttp import web
 import redis.asyncio as redis
 
+from dcat_ap_no_validator_service.adapter import open_circuit_hosts
+
 CONFIG = os.getenv("CONFIG", "production")
 
 
@@ -23,7 +25,12 @@ class Ready(web.View):
             await connection.ping()
 
             await connection.close()
-        return web.Response(text="OK")
+        # The service is ready also when remote hosts are down, but tell which:
+        headers = dict()
+        open_hosts = open_circuit_hosts()
+        if open_hosts:
+            headers["X-Open-Circuits"] = ", ".join(open_hosts)
+        return web.Response(text="OK", headers=headers)
 
 
 class Ping(web.View):
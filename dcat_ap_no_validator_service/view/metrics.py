@@ -0,0 +1,21 @@
+"""Resource module for metrics resources."""
+
+from aiohttp import web
+
+from dcat_ap_no_validator_service.adapter import (
+    circuit_breaker_states,
+    memory_graph_cache_metrics,
+)
+
+
+class Metrics(web.View):
+    """Class representing metrics resource."""
+
+    async def get(self) -> web.Response:
+        """Metrics route function."""
+        response = dict()
+        response["fetchScheduler"] = self.request.app["fetch_scheduler"].metrics()
+        response["graphMemoryCache"] = memory_graph_cache_metrics()
+        response["circuitBreakers"] = circuit_breaker_states()
+
+        return web.json_response(response)
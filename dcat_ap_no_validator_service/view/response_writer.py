@@ -0,0 +1,72 @@
+"""Module for writing graphs to the response."""
+
+from typing import List
+
+from aiohttp import web
+from rdflib import Dataset, Graph
+from rdflib.graph import ReadOnlyGraphAggregate
+from rdflib.plugins.serializers.nt import _nt_row
+
+# Formats where each triple is written on a line of its own. Triples written
+# as N-Triples are valid N-Quads in the default graph:
+_STREAMABLE_FORMATS = {
+    "application/n-triples",
+    "application/n-quads",
+    "nt",
+    "nt11",
+    "ntriples",
+    "nquads",
+}
+
+# Formats of datasets, which the read-only view over the graphs cannot serialize:
+_NQUADS_FORMATS = {"application/n-quads", "nquads"}
+_DATASET_FORMATS = {"application/trig", "application/trix", "trig", "trix"}
+
+# Number of bytes to buffer before writing a chunk to the response:
+_CHUNK_SIZE = 64 * 1024
+
+
+def is_streamable(format: str) -> bool:
+    """Return True if graphs in this format can be written triple by triple."""
+    return format in _STREAMABLE_FORMATS
+
+
+def serialize_graphs(graphs: List[Graph], format: str) -> bytes:
+    """Serialize the graphs as one graph, without merging them into a new graph.
+
+    The graphs are serialized from a read-only view over the graphs, since the
+    serializers must see all triples about a blank node at once. Dataset formats
+    are written as the default graph: N-Quads as N-Triples, like write_graphs does,
+    and the other dataset formats from a dataset the graphs are merged into.
+    """
+    if format in _NQUADS_FORMATS:
+        format = "nt"
+    elif format in _DATASET_FORMATS:
+        dataset = Dataset()
+        for g in graphs:
+            for prefix, namespace in g.namespaces():
+                dataset.bind(prefix, namespace, override=False)
+            dataset.default_context += g
+        return dataset.serialize(format=format, encoding="utf-8")
+    return ReadOnlyGraphAggregate(graphs).serialize(format=format, encoding="utf-8")
+
+
+async def write_graphs(response: web.StreamResponse, graphs: List[Graph]) -> None:
+    """Write the graphs to the prepared response as N-Triples, chunk by chunk.
+
+    Blank nodes are always labelled in N-Triples, so the graphs can be written
+    one after the other.
+    """
+    lines: List[str] = []
+    size = 0
+    for g in graphs:
+        for triple in g:
+            line = _nt_row(triple)
+            lines.append(line)
+            size += len(line)
+            if size >= _CHUNK_SIZE:
+                await response.write("".join(lines).encode())
+                lines = []
+                size = 0
+    if lines:
+        await response.write("".join(lines).encode())
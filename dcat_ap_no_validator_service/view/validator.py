@@ -1,15 +1,42 @@
 """Resource module for validator resources."""
 
+import asyncio
+import codecs
 from enum import Enum
+import hashlib
+import json
 import logging
+import os
+import tempfile
 import traceback
+from typing import Any, Dict, List, Optional, Tuple
 
 from aiohttp import BodyPartReader, hdrs, web
-from rdflib import Graph
 from rdflib.plugin import PluginException
 
-from dcat_ap_no_validator_service.adapter import FetchError
-from dcat_ap_no_validator_service.service import Config, ValidatorService
+from dcat_ap_no_validator_service.adapter import (
+    digest_identifier,
+    FetchError,
+    OntologyGraphAdapter,
+    result_key,
+    ShapesGraphAdapter,
+)
+from dcat_ap_no_validator_service.service import (
+    Config,
+    GraphFile,
+    ValidationQueueFullError,
+    ValidatorService,
+)
+from .response_writer import is_streamable, serialize_graphs, write_graphs
+
+MAX_UPLOAD_SIZE = int(os.getenv("MAX_UPLOAD_SIZE", str(500 * 1024 * 1024)))
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "4"))
+_CHUNK_SIZE = 64 * 1024
+# Response header telling whether the report was taken from the result cache:
+_RESULT_CACHE_HEADER = "X-Validation-Cache"
+# Content type of the batch response, and of the reports in it:
+_NDJSON = "application/x-ndjson"
+_BATCH_REPORT_FORMAT = "text/turtle"
 
 
 class Part(str, Enum):
@@ -20,19 +47,21 @@ class Part(str, Enum):
     DATA_GRAPH_FILE = "data-graph-file"
     SHAPES_GRAPH_FILE = "shapes-graph-file"
     SHAPES_GRAPH_URL = "shapes-graph-url"
+    SHAPES_GRAPH_ID = "shapes-graph-id"
     ONTOLOGY_GRAPH_FILE = "ontology-graph-file"
     ONTOLOGY_GRAPH_URL = "ontology-graph-url"
+    ONTOLOGY_GRAPH_ID = "ontology-graph-id"
 
 
 class Validator(web.View):
     """Class representing validator resource."""
 
-    async def post(self) -> web.Response:
+    async def post(self) -> web.StreamResponse:
         """Web request handler using POST."""
         request = self.request
 
         """Validate route function."""
-        cache = request.app["cache"]
+        session = request.app["session"]
 
         logging.debug(
             f"Got following content-type-headers: {request.headers[hdrs.CONTENT_TYPE]}."
@@ -47,8 +76,10 @@ class Validator(web.View):
         data_graph = None
         shapes_graph = None
         shapes_graph_url = None
+        shapes_graph_id = None
         ontology_graph = None
         ontology_graph_url = None
+        ontology_graph_id = None
         config = None
         data_graph_matrix = dict()
         shapes_graph_matrix = dict()
@@ -83,7 +114,7 @@ class Validator(web.View):
                         f"Got input data graph with filename: {part.filename}."
                     )
                     try:
-                        data_graph = (await part.read()).decode()
+                        data_graph = await _read_graph_file(part)
                     except ValueError:
                         raise web.HTTPBadRequest(
                             reason="Data graph file is not readable."
@@ -101,6 +132,19 @@ class Validator(web.View):
                     )
                     shapes_graph_matrix[part.name] = shapes_graph_url
                     pass
+                # Shapes graph, id:
+                if Part(part.name) is Part.SHAPES_GRAPH_ID:
+                    # Get shapes graph from the shapes graph registry:
+                    shapes_graph_id = (await part.read()).decode()
+                    logging.debug(
+                        f"Got reference to shapes graph with id: {shapes_graph_id}."
+                    )
+                    if await ShapesGraphAdapter.get_by_id(shapes_graph_id) is None:
+                        raise web.HTTPBadRequest(
+                            reason=f"Shapes graph with id {shapes_graph_id} not found."
+                        )
+                    shapes_graph_matrix[part.name] = shapes_graph_id
+                    pass
                 # Shapes graph, file:
                 if Part(part.name) is Part.SHAPES_GRAPH_FILE:
                     # Process any files you uploaded
@@ -108,7 +152,7 @@ class Validator(web.View):
                         f"Got input shapes graph with filename: {part.filename}."
                     )
                     try:
-                        shapes_graph = (await part.read()).decode()
+                        shapes_graph = await _read_graph_file(part)
                     except ValueError:
                         raise web.HTTPBadRequest(
                             reason="Shapes graph file is not readable."
@@ -125,6 +169,20 @@ class Validator(web.View):
                         f"Got reference to ontology graph with url: {ontology_graph_url}."
                     )
                     pass
+                # Ontology graph, id:
+                if Part(part.name) is Part.ONTOLOGY_GRAPH_ID:
+                    # Get ontology graph from the ontology graph registry:
+                    ontology_graph_id = (await part.read()).decode()
+                    logging.debug(
+                        f"Got reference to ontology graph with id: {ontology_graph_id}."
+                    )
+                    if await OntologyGraphAdapter.get_by_id(ontology_graph_id) is None:
+                        raise web.HTTPBadRequest(
+                            reason=(
+                                f"Ontology graph with id {ontology_graph_id} not found."
+                            )
+                        )
+                    pass
                 # Ontology graph, file:
                 if Part(part.name) is Part.ONTOLOGY_GRAPH_FILE:
                     # Process any files you uploaded
@@ -132,7 +190,7 @@ class Validator(web.View):
                         f"Got input ontology graph with filename: {part.filename}."
                     )
                     try:
-                        ontology_graph = (await part.read()).decode()
+                        ontology_graph = await _read_graph_file(part)
                     except ValueError:
                         raise web.HTTPBadRequest(
                             reason="Ontology graph file is not readable."
@@ -152,11 +210,70 @@ class Validator(web.View):
             logging.debug(f"Ambigious user input: {shapes_graph_matrix}.")
             raise web.HTTPBadRequest(reason="Multiple shapes graphs in input.")
 
+        # Try to content-negotiate:
+        logging.debug(
+            f"Got following accept-headers: {self.request.headers[hdrs.ACCEPT]}."
+        )
+        content_type = "text/turtle"  # default
+        if "*/*" in self.request.headers[hdrs.ACCEPT]:
+            pass  # use default
+        elif self.request.headers[
+            hdrs.ACCEPT
+        ]:  # we try to serialize according to accept-header
+            content_type = self.request.headers[hdrs.ACCEPT]
+
+        # Return the report of an identical request, if cached. Only requests
+        # with all graphs given by content, i.e. not by url, are cached. Ontology
+        # graphs given by id are not either, since the ontologies they import are
+        # not identified by content:
+        result_cache = request.app["result_cache"]
+        key = None
+        if (
+            result_cache
+            and data_graph
+            and not (shapes_graph_url or ontology_graph_url or ontology_graph_id)
+        ):
+            if shapes_graph_id:
+                # The shapes graph is identified by its content, which may change:
+                try:
+                    registry_graph = await request.app["shapes_graph_registry"].get(
+                        session, shapes_graph_id
+                    )
+                except (FetchError, SyntaxError) as e:
+                    logging.debug(traceback.format_exc())
+                    raise web.HTTPBadRequest(reason=str(e)) from None
+                shapes_graph_identifier = (
+                    registry_graph.identifier if registry_graph else None
+                )
+            else:
+                shapes_graph_identifier = (
+                    shapes_graph.identifier if shapes_graph else None
+                )
+            key_config = config or Config()
+            key = result_key(
+                dataGraph=data_graph.identifier,
+                shapesGraph=shapes_graph_identifier,
+                ontologyGraph=ontology_graph.identifier if ontology_graph else None,
+                expand=key_config.expand,
+                includeExpandedTriples=key_config.include_expanded_triples,
+                contentType=content_type,
+            )
+            result = await result_cache.get(key)
+            if result is not None:
+                for graph_file in (data_graph, shapes_graph, ontology_graph):
+                    if graph_file:
+                        graph_file.content.close()
+                return web.Response(
+                    body=result,
+                    content_type=content_type,
+                    headers={_RESULT_CACHE_HEADER: "hit"},
+                )
+
         # We have got data, now validate:
         try:
             # instantiate validator service:
             service = await ValidatorService.create(
-                cache=cache,
+                session=session,
                 data_graph_url=data_graph_url,
                 data_graph=data_graph,
                 shapes_graph_url=shapes_graph_url,
@@ -164,6 +281,10 @@ class Validator(web.View):
                 ontology_graph_url=ontology_graph_url,
                 ontology_graph=ontology_graph,
                 config=config,
+                shapes_graph_id=shapes_graph_id,
+                shapes_graph_registry=request.app["shapes_graph_registry"],
+                ontology_graph_id=ontology_graph_id,
+                ontology_graph_registry=request.app["ontology_graph_registry"],
             )
         except FetchError as e:
             logging.debug(traceback.format_exc())
@@ -173,33 +294,48 @@ class Validator(web.View):
             raise web.HTTPBadRequest(reason=str(e)) from None
 
         # validate:
-        (
-            conforms,
-            result_data_graph,
-            result_ontology_graph,
-            results_graph,
-        ) = await service.validate(cache=cache)
+        try:
+            (
+                conforms,
+                result_data_graph,
+                result_ontology_graph,
+                results_graph,
+            ) = await service.validate(
+                session=session,
+                validation_pool=request.app["validation_pool"],
+                fetch_scheduler=request.app["fetch_scheduler"],
+            )
+        except ValidationQueueFullError as e:
+            logging.debug(traceback.format_exc())
+            raise web.HTTPServiceUnavailable(reason=str(e)) from None
 
-        # Try to content-negotiate:
-        logging.debug(
-            f"Got following accept-headers: {self.request.headers[hdrs.ACCEPT]}."
-        )
-        content_type = "text/turtle"  # default
-        if "*/*" in self.request.headers[hdrs.ACCEPT]:
-            pass  # use default
-        elif self.request.headers[
-            hdrs.ACCEPT
-        ]:  # we try to serialize according to accept-header
-            content_type = self.request.headers[hdrs.ACCEPT]
-        response_graph = Graph()
-        response_graph += results_graph
-        response_graph += result_data_graph
+        response_graphs = [results_graph, result_data_graph]
         if config and config.include_expanded_triples is True:
-            response_graph += result_ontology_graph
+            response_graphs.append(result_ontology_graph)
+        headers = {_RESULT_CACHE_HEADER: "miss"} if key else None
+        if key and not service.skipped_uris:
+            # Cache the report, unless remote triples were skipped:
+            try:
+                result = serialize_graphs(response_graphs, format=content_type)
+            except PluginException:
+                logging.debug(traceback.format_exc())
+                raise web.HTTPNotAcceptable() from None  # 406
+            await result_cache.put(key, result)
+            return web.Response(body=result, content_type=content_type, headers=headers)
+        if is_streamable(content_type):
+            # Write the report to the client while it is being serialized:
+            response = web.StreamResponse(headers=headers)
+            response.content_type = content_type
+            response.enable_chunked_encoding()
+            await response.prepare(self.request)
+            await write_graphs(response, response_graphs)
+            await response.write_eof()
+            return response
         try:
             return web.Response(
-                body=response_graph.serialize(format=content_type),
+                body=serialize_graphs(response_graphs, format=content_type),
                 content_type=content_type,
+                headers=headers,
             )
         except (
             PluginException
@@ -208,6 +344,229 @@ class Validator(web.View):
             raise web.HTTPNotAcceptable() from None  # 406
 
 
+class BatchValidator(web.View):
+    """Class representing batch validator resource."""
+
+    async def post(self) -> web.StreamResponse:
+        """Validate many data graphs against the same shapes and ontology graphs.
+
+        The shapes and ontology graphs are fetched and parsed once, with the
+        ontologies imported once. The data graphs, given by any number of
+        data-graph-file and data-graph-url parts, are validated concurrently.
+        One line of JSON is written per data graph, as soon as validated.
+        """
+        request = self.request
+        session = request.app["session"]
+        if "multipart/" not in request.headers[hdrs.CONTENT_TYPE].lower():
+            raise web.HTTPUnsupportedMediaType(
+                reason=f"multipart/* content type expected, got {hdrs.CONTENT_TYPE}."
+            )
+
+        data_graphs: List[Tuple[Optional[str], Optional[GraphFile]]] = []
+        data_graph_names: List[Optional[str]] = []
+        graphs: Dict[Part, Any] = dict()
+        config = None
+        try:
+            reader = await request.multipart()
+            while True:
+                part = await reader.next()
+                if part is None:
+                    break
+                if not isinstance(part, BodyPartReader):  # pragma: no cover
+                    continue
+                name = Part(part.name)
+                if name is Part.CONFIG:
+                    config_json = await part.json()
+                    if config_json:
+                        config = _create_config(config_json)
+                    if config and config.catalog_key is not None:
+                        raise web.HTTPBadRequest(
+                            reason="Config catalogKey is not supported in batches."
+                        )
+                elif name in (Part.DATA_GRAPH_URL, Part.DATA_GRAPH_FILE):
+                    if name is Part.DATA_GRAPH_URL:
+                        url = (await part.read()).decode()
+                        data_graphs.append((url, None))
+                        data_graph_names.append(url)
+                    else:
+                        try:
+                            data_graph = await _read_graph_file(part)
+                        except ValueError:
+                            raise web.HTTPBadRequest(
+                                reason="Data graph file is not readable."
+                            ) from None
+                        data_graphs.append((None, data_graph))
+                        data_graph_names.append(part.filename)
+                elif name in graphs:
+                    raise web.HTTPBadRequest(reason=f"Multiple {name.value} parts.")
+                elif name in (Part.SHAPES_GRAPH_FILE, Part.ONTOLOGY_GRAPH_FILE):
+                    try:
+                        graphs[name] = await _read_graph_file(part)
+                    except ValueError:
+                        raise web.HTTPBadRequest(
+                            reason=f"{name.value} is not readable."
+                        ) from None
+                else:
+                    graphs[name] = (await part.read()).decode()
+
+            if not data_graphs:
+                raise web.HTTPBadRequest(reason="No data graph in input.")
+            shapes_graph_parts = {
+                Part.SHAPES_GRAPH_FILE,
+                Part.SHAPES_GRAPH_URL,
+                Part.SHAPES_GRAPH_ID,
+            } & graphs.keys()
+            if len(shapes_graph_parts) == 0:
+                raise web.HTTPBadRequest(reason="No shapes graph in input.")
+            elif len(shapes_graph_parts) > 1:
+                raise web.HTTPBadRequest(reason="Multiple shapes graphs in input.")
+            ontology_graph_parts = {
+                Part.ONTOLOGY_GRAPH_FILE,
+                Part.ONTOLOGY_GRAPH_URL,
+                Part.ONTOLOGY_GRAPH_ID,
+            } & graphs.keys()
+            if len(ontology_graph_parts) > 1:
+                raise web.HTTPBadRequest(reason="Multiple ontology graphs in input.")
+            shapes_graph_id = graphs.get(Part.SHAPES_GRAPH_ID)
+            if (
+                shapes_graph_id
+                and await ShapesGraphAdapter.get_by_id(shapes_graph_id) is None
+            ):
+                raise web.HTTPBadRequest(
+                    reason=f"Shapes graph with id {shapes_graph_id} not found."
+                )
+            ontology_graph_id = graphs.get(Part.ONTOLOGY_GRAPH_ID)
+            if (
+                ontology_graph_id
+                and await OntologyGraphAdapter.get_by_id(ontology_graph_id) is None
+            ):
+                raise web.HTTPBadRequest(
+                    reason=f"Ontology graph with id {ontology_graph_id} not found."
+                )
+
+            # Fetch and parse the shapes and ontology graphs once:
+            try:
+                shared = await ValidatorService.create(
+                    session=session,
+                    data_graph_url=None,
+                    data_graph=None,
+                    shapes_graph_url=graphs.get(Part.SHAPES_GRAPH_URL),
+                    shapes_graph=graphs.get(Part.SHAPES_GRAPH_FILE),
+                    ontology_graph_url=graphs.get(Part.ONTOLOGY_GRAPH_URL),
+                    ontology_graph=graphs.get(Part.ONTOLOGY_GRAPH_FILE),
+                    config=config,
+                    shapes_graph_id=shapes_graph_id,
+                    shapes_graph_registry=request.app["shapes_graph_registry"],
+                    ontology_graph_id=ontology_graph_id,
+                    ontology_graph_registry=request.app["ontology_graph_registry"],
+                )
+            except (FetchError, SyntaxError) as e:
+                logging.debug(traceback.format_exc())
+                raise web.HTTPBadRequest(reason=str(e)) from None
+            await shared.import_ontologies(session, request.app["fetch_scheduler"])
+        except BaseException:
+            for _, graph_file in data_graphs:
+                if graph_file:
+                    graph_file.content.close()
+            for value in graphs.values():
+                if isinstance(value, GraphFile):
+                    value.content.close()
+            raise
+
+        semaphore = asyncio.Semaphore(BATCH_MAX_CONCURRENCY)
+
+        async def validate(index: int) -> Dict[str, Any]:
+            data_graph_url, data_graph = data_graphs[index]
+            line: Dict[str, Any] = {
+                "index": index,
+                "dataGraph": data_graph_names[index],
+            }
+            try:
+                async with semaphore:
+                    try:
+                        service = await shared.with_data_graph(
+                            session, data_graph_url, data_graph
+                        )
+                        (
+                            conforms,
+                            result_data_graph,
+                            result_ontology_graph,
+                            results_graph,
+                        ) = await service.validate(
+                            session=session,
+                            validation_pool=request.app["validation_pool"],
+                            fetch_scheduler=request.app["fetch_scheduler"],
+                        )
+                    except (FetchError, SyntaxError, ValidationQueueFullError) as e:
+                        logging.debug(traceback.format_exc())
+                        line["error"] = str(e)
+                        return line
+                response_graphs = [results_graph, result_data_graph]
+                if service.config.include_expanded_triples is True:
+                    response_graphs.append(result_ontology_graph)
+                line["conforms"] = conforms
+                line["report"] = serialize_graphs(
+                    response_graphs, format=_BATCH_REPORT_FORMAT
+                ).decode()
+            except Exception as e:
+                # Any other error, e.g. from pyshacl or an rdflib plugin, fails
+                # this data graph only, not the lines of the others:
+                logging.exception(f"Could not validate {data_graph_names[index]}.")
+                line.pop("conforms", None)
+                line["error"] = f"Could not validate data graph: {e}"
+            return line
+
+        response = web.StreamResponse()
+        response.content_type = _NDJSON
+        response.enable_chunked_encoding()
+        await response.prepare(request)
+        tasks = [
+            asyncio.ensure_future(validate(index)) for index in range(len(data_graphs))
+        ]
+        try:
+            for validation in asyncio.as_completed(tasks):
+                line = await validation
+                await response.write(json.dumps(line).encode() + b"\n")
+        finally:
+            # Stop validating when the client is gone:
+            for task in tasks:
+                task.cancel()
+        await response.write_eof()
+        return response
+
+
+async def _read_graph_file(part: BodyPartReader) -> GraphFile:
+    """Spool the part to a temporary file, chunk by chunk.
+
+    The content is checked to be utf-8 and digested on the way.
+    Raises ValueError if the content is not utf-8.
+    """
+    content = tempfile.TemporaryFile()
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        while chunk := await part.read_chunk(_CHUNK_SIZE):
+            size += len(chunk)
+            if size > MAX_UPLOAD_SIZE:
+                raise web.HTTPRequestEntityTooLarge(
+                    max_size=MAX_UPLOAD_SIZE, actual_size=size
+                )
+            decoder.decode(chunk)
+            digest.update(chunk)
+            content.write(chunk)
+        decoder.decode(b"", final=True)
+    except BaseException:
+        content.close()
+        raise
+    return GraphFile(
+        content=content,
+        identifier=digest_identifier(digest.hexdigest()),
+        content_type=part.headers.get(hdrs.CONTENT_TYPE),
+        filename=part.filename,
+    )
+
+
 def _create_config(config: dict) -> Config:
     c = Config()
     if "expand" in config:
@@ -220,4 +579,22 @@ def _create_config(config: dict) -> Config:
             c.include_expanded_triples = True
         else:
             c.include_expanded_triples = False
+    if "deadline" in config:
+        deadline = config["deadline"]
+        if (
+            isinstance(deadline, bool)
+            or not isinstance(deadline, (int, float))
+            or deadline <= 0
+        ):
+            raise web.HTTPBadRequest(
+                reason="Config deadline must be a positive number of seconds."
+            )
+        c.deadline = float(deadline)
+    if "catalogKey" in config:
+        catalog_key = config["catalogKey"]
+        if not isinstance(catalog_key, str) or not catalog_key:
+            raise web.HTTPBadRequest(
+                reason="Config catalogKey must be a non-empty string."
+            )
+        c.catalog_key = catalog_key
     return c
@@ -3,7 +3,7 @@
 import os
 from os import environ as env
 import time
-from typing import Any
+from typing import Any, Dict, List, Tuple
 
 from aiohttp.test_utils import TestClient as _TestClient
 from dotenv import load_dotenv
@@ -25,6 +25,57 @@ async def client(aiohttp_client: Any) -> _TestClient:
     return await aiohttp_client(app)
 
 
+class _FakeRedis:
+    """Fake redis client, with the commands used by the result cache, in memory."""
+
+    def __init__(self) -> None:
+        self.values: Dict[str, Tuple[float, Any]] = dict()
+        self.sorted_sets: Dict[str, Dict[str, float]] = dict()
+
+    async def get(self, key: str) -> Any:
+        value = self.values.get(key)
+        if value is None or value[0] < time.time():
+            return None
+        return value[1]
+
+    async def set(self, key: str, value: Any, ex: int) -> None:
+        self.values[key] = (time.time() + ex, value)
+
+    async def incr(self, key: str) -> int:
+        value = int(await self.get(key) or 0) + 1
+        self.values[key] = (float("inf"), str(value).encode())
+        return value
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self.values.pop(key, None)
+
+    async def zadd(self, key: str, mapping: Dict[str, float]) -> None:
+        self.sorted_sets.setdefault(key, dict()).update(mapping)
+
+    async def zremrangebyscore(self, key: str, min: str, max: float) -> None:
+        members = self.sorted_sets.get(key, dict())
+        for member, score in list(members.items()):
+            if score <= max:
+                del members[member]
+
+    async def zcard(self, key: str) -> int:
+        return len(self.sorted_sets.get(key, dict()))
+
+    async def zpopmin(self, key: str, count: int) -> List[Tuple[str, float]]:
+        members = self.sorted_sets.get(key, dict())
+        popped = sorted(members.items(), key=lambda item: item[1])[:count]
+        for member, _ in popped:
+            del members[member]
+        return popped
+
+
+@pytest.fixture
+def fake_redis() -> _FakeRedis:
+    """Set up a fake redis client as fixture."""
+    return _FakeRedis()
+
+
 def is_responsive(url: Any) -> Any:
     """Return true if response from service is 200."""
     url = f"{url}/ready"
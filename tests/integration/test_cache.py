@@ -0,0 +1,59 @@
+"""Integration test cases for the cache route."""
+
+import os
+from typing import Any
+
+from aiohttp.test_utils import TestClient as _TestClient
+import pytest
+from pytest_mock import MockFixture
+from rdflib import Graph
+
+from dcat_ap_no_validator_service.adapter import GraphCache
+
+
+@pytest.fixture
+def graph_cache(mocker: MockFixture, tmp_path: Any) -> GraphCache:
+    """Patch the graph cache with a graph cache in a temporary directory."""
+    graph_cache = GraphCache(str(tmp_path), 1024 * 1024)
+    graph_cache.put("key", Graph())
+    mocker.patch(
+        "dcat_ap_no_validator_service.adapter.remote_graph_adapter._GRAPH_CACHE",
+        graph_cache,
+    )
+    return graph_cache
+
+
+@pytest.mark.integration
+async def test_delete_cache(
+    client: _TestClient, mocker: MockFixture, graph_cache: GraphCache, tmp_path: Any
+) -> None:
+    """Should return No Content and clear the graph cache."""
+    mocker.patch("dcat_ap_no_validator_service.view.cache.ADMIN_TOKEN", "secret")
+
+    resp = await client.delete("/cache", headers={"Authorization": "Bearer secret"})
+    assert resp.status == 204
+    assert os.listdir(tmp_path) == []
+
+
+@pytest.mark.integration
+async def test_delete_cache_wrong_token(
+    client: _TestClient, mocker: MockFixture, graph_cache: GraphCache
+) -> None:
+    """Should return Forbidden and keep the graph cache."""
+    mocker.patch("dcat_ap_no_validator_service.view.cache.ADMIN_TOKEN", "secret")
+
+    resp = await client.delete("/cache", headers={"Authorization": "Bearer wrong"})
+    assert resp.status == 403
+    assert graph_cache.get("key") is not None
+
+
+@pytest.mark.integration
+async def test_delete_cache_no_admin_token(
+    client: _TestClient, mocker: MockFixture, graph_cache: GraphCache
+) -> None:
+    """Should return Forbidden when no admin token is configured."""
+    mocker.patch("dcat_ap_no_validator_service.view.cache.ADMIN_TOKEN", None)
+
+    resp = await client.delete("/cache", headers={"Authorization": "Bearer "})
+    assert resp.status == 403
+    assert graph_cache.get("key") is not None
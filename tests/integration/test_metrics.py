@@ -0,0 +1,18 @@
+"""Integration test cases for the metrics route."""
+
+from aiohttp import hdrs
+from aiohttp.test_utils import TestClient as _TestClient
+import pytest
+
+
+@pytest.mark.integration
+async def test_metrics(client: _TestClient) -> None:
+    """Should return OK and metrics of the fetch scheduler."""
+    resp = await client.get("/metrics")
+    assert resp.status == 200
+    assert "application/json" in resp.headers[hdrs.CONTENT_TYPE]
+    body = await resp.json()
+    assert body["fetchScheduler"]["fetches"] == 0
+    assert body["fetchScheduler"]["queueWaitSecondsTotal"] == 0
+    assert body["graphMemoryCache"] is None
+    assert body["circuitBreakers"] == {}
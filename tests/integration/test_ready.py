@@ -2,6 +2,9 @@
 
 from aiohttp.test_utils import TestClient as _TestClient
 import pytest
+from pytest_mock import MockFixture
+
+from dcat_ap_no_validator_service.adapter import CircuitBreakers
 
 
 @pytest.mark.integration
@@ -11,3 +14,21 @@ async def test_ready(client: _TestClient) -> None:
     assert resp.status == 200
     text = await resp.text()
     assert "OK" in text
+
+
+@pytest.mark.integration
+async def test_ready_with_open_circuits(
+    client: _TestClient, mocker: MockFixture
+) -> None:
+    """Should return OK, and tell which hosts are down."""
+    breakers = CircuitBreakers(failure_threshold=1, reset_timeout=60)
+    breakers.record_failure("data.brreg.no")
+    mocker.patch(
+        "dcat_ap_no_validator_service.adapter.remote_graph_adapter._CIRCUIT_BREAKERS",
+        breakers,
+    )
+    resp = await client.get("/ready")
+    assert resp.status == 200
+    assert resp.headers["X-Open-Circuits"] == "data.brreg.no"
+    text = await resp.text()
+    assert "OK" in text
@@ -9,7 +9,7 @@ from aiohttp.test_utils import TestClient as _TestClient
 from aioresponses import aioresponses
 import pytest
 from pytest_mock import MockFixture
-from rdflib import Graph
+from rdflib import Graph, RDF, RDFS, SH
 from rdflib.compare import graph_diff, isomorphic
 
 
@@ -389,6 +389,71 @@ async def test_validator_file_full_config_from_json_str(
     )
 
 
+@pytest.mark.integration
+async def test_validator_file_config_deadline_exceeded(
+    client: _TestClient, mocks: Any, mock_aioresponse: Any
+) -> None:
+    """Should return OK and a report listing the remote triples skipped."""
+    data_graph_file = "tests/files/valid_catalog.ttl"
+    shapes_graph_file = "tests/files/mock_dcat-ap-no-shacl_shapes_2.00.ttl"
+    ontology_graph_file = "tests/files/ontologies.ttl"
+    config: dict = {"expand": True, "deadline": 0.000001}
+
+    with MultipartWriter("mixed") as mpwriter:
+        p = mpwriter.append(open(data_graph_file, "rb"))
+        p.set_content_disposition(
+            "attachment", name="data-graph-file", filename=data_graph_file
+        )
+        p = mpwriter.append(open(shapes_graph_file, "rb"))
+        p.set_content_disposition(
+            "attachment", name="shapes-graph-file", filename=shapes_graph_file
+        )
+        p = mpwriter.append_json(config)
+        p.set_content_disposition("inline", name="config")
+        p = mpwriter.append(open(ontology_graph_file, "rb"))
+        p.set_content_disposition(
+            "attachment", name="ontology-graph-file", filename=ontology_graph_file
+        )
+
+    resp = await client.post("/validator", data=mpwriter)
+    assert resp.status == 200
+
+    g = Graph().parse(data=await resp.text(), format="text/turtle")
+    report = g.value(predicate=RDF.type, object=SH.ValidationReport)
+    comments = [str(o) for o in g.objects(report, RDFS.comment)]
+    assert (
+        "Remote triples of https://organization-catalog.fellesdatakatalog.digdir.no"
+        "/organizations/961181399"
+        " were skipped: Deadline exceeded." in comments
+    )
+    assert all(url.host == "127.0.0.1" for _, url in mock_aioresponse.requests)
+
+
+@pytest.mark.integration
+async def test_validator_file_config_invalid_deadline(
+    client: _TestClient, mocks: Any
+) -> None:
+    """Should return 400."""
+    data_graph_file = "tests/files/valid_catalog.ttl"
+    shapes_graph_file = "tests/files/mock_dcat-ap-no-shacl_shapes_2.00.ttl"
+    config: dict = {"deadline": 0}
+
+    with MultipartWriter("mixed") as mpwriter:
+        p = mpwriter.append(open(data_graph_file, "rb"))
+        p.set_content_disposition(
+            "attachment", name="data-graph-file", filename=data_graph_file
+        )
+        p = mpwriter.append(open(shapes_graph_file, "rb"))
+        p.set_content_disposition(
+            "attachment", name="shapes-graph-file", filename=shapes_graph_file
+        )
+        p = mpwriter.append_json(config)
+        p.set_content_disposition("inline", name="config")
+
+    resp = await client.post("/validator", data=mpwriter)
+    assert resp.status == 400
+
+
 @pytest.mark.integration
 async def test_validator_file_content_negotiation_json_ld(
     client: _TestClient, mocks: Any
@@ -427,6 +492,120 @@ async def test_validator_file_content_negotiation_json_ld(
     )
 
 
+@pytest.mark.integration
+async def test_validator_file_content_negotiation_n_triples(
+    client: _TestClient, mocks: Any
+) -> None:
+    """Should return OK."""
+    data_graph_file = "tests/files/valid_catalog.ttl"
+    shapes_graph_file = "tests/files/mock_dcat-ap-no-shacl_shapes_2.00.ttl"
+    ontology_graph_file = "tests/files/ontologies.ttl"
+    accept = "application/n-triples"
+    headers = {"Accept": accept}
+
+    with MultipartWriter("mixed") as mpwriter:
+        p = mpwriter.append(open(data_graph_file, "rb"))
+        p.set_content_disposition(
+            "attachment", name="data-graph-file", filename=data_graph_file
+        )
+        p = mpwriter.append(open(shapes_graph_file, "rb"))
+        p.set_content_disposition(
+            "attachment", name="shapes-graph-file", filename=shapes_graph_file
+        )
+        p = mpwriter.append(open(ontology_graph_file, "rb"))
+        p.set_content_disposition(
+            "attachment", name="ontology-graph-file", filename=ontology_graph_file
+        )
+
+    resp = await client.post("/validator", headers=headers, data=mpwriter)
+    assert resp.status == 200
+    assert resp.headers[hdrs.CONTENT_TYPE] == accept
+
+    body = await resp.text()
+
+    with open(data_graph_file, "r") as file:
+        text = file.read()
+    await _assess_response_body_successful(
+        data=text, format="text/turtle", body=body, content_type=accept
+    )
+
+
+@pytest.mark.integration
+async def test_validator_file_content_negotiation_n_quads(
+    client: _TestClient, mocks: Any
+) -> None:
+    """Should return OK."""
+    data_graph_file = "tests/files/valid_catalog.ttl"
+    shapes_graph_file = "tests/files/mock_dcat-ap-no-shacl_shapes_2.00.ttl"
+    ontology_graph_file = "tests/files/ontologies.ttl"
+    accept = "application/n-quads"
+    headers = {"Accept": accept}
+
+    with MultipartWriter("mixed") as mpwriter:
+        p = mpwriter.append(open(data_graph_file, "rb"))
+        p.set_content_disposition(
+            "attachment", name="data-graph-file", filename=data_graph_file
+        )
+        p = mpwriter.append(open(shapes_graph_file, "rb"))
+        p.set_content_disposition(
+            "attachment", name="shapes-graph-file", filename=shapes_graph_file
+        )
+        p = mpwriter.append(open(ontology_graph_file, "rb"))
+        p.set_content_disposition(
+            "attachment", name="ontology-graph-file", filename=ontology_graph_file
+        )
+
+    resp = await client.post("/validator", headers=headers, data=mpwriter)
+    assert resp.status == 200
+    assert resp.headers[hdrs.CONTENT_TYPE] == accept
+
+    body = await resp.text()
+
+    with open(data_graph_file, "r") as file:
+        text = file.read()
+    await _assess_response_body_successful(
+        data=text, format="text/turtle", body=body, content_type=accept
+    )
+
+
+@pytest.mark.integration
+async def test_validator_file_content_negotiation_trig(
+    client: _TestClient, mocks: Any
+) -> None:
+    """Should return OK."""
+    data_graph_file = "tests/files/valid_catalog.ttl"
+    shapes_graph_file = "tests/files/mock_dcat-ap-no-shacl_shapes_2.00.ttl"
+    ontology_graph_file = "tests/files/ontologies.ttl"
+    accept = "application/trig"
+    headers = {"Accept": accept}
+
+    with MultipartWriter("mixed") as mpwriter:
+        p = mpwriter.append(open(data_graph_file, "rb"))
+        p.set_content_disposition(
+            "attachment", name="data-graph-file", filename=data_graph_file
+        )
+        p = mpwriter.append(open(shapes_graph_file, "rb"))
+        p.set_content_disposition(
+            "attachment", name="shapes-graph-file", filename=shapes_graph_file
+        )
+        p = mpwriter.append(open(ontology_graph_file, "rb"))
+        p.set_content_disposition(
+            "attachment", name="ontology-graph-file", filename=ontology_graph_file
+        )
+
+    resp = await client.post("/validator", headers=headers, data=mpwriter)
+    assert resp.status == 200
+    assert resp.headers[hdrs.CONTENT_TYPE] == accept
+
+    body = await resp.text()
+
+    with open(data_graph_file, "r") as file:
+        text = file.read()
+    await _assess_response_body_successful(
+        data=text, format="text/turtle", body=body, content_type=accept
+    )
+
+
 @pytest.mark.integration
 async def test_validator_file_content_type_json_ld(
     client: _TestClient, mocks: Any
@@ -1271,6 +1450,30 @@ async def test_validator_ontology_graph_file_not_readable(
     assert "Ontology graph file is not readable." in body["detail"], "Wrong message."
 
 
+@pytest.mark.integration
+async def test_validator_data_graph_file_too_large(
+    client: _TestClient, mocks: Any, mocker: MockFixture
+) -> None:
+    """Should return status 413."""
+    mocker.patch("dcat_ap_no_validator_service.view.validator.MAX_UPLOAD_SIZE", 1024)
+    data_graph_file = "tests/files/valid_catalog.ttl"
+    shapes_graph_file = "tests/files/mock_dcat-ap-no-shacl_shapes_2.00.ttl"
+
+    with MultipartWriter("mixed") as mpwriter:
+        p = mpwriter.append(open(data_graph_file, "rb"))
+        p.set_content_disposition(
+            "attachment", name="data-graph-file", filename=data_graph_file
+        )
+        p = mpwriter.append(open(shapes_graph_file, "rb"))
+        p.set_content_disposition(
+            "attachment", name="shapes-graph-file", filename=shapes_graph_file
+        )
+
+    resp = await client.post("/validator", data=mpwriter)
+    assert resp.status == 413, "Wrong status code."
+    assert "application/json" in resp.headers[hdrs.CONTENT_TYPE], "Wrong content-type."
+
+
 @pytest.mark.integration
 async def test_validator_ontology_graph_url_references_no_response_graph(
     client: _TestClient, mocks: Any
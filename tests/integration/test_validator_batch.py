@@ -0,0 +1,326 @@
+"""Integration test cases for the batch validator route."""
+
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+from aiohttp import hdrs, MultipartWriter
+from aiohttp.test_utils import TestClient as _TestClient
+from aioresponses import aioresponses
+import pytest
+from pytest_mock import MockFixture
+from rdflib import Graph, RDF, RDFS, SH, URIRef
+from yarl import URL
+
+from dcat_ap_no_validator_service.service import (
+    ValidationQueueFullError,
+    ValidatorService,
+)
+
+_MOCK_SHAPES_STORE: Dict[str, Dict] = dict(
+    {
+        "2": {
+            "id": "2",
+            "name": "DCAT-AP-NO",
+            "version": "2.0",
+            "url": "http://example.com/shapes/2",
+        },
+    }
+)
+
+_SHAPES_GRAPH_FILE = "tests/files/mock_dcat-ap-no-shacl_shapes_2.00.ttl"
+_VALID_DATA_GRAPH_FILE = "tests/files/valid_catalog_no_remote_triples.ttl"
+_INVALID_DATA_GRAPH_FILE = "tests/files/invalid_catalog.ttl"
+
+_ONTOLOGY_GRAPH = b"""
+@prefix owl: <http://www.w3.org/2002/07/owl#> .
+
+<http://example.com/ontologies/1> a owl:Ontology ;
+    owl:imports <http://example.com/ontologies/2> .
+"""
+
+
+@pytest.fixture
+def mocks(mocker: MockFixture) -> Any:
+    """Patch the shapes graph store and the calls to aiohttp.Client.get."""
+    mocker.patch(
+        "dcat_ap_no_validator_service.adapter.shapes_graph_adapter._SHAPES_STORE",
+        _MOCK_SHAPES_STORE,
+    )
+    with aioresponses(passthrough=["http://127.0.0.1"]) as m:
+        with open(_SHAPES_GRAPH_FILE, "r") as file:
+            shapes_graph = file.read()
+        m.get("http://example.com/shapes/2", body=shapes_graph, repeat=True)
+        m.get("http://example.com/shapes/3", status=404)
+        with open(_VALID_DATA_GRAPH_FILE, "r") as file:
+            data_graph = file.read()
+        m.get(
+            "http://example.com/catalogs/1",
+            body=data_graph,
+            content_type="text/turtle",
+            repeat=True,
+        )
+        m.get("http://example.com/catalogs/2", status=404)
+        m.get(
+            "http://example.com/ontologies/2",
+            body="<http://example.com/ontologies/2#term> "
+            "<http://www.w3.org/2000/01/rdf-schema#label> 'Term' .",
+            content_type="text/turtle",
+            repeat=True,
+        )
+        yield m
+
+
+async def _read_lines(resp: Any) -> List[Dict]:
+    assert resp.status == 200
+    assert resp.headers[hdrs.CONTENT_TYPE] == "application/x-ndjson"
+    lines = [json.loads(line) for line in (await resp.text()).splitlines()]
+    return sorted(lines, key=lambda line: line["index"])
+
+
+@pytest.mark.integration
+async def test_validator_batch(client: _TestClient, mocks: Any) -> None:
+    """Should return one report per data graph, by the index of the data graph."""
+    resp = await client.post(
+        "/validator/batch",
+        data=_create_request_body(
+            data_graph_files=[_VALID_DATA_GRAPH_FILE, _INVALID_DATA_GRAPH_FILE],
+            data_graph_urls=["http://example.com/catalogs/1"],
+        ),
+    )
+    lines = await _read_lines(resp)
+
+    assert [line["index"] for line in lines] == [0, 1, 2]
+    assert [line["dataGraph"] for line in lines] == [
+        "valid_catalog_no_remote_triples.ttl",
+        "invalid_catalog.ttl",
+        "http://example.com/catalogs/1",
+    ]
+    reports = [
+        Graph().parse(data=line["report"], format="text/turtle") for line in lines
+    ]
+    assert all(line["conforms"] is False for line in lines)
+    # The file and the url of the same data graph give the same number of results:
+    assert [len(list(g.subjects(RDF.type, SH.ValidationResult))) for g in reports] == [
+        1,
+        4,
+        1,
+    ]
+
+
+@pytest.mark.integration
+async def test_validator_batch_parses_shared_graphs_once(
+    client: _TestClient, mocks: Any, mocker: MockFixture
+) -> None:
+    """Should fetch the shapes graph and import the ontologies once."""
+    create = mocker.spy(ValidatorService, "create")
+    config = {"expand": False, "includeExpandedTriples": True}
+
+    resp = await client.post(
+        "/validator/batch",
+        data=_create_request_body(
+            data_graph_files=[_VALID_DATA_GRAPH_FILE] * 3,
+            shapes_graph_file=None,
+            shapes_graph_url="http://example.com/shapes/2",
+            ontology_graph=_ONTOLOGY_GRAPH,
+            config=config,
+        ),
+    )
+    lines = await _read_lines(resp)
+
+    assert len(lines) == 3
+    assert create.call_count == 1
+    assert len(mocks.requests[("GET", URL("http://example.com/shapes/2"))]) == 1
+    assert len(mocks.requests[("GET", URL("http://example.com/ontologies/2"))]) == 1
+    for line in lines:
+        report = Graph().parse(data=line["report"], format="text/turtle")
+        assert (URIRef("http://example.com/ontologies/2#term"), RDFS.label, None) in (
+            report
+        )
+
+
+@pytest.mark.integration
+async def test_validator_batch_shapes_graph_id(client: _TestClient, mocks: Any) -> None:
+    """Should validate against the shapes graph given by id."""
+    resp = await client.post(
+        "/validator/batch",
+        data=_create_request_body(
+            data_graph_files=[_VALID_DATA_GRAPH_FILE],
+            shapes_graph_file=None,
+            shapes_graph_id="2",
+        ),
+    )
+    lines = await _read_lines(resp)
+
+    assert "report" in lines[0]
+
+
+@pytest.mark.integration
+async def test_validator_batch_errors(
+    client: _TestClient, mocks: Any, mocker: MockFixture
+) -> None:
+    """Should return the error of each data graph that could not be validated."""
+    validate = ValidatorService.validate
+
+    async def validate_unless_invalid(self: Any, *args: Any, **kwargs: Any) -> Any:
+        if (None, RDFS.comment, None) in self.data_graph:
+            raise ValidationQueueFullError("Validation queue is full.")
+        return await validate(self, *args, **kwargs)
+
+    mocker.patch.object(ValidatorService, "validate", validate_unless_invalid)
+
+    resp = await client.post(
+        "/validator/batch",
+        data=_create_request_body(
+            data_graph_files=[_VALID_DATA_GRAPH_FILE],
+            data_graph_urls=["http://example.com/catalogs/2"],
+            extra_data_graph=b"<http://example.com/a> "
+            b"<http://www.w3.org/2000/01/rdf-schema#comment> 'A' .",
+        ),
+    )
+    lines = await _read_lines(resp)
+
+    assert "report" in lines[0]
+    assert "http://example.com/catalogs/2" in lines[1]["error"]
+    assert lines[2]["error"] == "Validation queue is full."
+    assert "conforms" not in lines[2]
+
+
+@pytest.mark.integration
+async def test_validator_batch_unexpected_error(
+    client: _TestClient, mocks: Any, mocker: MockFixture
+) -> None:
+    """Should write the lines of all data graphs, though one fails unexpectedly."""
+    validate = ValidatorService.validate
+
+    async def validate_unless_invalid(self: Any, *args: Any, **kwargs: Any) -> Any:
+        if (None, RDFS.comment, None) in self.data_graph:
+            raise RuntimeError("Unexpected error.")
+        return await validate(self, *args, **kwargs)
+
+    mocker.patch.object(ValidatorService, "validate", validate_unless_invalid)
+
+    resp = await client.post(
+        "/validator/batch",
+        data=_create_request_body(
+            data_graph_files=[_VALID_DATA_GRAPH_FILE, _INVALID_DATA_GRAPH_FILE],
+            extra_data_graph=b"<http://example.com/a> "
+            b"<http://www.w3.org/2000/01/rdf-schema#comment> 'A' .",
+        ),
+    )
+    lines = await _read_lines(resp)
+
+    assert len(lines) == 3
+    assert all("report" in line for line in lines[:2])
+    assert lines[2]["error"] == "Could not validate data graph: Unexpected error."
+    assert "conforms" not in lines[2]
+
+
+@pytest.mark.integration
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        dict(data_graph_files=[]),
+        dict(data_graph_files=[_VALID_DATA_GRAPH_FILE], shapes_graph_file=None),
+        dict(
+            data_graph_files=[_VALID_DATA_GRAPH_FILE],
+            shapes_graph_url="http://example.com/shapes/2",
+        ),
+        dict(
+            data_graph_files=[_VALID_DATA_GRAPH_FILE],
+            shapes_graph_file=None,
+            shapes_graph_url="http://example.com/shapes/3",
+        ),
+        dict(
+            data_graph_files=[_VALID_DATA_GRAPH_FILE],
+            shapes_graph_file=None,
+            shapes_graph_id="4",
+        ),
+        dict(
+            data_graph_files=[_VALID_DATA_GRAPH_FILE],
+            ontology_graph=_ONTOLOGY_GRAPH,
+            ontology_graph_url="http://example.com/ontologies/2",
+        ),
+        dict(
+            data_graph_files=[_VALID_DATA_GRAPH_FILE],
+            shapes_graph_file=_SHAPES_GRAPH_FILE,
+            extra_shapes_graph_file=True,
+        ),
+        dict(data_graph_files=[_VALID_DATA_GRAPH_FILE], config={"catalogKey": "1"}),
+        dict(
+            data_graph_files=[_VALID_DATA_GRAPH_FILE],
+            extra_data_graph=b"\xff not utf-8",
+        ),
+        dict(data_graph_files=[_VALID_DATA_GRAPH_FILE], ontology_graph=b"\xff"),
+    ],
+)
+async def test_validator_batch_bad_request(
+    client: _TestClient, mocks: Any, kwargs: Dict[str, Any]
+) -> None:
+    """Should return 400."""
+    resp = await client.post("/validator/batch", data=_create_request_body(**kwargs))
+
+    assert resp.status == 400
+
+
+@pytest.mark.integration
+async def test_validator_batch_not_multipart(client: _TestClient) -> None:
+    """Should return 415."""
+    resp = await client.post(
+        "/validator/batch", data="", headers={hdrs.CONTENT_TYPE: "text/turtle"}
+    )
+
+    assert resp.status == 415
+
+
+def _create_request_body(
+    data_graph_files: List[str],
+    data_graph_urls: Optional[List[str]] = None,
+    extra_data_graph: Optional[bytes] = None,
+    shapes_graph_file: Optional[str] = _SHAPES_GRAPH_FILE,
+    extra_shapes_graph_file: bool = False,
+    shapes_graph_url: Optional[str] = None,
+    shapes_graph_id: Optional[str] = None,
+    ontology_graph: Optional[bytes] = None,
+    ontology_graph_url: Optional[str] = None,
+    config: Optional[Dict] = None,
+) -> MultipartWriter:
+    with MultipartWriter("mixed") as mpwriter:
+        for data_graph_file in data_graph_files:
+            p = mpwriter.append(open(data_graph_file, "rb"))
+            p.set_content_disposition(
+                "attachment",
+                name="data-graph-file",
+                filename=os.path.basename(data_graph_file),
+            )
+        for data_graph_url in data_graph_urls or []:
+            p = mpwriter.append(data_graph_url)
+            p.set_content_disposition("inline", name="data-graph-url")
+        if extra_data_graph is not None:
+            p = mpwriter.append(extra_data_graph)
+            p.set_content_disposition(
+                "attachment", name="data-graph-file", filename="extra.ttl"
+            )
+        if shapes_graph_file:
+            for _ in range(2 if extra_shapes_graph_file else 1):
+                p = mpwriter.append(open(shapes_graph_file, "rb"))
+                p.set_content_disposition(
+                    "attachment", name="shapes-graph-file", filename=shapes_graph_file
+                )
+        if shapes_graph_url:
+            p = mpwriter.append(shapes_graph_url)
+            p.set_content_disposition("inline", name="shapes-graph-url")
+        if shapes_graph_id:
+            p = mpwriter.append(shapes_graph_id)
+            p.set_content_disposition("inline", name="shapes-graph-id")
+        if ontology_graph is not None:
+            p = mpwriter.append(ontology_graph)
+            p.set_content_disposition(
+                "attachment", name="ontology-graph-file", filename="ontology.ttl"
+            )
+        if ontology_graph_url:
+            p = mpwriter.append(ontology_graph_url)
+            p.set_content_disposition("inline", name="ontology-graph-url")
+        p = mpwriter.append_json(config or {"expand": False})
+        p.set_content_disposition("inline", name="config")
+    return mpwriter
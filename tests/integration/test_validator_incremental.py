@@ -0,0 +1,109 @@
+"""Integration test cases for the validator route with incremental validation."""
+
+from collections import OrderedDict
+from typing import Any, Optional
+
+from aiohttp import MultipartWriter
+from aiohttp.test_utils import TestClient as _TestClient
+from aioresponses import aioresponses
+import pytest
+from pytest_mock import MockFixture
+from rdflib import Graph
+from rdflib.compare import isomorphic
+
+from dcat_ap_no_validator_service.service import validator_service
+from dcat_ap_no_validator_service.service.incremental_validation import (
+    get_previous_validation,
+)
+
+_DATA_GRAPH_FILE = "tests/files/invalid_catalog.ttl"
+
+
+@pytest.fixture
+def previous_validations(mocker: MockFixture) -> OrderedDict:
+    """Patch the previous validations kept."""
+    previous_validations: OrderedDict = OrderedDict()
+    mocker.patch(
+        "dcat_ap_no_validator_service.service.incremental_validation._PREVIOUS_VALIDATIONS",
+        previous_validations,
+    )
+    return previous_validations
+
+
+@pytest.mark.integration
+async def test_validator_incremental(
+    client: _TestClient, previous_validations: OrderedDict, mocker: MockFixture
+) -> None:
+    """Should validate the changed nodes only, and return the full report."""
+    with open(_DATA_GRAPH_FILE, "r") as file:
+        text = file.read()
+    changed_text = text.replace(
+        'dct:title "Test dataset"@en ;',
+        'dct:title "Test dataset"@en ;\n    dct:description "A dataset"@en ;',
+    )
+    config = {"expand": False, "catalogKey": "catalog-1"}
+    run_validation = mocker.spy(validator_service, "run_validation")
+
+    resp = await client.post("/validator", data=_create_request_body(text, config))
+    assert resp.status == 200
+    resp = await client.post(
+        "/validator", data=_create_request_body(changed_text, config)
+    )
+    assert resp.status == 200
+    incremental_report = Graph().parse(data=await resp.text(), format="text/turtle")
+
+    # The second time, only the changed dataset, and what it refers to, is validated:
+    full_data_graph, incremental_data_graph = (
+        call.args[0] for call in run_validation.call_args_list
+    )
+    assert len(incremental_data_graph) < len(full_data_graph)
+
+    resp = await client.post(
+        "/validator", data=_create_request_body(changed_text, {"expand": False})
+    )
+    full_report = Graph().parse(data=await resp.text(), format="text/turtle")
+    assert isomorphic(incremental_report, full_report)
+
+
+@pytest.mark.integration
+async def test_validator_incremental_deadline_exceeded(
+    client: _TestClient, previous_validations: OrderedDict
+) -> None:
+    """Should not keep the validation when remote triples were skipped."""
+    with open(_DATA_GRAPH_FILE, "r") as file:
+        text = file.read()
+    config = {"expand": True, "deadline": 0.000001, "catalogKey": "catalog-1"}
+
+    with aioresponses(passthrough=["http://127.0.0.1"]):
+        resp = await client.post("/validator", data=_create_request_body(text, config))
+    assert resp.status == 200
+    assert get_previous_validation("catalog-1") is None
+
+
+@pytest.mark.integration
+async def test_validator_incremental_invalid_catalog_key(client: _TestClient) -> None:
+    """Should return 400."""
+    with open(_DATA_GRAPH_FILE, "r") as file:
+        text = file.read()
+
+    resp = await client.post(
+        "/validator", data=_create_request_body(text, {"catalogKey": ""})
+    )
+    assert resp.status == 400
+
+
+def _create_request_body(text: str, config: Optional[Any] = None) -> MultipartWriter:
+    shapes_graph_file = "tests/files/mock_dcat-ap-no-shacl_shapes_2.00.ttl"
+    with MultipartWriter("mixed") as mpwriter:
+        p = mpwriter.append(text.encode())
+        p.set_content_disposition(
+            "attachment", name="data-graph-file", filename="catalog.ttl"
+        )
+        p = mpwriter.append(open(shapes_graph_file, "rb"))
+        p.set_content_disposition(
+            "attachment", name="shapes-graph-file", filename=shapes_graph_file
+        )
+        if config is not None:
+            p = mpwriter.append_json(config)
+            p.set_content_disposition("inline", name="config")
+    return mpwriter
@@ -0,0 +1,182 @@
+"""Integration test cases for the validator routes with ontology graph given by id."""
+
+import json
+from typing import Any, Dict
+
+from aiohttp import hdrs, MultipartWriter
+from aiohttp.test_utils import TestClient as _TestClient
+from aioresponses import aioresponses
+import pytest
+from pytest_mock import MockFixture
+from yarl import URL
+
+from dcat_ap_no_validator_service.adapter import DeadlineExceededError
+
+_MOCK_ONTOLOGY_STORE: Dict[str, Dict] = dict(
+    {
+        "2": {
+            "id": "2",
+            "name": "The ontologies used by DCAT-AP-NO",
+            "version": "0.1",
+            "url": "http://example.com/ontologies/2",
+        },
+    }
+)
+
+_ONTOLOGY_GRAPH = """
+@prefix owl: <http://www.w3.org/2002/07/owl#> .
+
+<http://example.com/ontology> a owl:Ontology ;
+    owl:imports <http://example.com/imported> .
+"""
+
+_IMPORTED_ONTOLOGY_GRAPH = """
+@prefix owl: <http://www.w3.org/2002/07/owl#> .
+
+<http://example.com/imported> a owl:Ontology .
+<http://example.com/imported#property> a owl:ObjectProperty .
+"""
+
+
+@pytest.fixture
+def mocks(mocker: MockFixture) -> Any:
+    """Patch the ontology graph store and the calls to aiohttp.Client.get."""
+    mocker.patch(
+        "dcat_ap_no_validator_service.adapter.ontology_graph_adapter._ONTOLOGY_STORE",
+        _MOCK_ONTOLOGY_STORE,
+    )
+    with aioresponses(passthrough=["http://127.0.0.1"]) as m:
+        # The ontology graphs are mocked once, and should be fetched only once:
+        m.get(
+            "http://example.com/ontologies/2",
+            body=_ONTOLOGY_GRAPH,
+            content_type="text/turtle",
+        )
+        m.get(
+            "http://example.com/imported",
+            body=_IMPORTED_ONTOLOGY_GRAPH,
+            content_type="text/turtle",
+        )
+        yield m
+
+
+@pytest.mark.integration
+async def test_validator_ontology_graph_id(client: _TestClient, mocks: Any) -> None:
+    """Should return OK with the imported ontology, imported only once."""
+    for _ in range(2):
+        resp = await client.post("/validator", data=_create_request_body("2"))
+        assert resp.status == 200
+        assert resp.headers[hdrs.CONTENT_TYPE] == "text/turtle"
+
+        body = await resp.text()
+        assert "ValidationReport" in body
+        assert "http://example.com/imported#property" in body
+    assert len(mocks.requests[("GET", URL("http://example.com/imported"))]) == 1
+
+
+@pytest.mark.integration
+async def test_validator_ontology_graph_id_import_skipped(
+    client: _TestClient, mocks: Any, mocker: MockFixture
+) -> None:
+    """Should report the imports skipped, and import them when they can be fetched."""
+    fetch_graph = mocker.patch(
+        "dcat_ap_no_validator_service.adapter.FetchScheduler.fetch_graph",
+        side_effect=DeadlineExceededError("Deadline exceeded."),
+    )
+
+    resp = await client.post("/validator", data=_create_request_body("2"))
+    assert resp.status == 200
+
+    body = await resp.text()
+    assert "ValidationReport" in body
+    assert "http://example.com/imported#property" not in body
+    assert (
+        "Remote triples of http://example.com/imported were skipped: Deadline exceeded."
+        in body
+    )
+
+    # The incomplete ontology graph is not kept, and is resolved again:
+    mocker.stop(fetch_graph)
+    mocks.get(
+        "http://example.com/ontologies/2",
+        body=_ONTOLOGY_GRAPH,
+        content_type="text/turtle",
+    )
+    resp = await client.post("/validator", data=_create_request_body("2"))
+    assert resp.status == 200
+
+    body = await resp.text()
+    assert "http://example.com/imported#property" in body
+    assert "were skipped" not in body
+
+
+@pytest.mark.integration
+async def test_validator_ontology_graph_id_does_not_exist(
+    client: _TestClient, mocks: Any
+) -> None:
+    """Should return status 400 and message."""
+    resp = await client.post("/validator", data=_create_request_body("99"))
+    assert resp.status == 400, "Wrong status code."
+
+    body = await resp.json()
+    assert "Ontology graph with id 99 not found." in body["detail"], "Wrong message."
+
+
+@pytest.mark.integration
+async def test_batch_validator_ontology_graph_id(
+    client: _TestClient, mocks: Any
+) -> None:
+    """Should validate each data graph with the imported ontology."""
+    resp = await client.post("/validator/batch", data=_create_request_body("2"))
+    assert resp.status == 200
+
+    lines = [json.loads(line) for line in (await resp.text()).splitlines()]
+    assert len(lines) == 1
+    assert "http://example.com/imported#property" in lines[0]["report"]
+
+
+@pytest.mark.integration
+async def test_batch_validator_ontology_graph_id_does_not_exist(
+    client: _TestClient, mocks: Any
+) -> None:
+    """Should return status 400 and message."""
+    resp = await client.post("/validator/batch", data=_create_request_body("99"))
+    assert resp.status == 400, "Wrong status code."
+
+    body = await resp.json()
+    assert "Ontology graph with id 99 not found." in body["detail"], "Wrong message."
+
+
+@pytest.mark.integration
+async def test_batch_validator_multiple_ontology_graphs(
+    client: _TestClient, mocks: Any
+) -> None:
+    """Should return status 400 and message."""
+    body = _create_request_body("2")
+    p = body.append("http://example.com/ontologies/2")
+    p.set_content_disposition("inline", name="ontology-graph-url")
+
+    resp = await client.post("/validator/batch", data=body)
+    assert resp.status == 400, "Wrong status code."
+
+    body = await resp.json()
+    assert "Multiple ontology graphs in input." in body["detail"], "Wrong message."
+
+
+def _create_request_body(ontology_graph_id: str) -> MultipartWriter:
+    data_graph_file = "tests/files/valid_catalog_no_remote_triples.ttl"
+    shapes_graph_file = "tests/files/mock_dcat-ap-no-shacl_shapes_2.00.ttl"
+    with MultipartWriter("mixed") as mpwriter:
+        p = mpwriter.append(open(data_graph_file, "rb"))
+        p.set_content_disposition(
+            "attachment", name="data-graph-file", filename=data_graph_file
+        )
+        p = mpwriter.append(open(shapes_graph_file, "rb"))
+        p.set_content_disposition(
+            "attachment", name="shapes-graph-file", filename=shapes_graph_file
+        )
+        p = mpwriter.append(ontology_graph_id)
+        p.set_content_disposition("inline", name="ontology-graph-id")
+        p = mpwriter.append_json({"expand": False, "includeExpandedTriples": True})
+        p.set_content_disposition("inline", name="config")
+    return mpwriter
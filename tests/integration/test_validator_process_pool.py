@@ -0,0 +1,148 @@
+"""Integration test cases for the validator route with a validation pool."""
+
+from typing import Any, Optional
+
+from aiohttp import hdrs, MultipartWriter
+from aiohttp.test_utils import TestClient as _TestClient
+import pytest
+from pytest_mock import MockFixture
+from rdflib import Graph, Literal, SH
+from rdflib.compare import isomorphic
+
+from dcat_ap_no_validator_service import create_app
+from dcat_ap_no_validator_service.service import (
+    ValidationPool,
+    ValidationQueueFullError,
+)
+
+_UNIQUE_ID_DATA_GRAPH = b"""
+@prefix dcat: <http://www.w3.org/ns/dcat#> .
+@prefix ex: <http://example.com/> .
+
+ex:a a dcat:Dataset ; ex:id "1" .
+ex:b a dcat:Dataset ; ex:id "2" .
+ex:c a dcat:Dataset ; ex:id "3" .
+ex:d a dcat:Dataset ; ex:id "1" .
+"""
+
+_UNIQUE_ID_SHAPES_GRAPH = b"""
+@prefix dcat: <http://www.w3.org/ns/dcat#> .
+@prefix sh: <http://www.w3.org/ns/shacl#> .
+
+<http://example.com/DatasetShape> a sh:NodeShape ;
+    sh:targetClass dcat:Dataset ;
+    sh:sparql [
+        sh:message "The id is not unique." ;
+        sh:select '''
+            SELECT $this ?value WHERE {
+                $this <http://example.com/id> ?value .
+                ?other <http://example.com/id> ?value .
+                FILTER ($this != ?other)
+            }
+        ''' ;
+    ] .
+"""
+
+
+@pytest.fixture
+async def process_pool_client(aiohttp_client: Any, mocker: MockFixture) -> _TestClient:
+    """Instantiate server with validations in a process pool and start it."""
+    mocker.patch("dcat_ap_no_validator_service.app.VALIDATION_EXECUTOR", "process")
+    mocker.patch("dcat_ap_no_validator_service.app.VALIDATION_MAX_WORKERS", 1)
+    app = await create_app()
+    return await aiohttp_client(app)
+
+
+@pytest.mark.integration
+async def test_validator_in_process_pool(process_pool_client: _TestClient) -> None:
+    """Should return OK and a validation report."""
+    resp = await process_pool_client.post("/validator", data=_create_request_body())
+    assert resp.status == 200
+    assert resp.headers[hdrs.CONTENT_TYPE] == "text/turtle"
+
+    body = await resp.text()
+    assert "ValidationReport" in body
+
+
+@pytest.mark.integration
+async def test_validator_in_process_pool_sharded(
+    process_pool_client: _TestClient, client: _TestClient, mocker: MockFixture
+) -> None:
+    """Should return the validation report of the data graph validated in shards."""
+    mocker.patch(
+        "dcat_ap_no_validator_service.service.validator_service.VALIDATION_SHARD_SIZE",
+        1,
+    )
+    validate_shards = mocker.spy(ValidationPool, "validate_shards")
+
+    resp = await process_pool_client.post("/validator", data=_create_request_body())
+    assert resp.status == 200
+    assert len(validate_shards.call_args.args[1]) > 1
+    sharded_report = Graph().parse(data=await resp.text(), format="text/turtle")
+
+    resp = await client.post("/validator", data=_create_request_body())
+    report = Graph().parse(data=await resp.text(), format="text/turtle")
+    assert isomorphic(sharded_report, report)
+
+
+@pytest.mark.integration
+async def test_validator_in_process_pool_not_sharded(
+    process_pool_client: _TestClient, mocker: MockFixture
+) -> None:
+    """Should validate the data graph whole when the shapes may read any triple."""
+    mocker.patch(
+        "dcat_ap_no_validator_service.service.validator_service.VALIDATION_SHARD_SIZE",
+        1,
+    )
+    validate_shards = mocker.spy(ValidationPool, "validate_shards")
+
+    resp = await process_pool_client.post(
+        "/validator",
+        data=_create_request_body(
+            data_graph=_UNIQUE_ID_DATA_GRAPH, shapes_graph=_UNIQUE_ID_SHAPES_GRAPH
+        ),
+    )
+    assert resp.status == 200
+    assert validate_shards.call_count == 0
+    report = Graph().parse(data=await resp.text(), format="text/turtle")
+    assert (None, SH.conforms, Literal(False)) in report
+
+
+@pytest.mark.integration
+async def test_validator_queue_is_full(
+    process_pool_client: _TestClient, mocker: MockFixture
+) -> None:
+    """Should return 503 Service Unavailable."""
+    mocker.patch(
+        "dcat_ap_no_validator_service.service.ValidationPool.validate",
+        side_effect=ValidationQueueFullError("Validation queue is full."),
+    )
+
+    resp = await process_pool_client.post("/validator", data=_create_request_body())
+    assert resp.status == 503, "Wrong status code."
+
+    body = await resp.json()
+    assert "Validation queue is full." in body["detail"], "Wrong message."
+
+
+def _create_request_body(
+    data_graph: Optional[bytes] = None, shapes_graph: Optional[bytes] = None
+) -> MultipartWriter:
+    data_graph_file = "tests/files/valid_catalog_no_remote_triples.ttl"
+    shapes_graph_file = "tests/files/mock_dcat-ap-no-shacl_shapes_2.00.ttl"
+    with MultipartWriter("mixed") as mpwriter:
+        p = mpwriter.append(
+            data_graph if data_graph is not None else open(data_graph_file, "rb")
+        )
+        p.set_content_disposition(
+            "attachment", name="data-graph-file", filename=data_graph_file
+        )
+        p = mpwriter.append(
+            shapes_graph if shapes_graph is not None else open(shapes_graph_file, "rb")
+        )
+        p.set_content_disposition(
+            "attachment", name="shapes-graph-file", filename=shapes_graph_file
+        )
+        p = mpwriter.append_json({"expand": False})
+        p.set_content_disposition("inline", name="config")
+    return mpwriter
@@ -0,0 +1,200 @@
+"""Integration test cases for the validator route with the result cache."""
+
+from typing import Any, Dict, Optional
+
+from aiohttp import hdrs, MultipartWriter
+from aiohttp.test_utils import TestClient as _TestClient
+from aioresponses import aioresponses
+import pytest
+from pytest_mock import MockFixture
+from redis.exceptions import ConnectionError
+
+from dcat_ap_no_validator_service import create_app
+from dcat_ap_no_validator_service.adapter import ResultCache
+from dcat_ap_no_validator_service.service import validator_service
+
+_MOCK_SHAPES_STORE: Dict[str, Dict] = dict(
+    {
+        "2": {
+            "id": "2",
+            "name": "DCAT-AP-NO",
+            "version": "2.0",
+            "url": "http://example.com/shapes/2",
+        },
+        "3": {
+            "id": "3",
+            "name": "DCAT-AP-NO",
+            "version": "3.0",
+            "url": "http://example.com/shapes/3",
+        },
+    }
+)
+
+
+@pytest.fixture
+def mocks(mocker: MockFixture) -> Any:
+    """Patch the shapes graph store and the calls to aiohttp.Client.get."""
+    mocker.patch(
+        "dcat_ap_no_validator_service.adapter.shapes_graph_adapter._SHAPES_STORE",
+        _MOCK_SHAPES_STORE,
+    )
+    with aioresponses(passthrough=["http://127.0.0.1"]) as m:
+        with open("tests/files/mock_dcat-ap-no-shacl_shapes_2.00.ttl", "r") as file:
+            shapes_graph = file.read()
+        m.get("http://example.com/shapes/2", body=shapes_graph, repeat=True)
+        m.get("http://example.com/shapes/3", status=404)
+        with open("tests/files/valid_catalog_no_remote_triples.ttl", "r") as file:
+            data_graph = file.read()
+        m.get("http://example.com/catalogs/1", body=data_graph, repeat=True)
+        yield m
+
+
+@pytest.fixture
+async def client(aiohttp_client: Any, fake_redis: Any) -> _TestClient:
+    """Instantiate server with the result cache in a fake redis, and start it."""
+    app = await create_app()
+
+    async def result_cache_context(app: Any) -> Any:
+        app["result_cache"] = ResultCache(
+            fake_redis, "results", ttl=60, max_entries=10, max_entry_size=1024 * 1024
+        )
+        yield
+
+    app.cleanup_ctx.append(result_cache_context)
+    return await aiohttp_client(app)
+
+
+@pytest.mark.integration
+async def test_validator_result_cache(
+    client: _TestClient, mocks: Any, mocker: MockFixture
+) -> None:
+    """Should validate once, and return the cached report for identical requests."""
+    run_validation = mocker.spy(validator_service, "run_validation")
+    resp1 = await client.post("/validator", data=_create_request_body())
+    resp2 = await client.post("/validator", data=_create_request_body())
+
+    assert resp1.status == 200
+    assert resp1.headers["X-Validation-Cache"] == "miss"
+    assert resp2.status == 200
+    assert resp2.headers["X-Validation-Cache"] == "hit"
+    assert resp2.headers[hdrs.CONTENT_TYPE] == "text/turtle"
+    assert await resp1.read() == await resp2.read()
+    assert run_validation.call_count == 1
+
+
+@pytest.mark.integration
+async def test_validator_result_cache_by_shapes_graph_id(
+    client: _TestClient, mocks: Any
+) -> None:
+    """Should return the cached report when the shapes graph is given by id."""
+    resp1 = await client.post("/validator", data=_create_request_body(id="2"))
+    resp2 = await client.post("/validator", data=_create_request_body(id="2"))
+
+    assert resp1.headers["X-Validation-Cache"] == "miss"
+    assert resp2.headers["X-Validation-Cache"] == "hit"
+
+
+@pytest.mark.integration
+async def test_validator_result_cache_shapes_graph_id_not_found(
+    client: _TestClient, mocks: Any
+) -> None:
+    """Should return 400 when the shapes graph given by id cannot be fetched."""
+    resp = await client.post("/validator", data=_create_request_body(id="3"))
+
+    assert resp.status == 400
+
+
+@pytest.mark.integration
+async def test_validator_result_cache_other_accept(
+    client: _TestClient, mocks: Any
+) -> None:
+    """Should not return a report cached for another content type."""
+    resp1 = await client.post("/validator", data=_create_request_body())
+    resp2 = await client.post(
+        "/validator",
+        data=_create_request_body(),
+        headers={hdrs.ACCEPT: "application/n-triples"},
+    )
+
+    assert resp1.headers["X-Validation-Cache"] == "miss"
+    assert resp2.headers["X-Validation-Cache"] == "miss"
+    assert resp2.headers[hdrs.CONTENT_TYPE] == "application/n-triples"
+
+
+@pytest.mark.integration
+async def test_validator_result_cache_not_acceptable(
+    client: _TestClient, mocks: Any
+) -> None:
+    """Should return 406 when the report cannot be serialized as accepted."""
+    resp = await client.post(
+        "/validator",
+        data=_create_request_body(),
+        headers={hdrs.ACCEPT: "text/not-a-format"},
+    )
+
+    assert resp.status == 406
+
+
+@pytest.mark.integration
+async def test_validator_result_cache_data_graph_url(
+    client: _TestClient, mocks: Any
+) -> None:
+    """Should not use the result cache when a graph is given by url."""
+    with MultipartWriter("mixed") as mpwriter:
+        p = mpwriter.append("http://example.com/catalogs/1")
+        p.set_content_disposition("inline", name="data-graph-url")
+        p = mpwriter.append("2")
+        p.set_content_disposition("inline", name="shapes-graph-id")
+
+    resp = await client.post("/validator", data=mpwriter)
+
+    assert resp.status == 200
+    assert "X-Validation-Cache" not in resp.headers
+
+
+@pytest.mark.integration
+async def test_validator_result_cache_cleared(
+    client: _TestClient, mocks: Any, mocker: MockFixture
+) -> None:
+    """Should validate again after the caches are cleared."""
+    mocker.patch("dcat_ap_no_validator_service.view.cache.ADMIN_TOKEN", "secret")
+    await client.post("/validator", data=_create_request_body())
+
+    resp = await client.delete("/cache", headers={"Authorization": "Bearer secret"})
+    assert resp.status == 204
+
+    resp = await client.post("/validator", data=_create_request_body())
+    assert resp.headers["X-Validation-Cache"] == "miss"
+
+
+@pytest.mark.integration
+async def test_validator_result_cache_not_cleared(
+    client: _TestClient, fake_redis: Any, mocker: MockFixture
+) -> None:
+    """Should return Service Unavailable when the result cache cannot be cleared."""
+    mocker.patch("dcat_ap_no_validator_service.view.cache.ADMIN_TOKEN", "secret")
+    mocker.patch.object(fake_redis, "incr", side_effect=ConnectionError())
+
+    resp = await client.delete("/cache", headers={"Authorization": "Bearer secret"})
+    assert resp.status == 503
+
+
+def _create_request_body(id: Optional[str] = None) -> MultipartWriter:
+    data_graph_file = "tests/files/valid_catalog_no_remote_triples.ttl"
+    shapes_graph_file = "tests/files/mock_dcat-ap-no-shacl_shapes_2.00.ttl"
+    with MultipartWriter("mixed") as mpwriter:
+        p = mpwriter.append(open(data_graph_file, "rb"))
+        p.set_content_disposition(
+            "attachment", name="data-graph-file", filename=data_graph_file
+        )
+        if id:
+            p = mpwriter.append(id)
+            p.set_content_disposition("inline", name="shapes-graph-id")
+        else:
+            p = mpwriter.append(open(shapes_graph_file, "rb"))
+            p.set_content_disposition(
+                "attachment", name="shapes-graph-file", filename=shapes_graph_file
+            )
+        p = mpwriter.append_json({"expand": False})
+        p.set_content_disposition("inline", name="config")
+    return mpwriter
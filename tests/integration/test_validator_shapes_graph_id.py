@@ -0,0 +1,73 @@
+"""Integration test cases for the validator route with shapes graph given by id."""
+
+from typing import Any, Dict
+
+from aiohttp import hdrs, MultipartWriter
+from aiohttp.test_utils import TestClient as _TestClient
+from aioresponses import aioresponses
+import pytest
+from pytest_mock import MockFixture
+
+_MOCK_SHAPES_STORE: Dict[str, Dict] = dict(
+    {
+        "2": {
+            "id": "2",
+            "name": "DCAT-AP-NO",
+            "version": "2.0",
+            "url": "http://example.com/shapes/2",
+        },
+    }
+)
+
+
+@pytest.fixture
+def mocks(mocker: MockFixture) -> Any:
+    """Patch the shapes graph store and the calls to aiohttp.Client.get."""
+    mocker.patch(
+        "dcat_ap_no_validator_service.adapter.shapes_graph_adapter._SHAPES_STORE",
+        _MOCK_SHAPES_STORE,
+    )
+    with aioresponses(passthrough=["http://127.0.0.1"]) as m:
+        with open("tests/files/mock_dcat-ap-no-shacl_shapes_2.00.ttl", "r") as file:
+            shapes_graph = file.read()
+        # The shapes graph is mocked once, and should be fetched only once:
+        m.get("http://example.com/shapes/2", body=shapes_graph)
+        yield m
+
+
+@pytest.mark.integration
+async def test_validator_shapes_graph_id(client: _TestClient, mocks: Any) -> None:
+    """Should return OK, and fetch the shapes graph only once."""
+    for _ in range(2):
+        resp = await client.post("/validator", data=_create_request_body("2"))
+        assert resp.status == 200
+        assert resp.headers[hdrs.CONTENT_TYPE] == "text/turtle"
+
+        body = await resp.text()
+        assert "ValidationReport" in body
+
+
+@pytest.mark.integration
+async def test_validator_shapes_graph_id_does_not_exist(
+    client: _TestClient, mocks: Any
+) -> None:
+    """Should return status 400 and message."""
+    resp = await client.post("/validator", data=_create_request_body("99"))
+    assert resp.status == 400, "Wrong status code."
+
+    body = await resp.json()
+    assert "Shapes graph with id 99 not found." in body["detail"], "Wrong message."
+
+
+def _create_request_body(shapes_graph_id: str) -> MultipartWriter:
+    data_graph_file = "tests/files/valid_catalog_no_remote_triples.ttl"
+    with MultipartWriter("mixed") as mpwriter:
+        p = mpwriter.append(open(data_graph_file, "rb"))
+        p.set_content_disposition(
+            "attachment", name="data-graph-file", filename=data_graph_file
+        )
+        p = mpwriter.append(shapes_graph_id)
+        p.set_content_disposition("inline", name="shapes-graph-id")
+        p = mpwriter.append_json({"expand": False})
+        p.set_content_disposition("inline", name="config")
+    return mpwriter
@@ -0,0 +1,70 @@
+"""Unit test cases for warming up the caches."""
+
+from typing import Any
+
+from aiohttp_client_cache import CachedSession
+from aioresponses import aioresponses
+import pytest
+from pytest_mock import MockFixture
+
+from dcat_ap_no_validator_service.adapter import (
+    FetchScheduler,
+    known_vocabulary_urls,
+    warm_up,
+)
+
+
+@pytest.fixture
+def mock_aioresponse() -> Any:
+    """Set up aioresponses as fixture."""
+    with aioresponses() as m:
+        yield m
+
+
+@pytest.mark.unit
+async def test_warm_up_fetches_imports(mock_aioresponse: Any) -> None:
+    """Should fetch the graphs and the ontologies they import, once each."""
+    mock_aioresponse.get(
+        "http://example.com/ontologies",
+        body=_ontology("http://example.com/ontologies", "http://example.com/a"),
+        content_type="text/turtle",
+    )
+    mock_aioresponse.get(
+        "http://example.com/a",
+        body=_ontology("http://example.com/a", "http://example.com/ontologies"),
+        content_type="text/turtle",
+    )
+    mock_aioresponse.get("http://example.com/b", status=404)
+
+    async with CachedSession(cache=None) as session:
+        count = await warm_up(
+            session,
+            FetchScheduler(),
+            ["http://example.com/ontologies", "http://example.com/b"],
+        )
+
+    assert count == 2
+    assert len(mock_aioresponse.requests) == 3
+
+
+@pytest.mark.unit
+async def test_known_vocabulary_urls(mocker: MockFixture) -> None:
+    """Should return the ontology graph urls and the extra urls."""
+    mocker.patch(
+        "dcat_ap_no_validator_service.adapter.cache_warm_up.CACHE_WARM_UP_URLS",
+        ["http://example.com/extra"],
+    )
+
+    urls = await known_vocabulary_urls()
+
+    assert urls[-1] == "http://example.com/extra"
+    assert all(url.startswith("https://") for url in urls[:-1])
+
+
+def _ontology(url: str, imports: str) -> str:
+    return f"""
+    @prefix owl: <http://www.w3.org/2002/07/owl#> .
+
+    <{url}> a owl:Ontology ;
+        owl:imports <{imports}> .
+    """
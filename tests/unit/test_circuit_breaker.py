@@ -0,0 +1,66 @@
+"""Unit test cases for the circuit breakers."""
+
+import pytest
+from pytest_mock import MockFixture
+
+from dcat_ap_no_validator_service.adapter import CircuitBreakers, CircuitState
+
+_HOST = "data.brreg.no"
+
+
+@pytest.mark.unit
+def test_circuit_opens_after_failures_in_a_row() -> None:
+    """Should open the circuit after the given number of failures in a row."""
+    breakers = CircuitBreakers(failure_threshold=2, reset_timeout=30)
+
+    breakers.record_failure(_HOST)
+    breakers.record_success(_HOST)
+    breakers.record_failure(_HOST)
+    assert breakers.allow_call(_HOST)
+    breakers.record_failure(_HOST)
+
+    assert not breakers.allow_call(_HOST)
+    assert breakers.allow_call("example.com")
+    assert breakers.states() == {_HOST: CircuitState.OPEN.value}
+    assert breakers.open_hosts() == [_HOST]
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "trial_succeeds, expected_states", [(True, {}), (False, {_HOST: "open"})]
+)
+def test_circuit_half_open_lets_one_trial_through(
+    mocker: MockFixture, trial_succeeds: bool, expected_states: dict
+) -> None:
+    """Should let one call through after the reset timeout, and close or open again."""
+    monotonic = mocker.patch("time.monotonic", return_value=0.0)
+    breakers = CircuitBreakers(failure_threshold=1, reset_timeout=30)
+    breakers.record_failure(_HOST)
+    monotonic.return_value = 31.0
+
+    assert breakers.allow_call(_HOST)
+    assert breakers.states() == {_HOST: CircuitState.HALF_OPEN.value}
+    assert breakers.open_hosts() == []
+    assert not breakers.allow_call(_HOST)
+    if trial_succeeds:
+        breakers.record_success(_HOST)
+    else:
+        breakers.record_failure(_HOST)
+
+    assert breakers.states() == expected_states
+    assert breakers.allow_call(_HOST) is trial_succeeds
+
+
+@pytest.mark.unit
+def test_circuit_half_open_trial_abandoned(mocker: MockFixture) -> None:
+    """Should let another trial through when the trial call was given up."""
+    monotonic = mocker.patch("time.monotonic", return_value=0.0)
+    breakers = CircuitBreakers(failure_threshold=1, reset_timeout=30)
+    breakers.record_failure(_HOST)
+    monotonic.return_value = 31.0
+    assert breakers.allow_call(_HOST)
+
+    breakers.abandon_call(_HOST)
+    breakers.abandon_call("example.com")
+
+    assert breakers.allow_call(_HOST)
@@ -0,0 +1,182 @@
+"""Unit test cases for the expansion planner."""
+
+from typing import Any
+
+from aiohttp_client_cache import CachedSession
+from aioresponses import aioresponses
+import pytest
+from rdflib import Graph, Namespace
+from yarl import URL
+
+from dcat_ap_no_validator_service.adapter import parse_text
+from dcat_ap_no_validator_service.service import Config, ValidatorService
+from dcat_ap_no_validator_service.service.expansion_planner import ExpansionPlan
+
+EX = Namespace("http://example.com/")
+
+_SHAPES = """
+@prefix sh: <http://www.w3.org/ns/shacl#> .
+@prefix ex: <http://example.com/> .
+
+ex:DatasetShape a sh:NodeShape ;
+    sh:targetClass ex:Dataset ;
+    sh:property [ sh:path ex:license ; sh:class ex:LicenseDocument ] ,
+        [ sh:path ex:publisher ; sh:node ex:AgentShape ] ,
+        [ sh:path ( ex:theme ex:inScheme ) ; sh:maxCount 1 ] ,
+        [ sh:path ex:landingPage ; sh:nodeKind sh:IRI ] ,
+        [ sh:path ex:page ; sh:maxCount 1 ] .
+
+ex:AgentShape a sh:NodeShape ;
+    sh:property [ sh:path ex:name ; sh:minCount 1 ] .
+"""
+
+_DATA = """
+@prefix ex: <http://example.com/> .
+
+ex:dataset1 a ex:Dataset ;
+    ex:license ex:license1 ;
+    ex:landingPage ex:landingPage1 ;
+    ex:page ex:page1 .
+"""
+
+
+@pytest.fixture
+def mock_aioresponse() -> Any:
+    """Set up aioresponses as fixture."""
+    with aioresponses() as m:
+        yield m
+
+
+@pytest.mark.unit
+def test_expansion_plan() -> None:
+    """Should expand the objects of the predicates the shapes read the objects of."""
+    plan = ExpansionPlan(parse_text(_SHAPES), Graph())
+
+    assert plan.predicates == {EX.license, EX.publisher, EX.theme, EX.inScheme}
+    assert plan.unbounded is False
+    assert plan.expands(EX.license)
+    assert not plan.expands(EX.landingPage)
+    assert not plan.expands(EX.page)
+
+
+@pytest.mark.unit
+def test_expansion_plan_focus_nodes() -> None:
+    """Should expand the objects that are focus nodes of the shapes."""
+    shapes_graph = parse_text(
+        """
+@prefix sh: <http://www.w3.org/ns/shacl#> .
+@prefix ex: <http://example.com/> .
+
+ex:PublisherShape a sh:NodeShape ;
+    sh:targetObjectsOf ex:publisher ;
+    sh:property [ sh:path ex:name ; sh:minCount 1 ] .
+
+ex:ContactShape a sh:NodeShape ;
+    sh:targetClass ex:Kind ;
+    sh:property [ sh:path ex:email ; sh:minCount 1 ] .
+"""
+    )
+    ontology_graph = parse_text(
+        """
+@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .
+@prefix ex: <http://example.com/> .
+
+ex:contactPoint rdfs:range ex:Individual .
+ex:Individual rdfs:subClassOf ex:Kind .
+ex:creator rdfs:subPropertyOf ex:publisher .
+ex:page rdfs:range ex:Document .
+"""
+    )
+
+    plan = ExpansionPlan(shapes_graph, ontology_graph)
+
+    assert plan.predicates == {EX.publisher, EX.creator, EX.contactPoint}
+    assert not plan.expands(EX.page)
+
+
+@pytest.mark.unit
+def test_expansion_plan_unbounded() -> None:
+    """Should expand the objects of all predicates when the shapes may read any triple."""
+    plan = ExpansionPlan(
+        parse_text(
+            _SHAPES
+            + "ex:SparqlShape a sh:NodeShape ; sh:targetClass ex:Dataset ; "
+            + "sh:sparql [ sh:select 'SELECT $this WHERE { }' ] ."
+        ),
+        Graph(),
+    )
+
+    assert plan.unbounded is True
+    assert plan.expands(EX.page)
+
+
+@pytest.mark.unit
+async def test_validate_expands_planned_objects(mock_aioresponse: Any) -> None:
+    """Should only fetch the remote triples of the objects the shapes read."""
+    mock_aioresponse.get(EX.data, body=_DATA, content_type="text/turtle")
+    mock_aioresponse.get(EX.shapes, body=_SHAPES, content_type="text/turtle")
+    mock_aioresponse.get(
+        EX.license1,
+        body="<http://example.com/license1> a <http://example.com/LicenseDocument> .",
+        content_type="text/turtle",
+    )
+
+    async with CachedSession(cache=None) as session:
+        service = await ValidatorService.create(
+            session=session,
+            data_graph_url=str(EX.data),
+            data_graph=None,
+            shapes_graph_url=str(EX.shapes),
+            shapes_graph=None,
+            ontology_graph_url=None,
+            ontology_graph=None,
+            config=Config(expand=True),
+        )
+        conforms, _, _, _ = await service.validate(session)
+    assert conforms is True
+    assert ("GET", URL(EX.license1)) in mock_aioresponse.requests
+    assert ("GET", URL(EX.landingPage1)) not in mock_aioresponse.requests
+    assert ("GET", URL(EX.page1)) not in mock_aioresponse.requests
+
+
+@pytest.mark.unit
+async def test_validate_expands_target_objects(mock_aioresponse: Any) -> None:
+    """Should fetch the remote triples of objects targeted by the shapes only."""
+    mock_aioresponse.get(
+        EX.data,
+        body="<http://example.com/dataset1> <http://example.com/publisher> "
+        "<http://example.com/publisher1> .",
+        content_type="text/turtle",
+    )
+    mock_aioresponse.get(
+        EX.shapes,
+        body="""
+@prefix sh: <http://www.w3.org/ns/shacl#> .
+@prefix ex: <http://example.com/> .
+
+ex:PublisherShape a sh:NodeShape ;
+    sh:targetObjectsOf ex:publisher ;
+    sh:property [ sh:path ex:name ; sh:minCount 1 ] .
+""",
+        content_type="text/turtle",
+    )
+    mock_aioresponse.get(
+        EX.publisher1,
+        body='<http://example.com/publisher1> <http://example.com/name> "Publisher" .',
+        content_type="text/turtle",
+    )
+
+    async with CachedSession(cache=None) as session:
+        service = await ValidatorService.create(
+            session=session,
+            data_graph_url=str(EX.data),
+            data_graph=None,
+            shapes_graph_url=str(EX.shapes),
+            shapes_graph=None,
+            ontology_graph_url=None,
+            ontology_graph=None,
+            config=Config(expand=True),
+        )
+        conforms, _, _, _ = await service.validate(session)
+    assert conforms is True
+    assert ("GET", URL(EX.publisher1)) in mock_aioresponse.requests
@@ -0,0 +1,336 @@
+"""Unit test cases for the fetch scheduler."""
+
+import asyncio
+from collections import Counter
+import time
+from typing import Any, AsyncIterator, Dict, List, Tuple
+from urllib.parse import urlparse
+
+from aiohttp import ClientOSError
+from aiohttp_client_cache import CachedSession
+import pytest
+from pytest_mock import MockFixture
+from rdflib import Graph
+
+from dcat_ap_no_validator_service.adapter import (
+    DeadlineExceededError,
+    FetchError,
+    FetchScheduler,
+)
+
+
+class _MockFetch:
+    """Fake fetch_document recording the highest number of concurrent fetches."""
+
+    def __init__(self) -> None:
+        self.running: Counter = Counter()
+        self.max_running = 0
+        self.max_running_per_host: Dict[str, int] = dict()
+        self.urls: List[str] = []
+        self.redirects: Dict[str, str] = dict()
+        self.delay = 0.01
+
+    async def __call__(self, session: Any, url: str) -> Tuple[Graph, str]:
+        host = urlparse(url).netloc
+        self.urls.append(url)
+        self.running[host] += 1
+        self.max_running = max(self.max_running, sum(self.running.values()))
+        self.max_running_per_host[host] = max(
+            self.max_running_per_host.get(host, 0), self.running[host]
+        )
+        await asyncio.sleep(self.delay)
+        self.running[host] -= 1
+        if url.endswith("not_found"):
+            raise FetchError(f"Could not fetch remote graph from {url}.")
+        if url.endswith("bad_syntax"):
+            raise SyntaxError(f"Bad syntax in graph {url}.")
+        if host == "unreachable.example.com":
+            raise FetchError(f"Max retries reached for {url}.") from ClientOSError()
+        if host == "slow.example.com":
+            raise FetchError(f"Timed out fetching {url}.") from asyncio.TimeoutError()
+        return (Graph(), self.redirects.get(url, url))
+
+
+@pytest.fixture
+async def session() -> AsyncIterator[CachedSession]:
+    """Return a client session, which the fake fetch_document does not use."""
+    async with CachedSession(cache=None) as session:
+        yield session
+
+
+@pytest.fixture
+def mock_fetch(mocker: MockFixture) -> _MockFetch:
+    """Patch fetch_document in the fetch scheduler."""
+    mock = _MockFetch()
+    mocker.patch(
+        "dcat_ap_no_validator_service.adapter.fetch_scheduler.fetch_document", mock
+    )
+    return mock
+
+
+@pytest.mark.unit
+async def test_fetch_graph_limits_concurrency(
+    session: CachedSession, mock_fetch: _MockFetch
+) -> None:
+    """Should not run more fetches than allowed, in all and per host."""
+    scheduler = FetchScheduler(max_concurrency=3, max_concurrency_per_host=2)
+    urls = [f"http://{host}.example.com/{i}" for host in "abc" for i in range(5)]
+
+    graphs = await asyncio.gather(
+        *[scheduler.fetch_graph(session, url) for url in urls]
+    )
+
+    assert all(isinstance(g, Graph) for g in graphs)
+    assert sorted(mock_fetch.urls) == sorted(urls)
+    assert mock_fetch.max_running == 3
+    assert max(mock_fetch.max_running_per_host.values()) == 2
+    metrics = scheduler.metrics()
+    assert metrics["fetches"] == 15
+    assert metrics["waiting"] == 0
+    assert metrics["running"] == 0
+    assert metrics["queueWaitSecondsMax"] > 0
+
+
+@pytest.mark.unit
+async def test_fetch_graph_coalesces_fetches_in_flight(
+    session: CachedSession, mock_fetch: _MockFetch
+) -> None:
+    """Should fetch a url once when it is asked for while in flight."""
+    scheduler = FetchScheduler()
+    url = "http://example.com/1"
+
+    g1, g2 = await asyncio.gather(
+        scheduler.fetch_graph(session, url), scheduler.fetch_graph(session, url)
+    )
+    g3 = await scheduler.fetch_graph(session, url)
+
+    assert g1 is g2
+    assert g3 is not g1
+    assert mock_fetch.urls == [url, url]
+    assert scheduler.metrics()["coalesced"] == 1
+
+
+@pytest.mark.unit
+async def test_fetch_graph_gives_up_at_deadline(
+    session: CachedSession, mock_fetch: _MockFetch
+) -> None:
+    """Should stop waiting at the deadline, and let the fetch go on for others."""
+    scheduler = FetchScheduler()
+    url = "http://example.com/1"
+    mock_fetch.delay = 0.1
+
+    results = await asyncio.gather(
+        scheduler.fetch_graph(session, url, deadline=time.monotonic() + 0.02),
+        scheduler.fetch_graph(session, url),
+        return_exceptions=True,
+    )
+
+    assert isinstance(results[0], DeadlineExceededError)
+    assert isinstance(results[1], Graph)
+    assert mock_fetch.urls == [url]
+    assert scheduler.metrics()["knownFailures"] == 0
+
+
+@pytest.mark.unit
+async def test_fetch_graph_after_deadline(
+    session: CachedSession, mock_fetch: _MockFetch
+) -> None:
+    """Should not start a fetch when the deadline has passed."""
+    scheduler = FetchScheduler()
+
+    with pytest.raises(DeadlineExceededError):
+        await scheduler.fetch_graph(
+            session, "http://example.com/1", deadline=time.monotonic()
+        )
+
+    assert mock_fetch.urls == []
+
+
+@pytest.mark.unit
+async def test_fetch_graph_shares_error(
+    session: CachedSession, mock_fetch: _MockFetch
+) -> None:
+    """Should raise the error of the fetch to all callers."""
+    scheduler = FetchScheduler()
+    url = "http://example.com/not_found"
+
+    results = await asyncio.gather(
+        scheduler.fetch_graph(session, url),
+        scheduler.fetch_graph(session, url),
+        return_exceptions=True,
+    )
+
+    assert all(isinstance(result, FetchError) for result in results)
+    assert mock_fetch.urls == [url]
+
+
+@pytest.mark.unit
+async def test_fetch_graph_fetches_document_once(
+    session: CachedSession, mock_fetch: _MockFetch
+) -> None:
+    """Should fetch hash uris in the same document once."""
+    scheduler = FetchScheduler()
+    uris = [f"http://example.com/vocabulary#{term}" for term in ("a", "b", "c")]
+
+    graphs = await asyncio.gather(
+        *[scheduler.fetch_graph(session, uri) for uri in uris]
+    )
+
+    assert graphs[0] is graphs[1] is graphs[2]
+    assert mock_fetch.urls == ["http://example.com/vocabulary"]
+
+
+@pytest.mark.unit
+async def test_fetch_graph_learns_redirect_target(
+    session: CachedSession, mock_fetch: _MockFetch
+) -> None:
+    """Should fetch a document from where it was found the last time."""
+    scheduler = FetchScheduler()
+    document = "http://example.com/vocabulary"
+    found_at = "http://example.com/vocabulary.ttl"
+    mock_fetch.redirects[document] = found_at
+
+    await scheduler.fetch_graph(session, f"{document}#a")
+    await scheduler.fetch_graph(session, f"{document}#b")
+
+    assert mock_fetch.urls == [document, found_at]
+    assert scheduler.metrics()["locationsLearned"] == 1
+
+
+@pytest.mark.unit
+async def test_fetch_graph_forgets_redirect_target_not_found(
+    session: CachedSession,
+    mock_fetch: _MockFetch,
+) -> None:
+    """Should fetch a document from its own url when the redirect target is gone."""
+    scheduler = FetchScheduler()
+    document = "http://example.com/vocabulary"
+    found_at = "http://example.com/not_found"
+    mock_fetch.redirects[document] = found_at
+
+    await scheduler.fetch_graph(session, document)
+    with pytest.raises(FetchError):
+        await scheduler.fetch_graph(session, document)
+    await scheduler.fetch_graph(session, document)
+
+    assert mock_fetch.urls == [document, found_at, document]
+
+
+@pytest.mark.unit
+async def test_fetch_graph_forgets_oldest_redirect_target(
+    session: CachedSession, mock_fetch: _MockFetch, mocker: MockFixture
+) -> None:
+    """Should remember at most the given number of redirect targets."""
+    mocker.patch(
+        "dcat_ap_no_validator_service.adapter.fetch_scheduler._MAX_LOCATIONS", 1
+    )
+    scheduler = FetchScheduler()
+    for i in range(2):
+        mock_fetch.redirects[f"http://example.com/{i}"] = f"http://example.com/{i}.ttl"
+        await scheduler.fetch_graph(session, f"http://example.com/{i}")
+
+    assert scheduler.metrics()["locationsLearned"] == 1
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "url, error",
+    [
+        ("http://example.com/not_found", FetchError),
+        ("http://example.com/bad_syntax", SyntaxError),
+    ],
+)
+async def test_fetch_graph_skips_url_that_failed(
+    session: CachedSession, mock_fetch: _MockFetch, url: str, error: Any
+) -> None:
+    """Should fail right away when the url failed recently, but fetch other urls."""
+    scheduler = FetchScheduler()
+
+    for _ in range(2):
+        with pytest.raises(error):
+            await scheduler.fetch_graph(session, url)
+    await scheduler.fetch_graph(session, "http://example.com/other")
+
+    assert mock_fetch.urls == [url, "http://example.com/other"]
+    assert scheduler.metrics()["negativeHits"] == 1
+    assert scheduler.metrics()["knownFailures"] == 1
+
+
+@pytest.mark.unit
+async def test_fetch_graph_skips_unreachable_host(
+    session: CachedSession, mock_fetch: _MockFetch
+) -> None:
+    """Should fail right away for all urls at a host that was unreachable."""
+    scheduler = FetchScheduler()
+
+    with pytest.raises(FetchError):
+        await scheduler.fetch_graph(session, "http://unreachable.example.com/1")
+    with pytest.raises(FetchError):
+        await scheduler.fetch_graph(session, "http://unreachable.example.com/2")
+
+    assert mock_fetch.urls == ["http://unreachable.example.com/1"]
+
+
+@pytest.mark.unit
+async def test_fetch_graph_skips_only_url_that_timed_out(
+    session: CachedSession, mock_fetch: _MockFetch
+) -> None:
+    """Should fail right away for the url that timed out, not for its host."""
+    scheduler = FetchScheduler()
+    urls = ["http://slow.example.com/1", "http://slow.example.com/2"]
+
+    for url in (*urls, urls[0]):
+        with pytest.raises(FetchError):
+            await scheduler.fetch_graph(session, url)
+
+    assert mock_fetch.urls == urls
+    assert scheduler.metrics()["negativeHits"] == 1
+
+
+@pytest.mark.unit
+async def test_fetch_graph_retries_url_when_failure_expires(
+    session: CachedSession,
+    mock_fetch: _MockFetch,
+) -> None:
+    """Should fetch the url again when the failure has expired."""
+    scheduler = FetchScheduler(negative_cache_ttl=0.05)
+    url = "http://example.com/not_found"
+
+    with pytest.raises(FetchError):
+        await scheduler.fetch_graph(session, url)
+    await asyncio.sleep(0.1)
+    with pytest.raises(FetchError):
+        await scheduler.fetch_graph(session, url)
+
+    assert mock_fetch.urls == [url, url]
+
+
+@pytest.mark.unit
+async def test_fetch_graph_without_negative_cache(
+    session: CachedSession, mock_fetch: _MockFetch
+) -> None:
+    """Should not remember failures when the time to live is 0."""
+    scheduler = FetchScheduler(negative_cache_ttl=0)
+    url = "http://example.com/not_found"
+
+    for _ in range(2):
+        with pytest.raises(FetchError):
+            await scheduler.fetch_graph(session, url)
+
+    assert mock_fetch.urls == [url, url]
+
+
+@pytest.mark.unit
+async def test_fetch_graph_forgets_oldest_failure(
+    session: CachedSession, mock_fetch: _MockFetch, mocker: MockFixture
+) -> None:
+    """Should remember at most the given number of failures."""
+    mocker.patch(
+        "dcat_ap_no_validator_service.adapter.fetch_scheduler._MAX_FAILURES", 1
+    )
+    scheduler = FetchScheduler()
+    for i in range(2):
+        with pytest.raises(FetchError):
+            await scheduler.fetch_graph(session, f"http://example.com/{i}/not_found")
+
+    assert scheduler.metrics()["knownFailures"] == 1
@@ -0,0 +1,187 @@
+"""Unit test cases for finding the triples focus nodes depend on."""
+
+import pytest
+from rdflib import BNode, Graph, Literal, Namespace, URIRef
+
+from dcat_ap_no_validator_service.service.focus_graph import (
+    affected_nodes,
+    changed_nodes,
+    focus_graph,
+    owner,
+    ShapePaths,
+)
+
+EX = Namespace("http://example.com/")
+
+_SHAPES = """
+@prefix sh: <http://www.w3.org/ns/shacl#> .
+@prefix ex: <http://example.com/> .
+
+ex:DatasetShape a sh:NodeShape ;
+    sh:targetClass ex:Dataset ;
+    sh:property [ sh:path ex:distribution ; sh:node ex:DistributionShape ] ,
+        [ sh:path ex:publisher ; sh:class ex:Agent ] ,
+        [ sh:path ( ex:theme ex:label ) ] ,
+        [ sh:path [ sh:inversePath ex:dataset ] ] ,
+        [ sh:path [ sh:alternativePath ( ex:title [ sh:zeroOrMorePath ex:part ] ) ] ] .
+"""
+
+_DATA = """
+@prefix ex: <http://example.com/> .
+
+ex:catalog ex:dataset ex:dataset1 , ex:dataset2 .
+ex:dataset1 a ex:Dataset ;
+    ex:title "Dataset 1" ;
+    ex:distribution ex:distribution1 ;
+    ex:publisher ex:agent ;
+    ex:contactPoint [ ex:email "a@example.com" ] .
+ex:dataset2 a ex:Dataset ;
+    ex:title "Dataset 2" .
+ex:distribution1 ex:format ex:csv .
+ex:csv ex:label "CSV" ;
+    ex:seeAlso ex:text .
+ex:text ex:label "Text" .
+ex:agent a ex:Agent .
+ex:other ex:title "Other" .
+"""
+
+
+def _graph(text: str) -> Graph:
+    return Graph().parse(data=text, format="text/turtle")
+
+
+@pytest.mark.unit
+def test_shape_paths() -> None:
+    """Should find the predicates followed by the shapes."""
+    paths = ShapePaths(_graph(_SHAPES))
+
+    assert paths.nested == {
+        EX.distribution,
+        EX.theme,
+        EX.label,
+        EX.dataset,
+        EX.title,
+        EX.part,
+    }
+    assert paths.typed == {EX.publisher}
+    assert paths.inverse == {EX.dataset}
+
+
+@pytest.mark.unit
+def test_owner() -> None:
+    """Should return the first IRI a node is found under."""
+    g = _graph(_DATA)
+    contact_point = g.value(EX.dataset1, EX.contactPoint)
+    assert contact_point is not None
+    email = g.value(contact_point, EX.email)
+    assert email is not None
+    root = BNode()
+    g.add((root, EX.label, BNode()))
+
+    assert owner(g, EX.dataset1) == EX.dataset1
+    assert owner(g, contact_point) == EX.dataset1
+    assert owner(g, email) == EX.dataset1
+    assert owner(g, root) == root
+
+
+@pytest.mark.unit
+def test_owner_of_blank_node_cycle() -> None:
+    """Should stop when the blank nodes refer to each other."""
+    g = Graph()
+    a, b = BNode(), BNode()
+    g.add((a, EX.next, b))
+    g.add((b, EX.next, a))
+
+    assert owner(g, a) in (a, b)
+
+
+@pytest.mark.unit
+def test_focus_graph() -> None:
+    """Should return the triples the validation of the focus nodes depends on."""
+    g = _graph(_DATA)
+
+    fg = focus_graph(g, [EX.dataset1], ShapePaths(_graph(_SHAPES)))
+
+    # The description of the dataset, and of the nodes it refers to:
+    assert (EX.dataset1, EX.title, None) in fg
+    assert (None, EX.email, None) in fg
+    assert (EX.agent, None, None) in fg
+    # The triples referring to it, and the description of the catalog by inverse path:
+    assert (EX.catalog, EX.dataset, EX.dataset2) in fg
+    # The nodes reached by nested predicates, and the nodes they refer to:
+    assert (EX.csv, EX.label, None) in fg
+    # But not the nodes reached by other predicates, or not reached at all:
+    assert (EX.text, None, None) not in fg
+    assert (EX.other, None, None) not in fg
+
+
+@pytest.mark.unit
+def test_changed_nodes() -> None:
+    """Should return the nodes with triples added or removed."""
+    old = _graph(_DATA)
+    new = _graph(_DATA)
+    new.remove((EX.dataset2, EX.title, None))
+    new.add((EX.distribution1, EX["format"], EX.json))
+
+    assert changed_nodes(old, new) == {EX.dataset2, EX.distribution1, EX.json}
+
+
+@pytest.mark.unit
+def test_changed_nodes_blank_nodes() -> None:
+    """Should compare blank nodes by the node they are found under."""
+    old = _graph(_DATA)
+    new = _graph(_DATA)
+    assert changed_nodes(old, new) == set()
+
+    contact_point = new.value(EX.dataset1, EX.contactPoint)
+    assert contact_point is not None
+    new.set((contact_point, EX.email, EX.b))
+    assert changed_nodes(old, new) == {EX.dataset1}
+
+
+@pytest.mark.unit
+def test_changed_nodes_root_blank_nodes() -> None:
+    """Should return the blank nodes not found under other nodes, if changed."""
+    old = _graph(_DATA + "[ ex:title 'A' ] .")
+    new = _graph(_DATA + "[ ex:title 'B' ] .")
+
+    changed = changed_nodes(old, new)
+
+    assert len(changed) == 1
+    assert all(isinstance(node, BNode) for node in changed)
+
+
+@pytest.mark.unit
+def test_affected_nodes() -> None:
+    """Should return the changed nodes, and the nodes depending on them."""
+    paths = ShapePaths(_graph(_SHAPES))
+    old = _graph(_DATA)
+    new = _graph(_DATA)
+    new.add((EX.distribution1, EX.title, Literal("Distribution 1")))
+    new.add((EX.text, EX.label, Literal("Plain text")))
+
+    affected = affected_nodes(old, new, paths, changed_nodes(old, new))
+
+    # By nested predicates to the dataset and the catalog, and by the inverse
+    # predicate to the other dataset, but not by other predicates:
+    assert affected == {
+        EX.distribution1,
+        EX.dataset1,
+        EX.catalog,
+        EX.dataset2,
+        EX.text,
+    }
+
+
+@pytest.mark.unit
+def test_affected_nodes_retyped() -> None:
+    """Should return the nodes referring to a node with its class changed."""
+    paths = ShapePaths(_graph(_SHAPES))
+    old = _graph(_DATA)
+    new = _graph(_DATA)
+    new.remove((EX.agent, None, None))
+    remote = URIRef("http://example.com/remote")
+
+    affected = affected_nodes(old, new, paths, {EX.agent, remote})
+
+    assert affected == {EX.agent, EX.dataset1, EX.catalog, EX.dataset2, remote}
@@ -0,0 +1,180 @@
+"""Unit test cases for the graph cache."""
+
+import os
+from typing import Any
+
+import pytest
+from pytest_mock import MockFixture
+from rdflib import Graph, Literal, URIRef
+from rdflib.compare import isomorphic
+
+from dcat_ap_no_validator_service.adapter import GraphCache, MemoryGraphCache
+
+
+@pytest.mark.unit
+def test_get_cached_graph(tmp_path: Any) -> None:
+    """Should return a copy of the cached graph."""
+    cache = GraphCache(str(tmp_path), 1024 * 1024)
+    g = _graph(size=10)
+
+    assert cache.get("key") is None
+    cache.put("key", g)
+    cached = cache.get("key")
+
+    assert cached is not None
+    assert cached is not g
+    assert cached.identifier == g.identifier
+    assert isomorphic(cached, g)
+
+
+@pytest.mark.unit
+def test_clear(tmp_path: Any) -> None:
+    """Should remove all cached graphs."""
+    cache = GraphCache(str(tmp_path), 1024 * 1024)
+    cache.put("1", _graph(size=1))
+    cache.put("2", _graph(size=1))
+
+    cache.clear()
+
+    assert os.listdir(tmp_path) == []
+
+
+@pytest.mark.unit
+def test_put_evicts_least_recently_used(tmp_path: Any) -> None:
+    """Should remove the least recently used graphs when the cache is too large."""
+    g = _graph(size=100)
+    cache = GraphCache(str(tmp_path), 1024 * 1024)
+    cache.put("probe", g)
+    size = os.path.getsize(os.path.join(tmp_path, os.listdir(tmp_path)[0]))
+    cache = GraphCache(str(tmp_path), 2 * size)
+
+    cache.put("1", g)
+    os.utime(cache._path("probe"), (0, 0))
+    os.utime(cache._path("1"), (1, 1))
+    cache.put("2", g)
+
+    assert cache.get("probe") is None
+    assert cache.get("1") is not None
+    assert cache.get("2") is not None
+
+
+@pytest.mark.unit
+def test_get_corrupt_graph(tmp_path: Any) -> None:
+    """Should treat a file that cannot be loaded as a miss, and remove it."""
+    cache = GraphCache(str(tmp_path), 1024 * 1024)
+    with open(cache._path("key"), "wb") as file:
+        file.write(b"not a pickle")
+
+    assert cache.get("key") is None
+    assert not os.path.exists(cache._path("key"))
+
+
+@pytest.mark.unit
+def test_put_fails(tmp_path: Any, mocker: MockFixture) -> None:
+    """Should not cache the graph if it cannot be written."""
+    cache = GraphCache(str(tmp_path), 1024 * 1024)
+    mocker.patch("os.replace", side_effect=OSError("No space left on device"))
+
+    cache.put("key", _graph(size=1))
+
+    assert cache.get("key") is None
+
+
+@pytest.mark.unit
+def test_directory_created_private(tmp_path: Any) -> None:
+    """Should create the directory readable and writable by the user only."""
+    directory = os.path.join(tmp_path, "graphs")
+
+    GraphCache(directory, 1024 * 1024)
+
+    assert os.stat(directory).st_mode & 0o777 == 0o700
+
+
+@pytest.mark.unit
+def test_directory_not_private(tmp_path: Any) -> None:
+    """Should refuse a directory other users may write to."""
+    directory = os.path.join(tmp_path, "graphs")
+    os.makedirs(directory)
+    os.chmod(directory, 0o777)  # noqa: S103
+
+    with pytest.raises(PermissionError):
+        GraphCache(directory, 1024 * 1024)
+
+
+@pytest.mark.unit
+def test_directory_in_unsafe_directory(tmp_path: Any) -> None:
+    """Should refuse a directory in a directory other users may write to."""
+    os.chmod(tmp_path, 0o777)  # noqa: S103
+    directory = os.path.join(tmp_path, "graphs")
+
+    with pytest.raises(PermissionError):
+        GraphCache(directory, 1024 * 1024)
+
+
+@pytest.mark.unit
+def test_directory_owned_by_other_user(tmp_path: Any, mocker: MockFixture) -> None:
+    """Should refuse a directory owned by another user."""
+    mocker.patch("os.getuid", return_value=os.getuid() + 1)
+
+    with pytest.raises(PermissionError):
+        GraphCache(str(tmp_path), 1024 * 1024)
+
+
+def _graph(size: int) -> Graph:
+    g = Graph(identifier=URIRef("urn:sha256:0"))
+    for i in range(size):
+        g.add(
+            (
+                URIRef(f"http://example.com/{i}"),
+                URIRef("http://example.com/p"),
+                Literal(i),
+            )
+        )
+    return g
+
+
+@pytest.mark.unit
+def test_memory_graph_cache_get(mocker: MockFixture) -> None:
+    """Should return the cached value until it expires, and count hits and misses."""
+    monotonic = mocker.patch("time.monotonic", return_value=0.0)
+    cache = MemoryGraphCache(max_size=100, ttl=10)
+    g = _graph(size=1)
+
+    assert cache.get("key") is None
+    cache.put("key", g, 10)
+    assert cache.get("key") is g
+    monotonic.return_value = 11.0
+    assert cache.get("key") is None
+
+    assert cache.metrics() == {"hits": 1, "misses": 2, "entries": 0, "size": 0}
+
+
+@pytest.mark.unit
+def test_memory_graph_cache_evicts_least_recently_used() -> None:
+    """Should remove the least recently used values when the cache is too large."""
+    cache = MemoryGraphCache(max_size=100, ttl=10)
+    cache.put("1", _graph(size=1), 40)
+    cache.put("2", _graph(size=1), 40)
+    cache.get("1")
+    cache.put("3", _graph(size=1), 40)
+    cache.put("too large", _graph(size=1), 101)
+
+    assert cache.get("1") is not None
+    assert cache.get("2") is None
+    assert cache.get("3") is not None
+    assert cache.get("too large") is None
+    assert cache.metrics()["size"] == 80
+
+
+@pytest.mark.unit
+def test_memory_graph_cache_put_again_and_clear() -> None:
+    """Should replace a value put again, and remove all values when cleared."""
+    cache = MemoryGraphCache(max_size=100, ttl=10)
+    cache.put("1", _graph(size=1), 40)
+    cache.put("1", _graph(size=1), 50)
+    assert cache.metrics()["size"] == 50
+
+    cache.clear()
+
+    assert cache.get("1") is None
+    assert cache.metrics()["size"] == 0
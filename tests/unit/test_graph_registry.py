@@ -0,0 +1,181 @@
+"""Unit test cases for the graph registry."""
+
+import asyncio
+from typing import Any, Dict, Tuple
+
+from aiohttp_client_cache import CachedSession
+from aioresponses import aioresponses
+import pytest
+from pytest_mock import MockFixture
+from rdflib import Graph
+
+from dcat_ap_no_validator_service.adapter import GraphRegistry, ShapesGraphAdapter
+
+_MOCK_SHAPES_STORE: Dict[str, Dict] = dict(
+    {
+        "1": {
+            "id": "1",
+            "name": "DCAT-AP-NO",
+            "version": "2.0",
+            "url": "http://example.com/shapes/1",
+        },
+    }
+)
+
+
+@pytest.fixture
+def mock_aioresponse() -> Any:
+    """Set up aioresponses as fixture."""
+    with aioresponses() as m:
+        yield m
+
+
+@pytest.fixture
+def mock_shapes_store(mocker: MockFixture) -> None:
+    """Patch the shapes graph store."""
+    mocker.patch(
+        "dcat_ap_no_validator_service.adapter.shapes_graph_adapter._SHAPES_STORE",
+        _MOCK_SHAPES_STORE,
+    )
+
+
+@pytest.mark.unit
+async def test_get_loads_graph_once(
+    mock_aioresponse: Any, mock_shapes_store: Any
+) -> None:
+    """Should fetch the graph once and return the same parsed graph."""
+    mock_aioresponse.get("http://example.com/shapes/1", body=_mock_shapes_graph())
+    registry = GraphRegistry(ShapesGraphAdapter)
+
+    async with CachedSession(cache=None) as session:
+        g1, g2 = await asyncio.gather(
+            registry.get(session, "1"), registry.get(session, "1")
+        )
+    assert isinstance(g1, Graph)
+    assert len(g1) > 0
+    assert g1 is g2
+    assert len(mock_aioresponse.requests) == 1
+
+
+@pytest.mark.unit
+async def test_get_unknown_id(mock_aioresponse: Any, mock_shapes_store: Any) -> None:
+    """Should return None."""
+    registry = GraphRegistry(ShapesGraphAdapter)
+
+    async with CachedSession(cache=None) as session:
+        g = await registry.get(session, "does_not_exist")
+    assert g is None
+
+
+@pytest.mark.unit
+async def test_refresh(
+    mock_aioresponse: Any, mock_shapes_store: Any, mocker: MockFixture
+) -> None:
+    """Should replace loaded graphs, and keep them when refresh fails."""
+    mock_aioresponse.get("http://example.com/shapes/1", body=_mock_shapes_graph())
+    mock_aioresponse.get("http://example.com/shapes/1", body=_mock_shapes_graph())
+    mock_aioresponse.get("http://example.com/shapes/1", status=500)
+    registry = GraphRegistry(ShapesGraphAdapter)
+
+    async with CachedSession(cache=None) as session:
+        g1 = await registry.get(session, "1")
+        await registry.refresh(session)
+        g2 = await registry.get(session, "1")
+        await registry.refresh(session)
+        g3 = await registry.get(session, "1")
+        mocker.patch(
+            "dcat_ap_no_validator_service.adapter.shapes_graph_adapter._SHAPES_STORE",
+            {},
+        )
+        await registry.refresh(session)
+        g4 = await registry.get(session, "1")
+    assert g1 is not g2
+    assert g2 is g3
+    assert g4 is None
+
+
+@pytest.mark.unit
+async def test_refresh_periodically(mocker: MockFixture) -> None:
+    """Should call refresh on schedule."""
+    registry = GraphRegistry(ShapesGraphAdapter)
+    refresh = mocker.patch.object(GraphRegistry, "refresh")
+
+    async with CachedSession(cache=None) as session:
+        task = asyncio.create_task(registry.refresh_periodically(session, 0.01))
+        await asyncio.sleep(0.05)
+        task.cancel()
+    assert refresh.call_count > 0
+
+
+@pytest.mark.unit
+async def test_get_resolves_graph(
+    mock_aioresponse: Any, mock_shapes_store: Any
+) -> None:
+    """Should keep the graph returned by resolve."""
+    mock_aioresponse.get("http://example.com/shapes/1", body=_mock_shapes_graph())
+    resolved = Graph()
+
+    async def resolve(session: CachedSession, g: Graph) -> Tuple[Graph, bool]:
+        assert len(g) > 0
+        return (resolved, True)
+
+    registry = GraphRegistry(ShapesGraphAdapter, resolve=resolve)
+
+    async with CachedSession(cache=None) as session:
+        g = await registry.get(session, "1")
+    assert g is resolved
+
+
+@pytest.mark.unit
+async def test_get_resolves_incomplete_graph_again(
+    mock_aioresponse: Any, mock_shapes_store: Any
+) -> None:
+    """Should not keep incomplete graphs, and keep the loaded graph on refresh."""
+    mock_aioresponse.get(
+        "http://example.com/shapes/1", body=_mock_shapes_graph(), repeat=True
+    )
+    completes = [False, True, False]
+
+    async def resolve(session: CachedSession, g: Graph) -> Tuple[Graph, bool]:
+        return (g, completes.pop(0))
+
+    registry = GraphRegistry(ShapesGraphAdapter, resolve=resolve)
+
+    async with CachedSession(cache=None) as session:
+        g1 = await registry.get(session, "1")
+        g2 = await registry.get(session, "1")
+        await registry.refresh(session)
+        g3 = await registry.get(session, "1")
+    assert g1 is not g2
+    assert g2 is g3
+    assert completes == []
+
+
+@pytest.mark.unit
+async def test_preload(
+    mock_aioresponse: Any, mock_shapes_store: Any, mocker: MockFixture
+) -> None:
+    """Should load all graphs in the store, and skip those that cannot be loaded."""
+    mocker.patch(
+        "dcat_ap_no_validator_service.adapter.shapes_graph_adapter._SHAPES_STORE",
+        {
+            **_MOCK_SHAPES_STORE,
+            "2": {**_MOCK_SHAPES_STORE["1"], "id": "2", "url": "http://example.com/2"},
+        },
+    )
+    mock_aioresponse.get("http://example.com/shapes/1", body=_mock_shapes_graph())
+    mock_aioresponse.get("http://example.com/2", status=500)
+    registry = GraphRegistry(ShapesGraphAdapter)
+
+    async with CachedSession(cache=None) as session:
+        await registry.preload(session)
+        g = await registry.get(session, "1")
+    assert g is not None
+    assert len(mock_aioresponse.requests) == 2
+
+
+# --- mocks
+def _mock_shapes_graph() -> str:
+    with open("tests/files/mock_dcat-ap-no-shacl_shapes_2.00.ttl", "r") as file:
+        text = file.read()
+    return text
@@ -0,0 +1,38 @@
+"""Unit test cases for the union of graphs."""
+
+import pytest
+from rdflib import Graph, Namespace
+
+from dcat_ap_no_validator_service.adapter import parse_text
+from dcat_ap_no_validator_service.service.graph_union import GraphUnion
+
+EX = Namespace("http://example.com/")
+
+
+@pytest.mark.unit
+def test_graph_union() -> None:
+    """Should read the triples of the graphs, without copying them."""
+    g1 = parse_text("<http://example.com/a> <http://example.com/p> 1 .")
+    g2 = Graph()
+
+    union = GraphUnion([GraphUnion([g1]), g2])
+    g2.parse(data="<http://example.com/b> <http://example.com/p> 2 .", format="turtle")
+
+    assert union.graphs == [g1, g2]
+    assert len(union) == 2
+    assert (EX.b, EX.p, None) in union
+
+
+@pytest.mark.unit
+def test_graph_union_namespaces() -> None:
+    """Should have the prefixes of the graphs, as bound by the first graph."""
+    g1 = Graph(bind_namespaces="none")
+    g1.bind("ex", EX)
+    g2 = Graph(bind_namespaces="none")
+    g2.bind("ex", "http://example.org/")
+    g2.bind("other", "http://example.org/other/")
+
+    namespaces = dict(GraphUnion([g1, g2]).namespaces())
+
+    assert str(namespaces["ex"]) == str(EX)
+    assert str(namespaces["other"]) == "http://example.org/other/"
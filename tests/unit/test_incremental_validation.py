@@ -0,0 +1,249 @@
+"""Unit test cases for incremental validation."""
+
+from collections import OrderedDict
+
+import pytest
+from pytest_mock import MockFixture
+from rdflib import BNode, Graph, Literal, Namespace, RDFS, SH
+from rdflib.compare import isomorphic
+
+from dcat_ap_no_validator_service.adapter import parse_text
+from dcat_ap_no_validator_service.service.focus_graph import focus_graph, ShapePaths
+from dcat_ap_no_validator_service.service.incremental_validation import (
+    get_previous_validation,
+    merge_results,
+    plan_revalidation,
+    PreviousValidation,
+    put_previous_validation,
+    split_results,
+)
+from dcat_ap_no_validator_service.service.validation_pool import run_validation
+
+EX = Namespace("http://example.com/")
+
+_SHAPES = """
+@prefix sh: <http://www.w3.org/ns/shacl#> .
+@prefix ex: <http://example.com/> .
+
+ex:DatasetShape a sh:NodeShape ;
+    sh:targetClass ex:Dataset ;
+    sh:property [ sh:path ex:title ; sh:minCount 1 ] ,
+        [ sh:path ex:contactPoint ; sh:node ex:ContactPointShape ] .
+
+ex:ContactPointShape a sh:NodeShape ;
+    sh:property [ sh:path ex:email ; sh:minCount 1 ] .
+"""
+
+_DATA = """
+@prefix ex: <http://example.com/> .
+
+ex:dataset1 a ex:Dataset ;
+    ex:title "Dataset 1" ;
+    ex:contactPoint ex:contactPoint1 .
+ex:contactPoint1 ex:email "a@example.com" .
+ex:dataset2 a ex:Dataset .
+ex:dataset3 a ex:Dataset ;
+    ex:contactPoint [ ex:name "No email" ] .
+"""
+
+_UNIQUE_ID_SHAPE = """
+ex:UniqueIdShape a sh:NodeShape ;
+    sh:targetClass ex:Dataset ;
+    sh:sparql [
+        sh:select '''
+            SELECT $this WHERE {
+                $this <http://example.com/id> ?id .
+                ?other <http://example.com/id> ?id .
+                FILTER ($this != ?other)
+            }
+        '''
+    ] .
+"""
+
+
+@pytest.fixture
+def previous_validations(mocker: MockFixture) -> OrderedDict:
+    """Patch the previous validations kept."""
+    previous_validations: OrderedDict = OrderedDict()
+    mocker.patch(
+        "dcat_ap_no_validator_service.service.incremental_validation._PREVIOUS_VALIDATIONS",
+        previous_validations,
+    )
+    return previous_validations
+
+
+def _validate(data_graph: Graph, shapes_graph: Graph) -> PreviousValidation:
+    _, results_graph = run_validation(data_graph, Graph(), shapes_graph)
+    return PreviousValidation(
+        shapes_graph_identifier=shapes_graph.identifier,
+        data_graph=data_graph,
+        ontology_graph=Graph(),
+        results=split_results(results_graph, data_graph),
+    )
+
+
+@pytest.mark.unit
+def test_split_results() -> None:
+    """Should return the results by the node their focus node is found under."""
+    data_graph = parse_text(_DATA)
+    _, results_graph = run_validation(data_graph, Graph(), parse_text(_SHAPES))
+
+    results = split_results(results_graph, data_graph)
+
+    assert set(results.keys()) == {EX.dataset2, EX.dataset3}
+    assert (None, SH.resultPath, EX.title) in results[EX.dataset2]
+
+
+@pytest.mark.unit
+def test_merge_results() -> None:
+    """Should return a report of the results, conforming only without results."""
+    data_graph = parse_text(_DATA)
+    conforms, results_graph = run_validation(data_graph, Graph(), parse_text(_SHAPES))
+
+    merged = merge_results(split_results(results_graph, data_graph).values())
+
+    assert merged[0] is conforms is False
+    assert isomorphic(merged[1], results_graph)
+    assert merge_results([])[0] is True
+
+
+@pytest.mark.unit
+def test_plan_revalidation() -> None:
+    """Should return the nodes changed or depending on them, or with blank nodes."""
+    shapes_graph = parse_text(_SHAPES)
+    previous = _validate(parse_text(_DATA), shapes_graph)
+    data_graph = parse_text(_DATA)
+    data_graph.remove((EX.contactPoint1, EX.email, None))
+
+    nodes = plan_revalidation(
+        previous, data_graph, Graph(), shapes_graph, ShapePaths(shapes_graph)
+    )
+
+    assert nodes == {EX.contactPoint1, EX.dataset1, EX.dataset3}
+
+
+@pytest.mark.unit
+def test_plan_revalidation_gives_same_results() -> None:
+    """Should give the results of validating the whole data graph."""
+    shapes_graph = parse_text(_SHAPES)
+    paths = ShapePaths(shapes_graph)
+    previous = _validate(parse_text(_DATA), shapes_graph)
+    data_graph = parse_text(_DATA)
+    data_graph.remove((EX.contactPoint1, EX.email, None))
+    data_graph.add((EX.dataset2, EX.title, Literal("Dataset 2")))
+
+    nodes = plan_revalidation(previous, data_graph, Graph(), shapes_graph, paths)
+    assert nodes is not None
+    _, focus_results_graph = run_validation(
+        focus_graph(data_graph, nodes, paths), Graph(), shapes_graph
+    )
+    results = {n: g for n, g in previous.results.items() if n not in nodes}
+    results.update(
+        (n, g)
+        for n, g in split_results(focus_results_graph, data_graph).items()
+        if n in nodes
+    )
+
+    conforms, results_graph = merge_results(results.values())
+    assert conforms is False
+    assert isomorphic(
+        results_graph, run_validation(data_graph, Graph(), shapes_graph)[1]
+    )
+
+
+@pytest.mark.unit
+def test_plan_revalidation_other_shapes_graph() -> None:
+    """Should return None, when the shapes graph is another."""
+    shapes_graph = parse_text(_SHAPES)
+    previous = _validate(parse_text(_DATA), shapes_graph)
+    other_shapes_graph = parse_text(_SHAPES + "\n# another text\n")
+    unnamed_shapes_graph = Graph().parse(data=_SHAPES, format="text/turtle")
+
+    for g in (other_shapes_graph, unnamed_shapes_graph):
+        assert (
+            plan_revalidation(previous, parse_text(_DATA), Graph(), g, ShapePaths(g))
+            is None
+        )
+
+
+@pytest.mark.unit
+def test_plan_revalidation_ontology_changed() -> None:
+    """Should return None when the schema changed, else the remote nodes changed."""
+    shapes_graph = parse_text(_SHAPES)
+    previous = _validate(parse_text(_DATA), shapes_graph)
+    paths = ShapePaths(shapes_graph)
+
+    ontology_graph = Graph()
+    ontology_graph.add((EX.remote, RDFS.label, Literal("Remote")))
+    nodes = plan_revalidation(
+        previous, parse_text(_DATA), ontology_graph, shapes_graph, paths
+    )
+    assert nodes == {EX.remote, EX.dataset3}
+
+    ontology_graph.add((EX.Dataset, RDFS.subClassOf, EX.Resource))
+    assert (
+        plan_revalidation(
+            previous, parse_text(_DATA), ontology_graph, shapes_graph, paths
+        )
+        is None
+    )
+
+
+@pytest.mark.unit
+def test_plan_revalidation_unbounded_shapes() -> None:
+    """Should return None when the shapes may read triples of other nodes."""
+    shapes_graph = parse_text(_SHAPES + _UNIQUE_ID_SHAPE)
+    data_graph = parse_text(_DATA)
+    data_graph.add((EX.dataset1, EX.id, Literal("1")))
+    data_graph.add((EX.dataset2, EX.id, Literal("2")))
+    previous = _validate(data_graph, shapes_graph)
+    changed_data_graph = parse_text(_DATA)
+    changed_data_graph.add((EX.dataset1, EX.id, Literal("1")))
+    changed_data_graph.add((EX.dataset2, EX.id, Literal("1")))
+
+    assert (
+        plan_revalidation(
+            previous,
+            changed_data_graph,
+            Graph(),
+            shapes_graph,
+            ShapePaths(shapes_graph),
+        )
+        is None
+    )
+
+
+@pytest.mark.unit
+def test_previous_validations(previous_validations: OrderedDict) -> None:
+    """Should keep the most recently used validations."""
+    previous = PreviousValidation(BNode(), Graph(), Graph(), dict())
+
+    for key in ("a", "b", "a", "c", "d", "e", "f", "g", "h", "i"):
+        if get_previous_validation(key) is None:
+            put_previous_validation(key, previous)
+
+    assert len(previous_validations) == 8
+    assert get_previous_validation("a") is previous
+    assert get_previous_validation("b") is None
+
+
+@pytest.mark.unit
+def test_previous_validations_max_triples(
+    previous_validations: OrderedDict, mocker: MockFixture
+) -> None:
+    """Should forget the oldest validations when they hold too many triples."""
+    mocker.patch(
+        "dcat_ap_no_validator_service.service.incremental_validation."
+        "INCREMENTAL_VALIDATION_MAX_TRIPLES",
+        10,
+    )
+    data_graph = parse_text(_DATA)
+    small = PreviousValidation(BNode(), Graph(), Graph(), {EX.a: data_graph})
+    large = PreviousValidation(BNode(), data_graph, data_graph, dict())
+
+    put_previous_validation("a", small)
+    put_previous_validation("b", small)
+    assert list(previous_validations) == ["b"]
+
+    put_previous_validation("b", large)
+    assert get_previous_validation("b") is None
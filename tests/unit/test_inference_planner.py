@@ -0,0 +1,284 @@
+"""Unit test cases for the inference planner."""
+
+from collections import OrderedDict
+from typing import Any
+
+from pyshacl import Validator
+import pytest
+from pytest_mock import MockFixture
+from rdflib import BNode, Graph, Literal, Namespace, RDF, RDFS
+from rdflib.compare import isomorphic
+
+from dcat_ap_no_validator_service.adapter import parse_text
+from dcat_ap_no_validator_service.service.graph_union import GraphUnion
+from dcat_ap_no_validator_service.service.inference_planner import (
+    get_rdfs_schema,
+    get_shape_dependencies,
+    plan_inference,
+    ShapeDependencies,
+)
+from dcat_ap_no_validator_service.service.validation_pool import run_validation
+
+EX = Namespace("http://example.com/")
+
+_SHAPES = """
+@prefix sh: <http://www.w3.org/ns/shacl#> .
+@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .
+@prefix ex: <http://example.com/> .
+
+ex:DatasetShape a sh:NodeShape ;
+    sh:targetClass ex:Dataset ;
+    sh:property [ sh:path ex:title ; sh:minCount 1 ] ,
+        [ sh:path ( ex:publisher [ sh:inversePath ex:member ] ) ; sh:maxCount 1 ] ,
+        [ sh:path ex:contactPoint ; sh:class ex:Kind ] ,
+        [ sh:path rdfs:label ; sh:maxCount 1 ] .
+
+ex:Agent a sh:NodeShape, rdfs:Class ;
+    sh:property [ sh:path ex:name ; sh:minCount 1 ] .
+"""
+
+_DATA = """
+@prefix ex: <http://example.com/> .
+
+ex:dataset1 a ex:Dataset ;
+    ex:headline "Dataset 1" ;
+    ex:contactPoint ex:contactPoint1 .
+ex:dataset2 ex:title "Dataset 2" ;
+    ex:publisher ex:publisher2 .
+"""
+
+_ONTOLOGY = """
+@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .
+@prefix ex: <http://example.com/> .
+
+ex:headline rdfs:subPropertyOf ex:title .
+ex:title rdfs:domain ex:Dataset .
+ex:publisher rdfs:range ex:Organization ;
+    rdfs:range [ ex:unionOf ( ex:Organization ex:Person ) ] .
+ex:contactPoint rdfs:range ex:Individual .
+ex:Individual rdfs:subClassOf ex:Kind .
+ex:Organization rdfs:subClassOf ex:Agent .
+ex:description rdfs:range ex:Text .
+"""
+
+
+@pytest.fixture
+def caches(mocker: MockFixture) -> Any:
+    """Patch the caches of the inference planner."""
+    shape_dependencies: OrderedDict = OrderedDict()
+    rdfs_schemas: OrderedDict = OrderedDict()
+    ontology_inferences: OrderedDict = OrderedDict()
+    mocker.patch(
+        "dcat_ap_no_validator_service.service.inference_planner._SHAPE_DEPENDENCIES",
+        shape_dependencies,
+    )
+    mocker.patch(
+        "dcat_ap_no_validator_service.service.inference_planner._RDFS_SCHEMAS",
+        rdfs_schemas,
+    )
+    mocker.patch(
+        "dcat_ap_no_validator_service.service.inference_planner._ONTOLOGY_INFERENCES",
+        ontology_inferences,
+    )
+    return (shape_dependencies, rdfs_schemas, ontology_inferences)
+
+
+def _validate_with_rdfs_inference(
+    data_graph: Graph, ontology_graph: Graph, shapes_graph: Graph
+) -> Any:
+    conforms, results_graph, _ = Validator(
+        data_graph,
+        shacl_graph=shapes_graph,
+        ont_graph=ontology_graph,
+        options={"inference": "rdfs", "inplace": False, "advanced": False},
+    ).run()
+    return (conforms, results_graph)
+
+
+@pytest.mark.unit
+def test_shape_dependencies() -> None:
+    """Should return the predicates and classes the shapes read."""
+    dependencies = ShapeDependencies(parse_text(_SHAPES))
+
+    assert dependencies.predicates == {
+        EX.title,
+        EX.publisher,
+        EX.member,
+        EX.contactPoint,
+        RDFS.label,
+        EX.name,
+    }
+    assert dependencies.classes == {EX.Dataset, EX.Kind, EX.Agent}
+    assert dependencies.unbounded is False
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "shape",
+    [
+        "sh:property [ sh:path rdf:type ; sh:hasValue ex:Dataset ]",
+        "sh:property [ sh:path ex:title ; sh:class rdfs:Resource ]",
+        "sh:closed true ; sh:property [ sh:path ex:title ]",
+        "sh:sparql [ sh:select 'SELECT $this WHERE { }' ]",
+    ],
+)
+def test_shape_dependencies_unbounded(shape: str) -> None:
+    """Should be unbounded when the shapes may read any triple."""
+    shapes_graph = parse_text(
+        "@prefix sh: <http://www.w3.org/ns/shacl#> .\n"
+        "@prefix rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#> .\n"
+        "@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .\n"
+        "@prefix ex: <http://example.com/> .\n"
+        f"ex:Shape a sh:NodeShape ; sh:targetClass ex:Dataset ; {shape} ."
+    )
+
+    assert ShapeDependencies(shapes_graph).unbounded is True
+    assert plan_inference(parse_text(_DATA), Graph(), shapes_graph) is None
+
+
+@pytest.mark.unit
+def test_plan_inference() -> None:
+    """Should return the entailments of the super-properties and classes read."""
+    entailments = plan_inference(
+        parse_text(_DATA), parse_text(_ONTOLOGY), parse_text(_SHAPES)
+    )
+
+    assert entailments == {
+        (EX.dataset1, EX.title, Literal("Dataset 1")),
+        (EX.dataset1, RDF.type, EX.Dataset),
+        (EX.dataset2, RDF.type, EX.Dataset),
+        (EX.contactPoint1, RDF.type, EX.Individual),
+        (EX.publisher2, RDF.type, EX.Organization),
+    }
+
+
+@pytest.mark.unit
+def test_plan_inference_not_needed() -> None:
+    """Should return no entailments without a schema the shapes depend on."""
+    shapes_graph = parse_text(_SHAPES)
+    ontology_graph = Graph()
+    ontology_graph.add((EX.description, RDFS.range, EX.Text))
+
+    assert plan_inference(parse_text(_DATA), Graph(), shapes_graph) == set()
+    assert plan_inference(parse_text(_DATA), ontology_graph, shapes_graph) == set()
+
+
+@pytest.mark.unit
+def test_plan_inference_blank_node_schema() -> None:
+    """Should return None when the schema has blank node classes or properties."""
+    # Graphs named by their content are not changed, so the triple is parsed too:
+    ontology_graph = parse_text(_ONTOLOGY + "[] rdfs:subClassOf ex:Agent .")
+    data_graph = parse_text(_DATA)
+    data_graph.add((BNode(), RDFS.subClassOf, EX.Agent))
+
+    assert (
+        plan_inference(parse_text(_DATA), ontology_graph, parse_text(_SHAPES)) is None
+    )
+    assert (
+        plan_inference(data_graph, parse_text(_ONTOLOGY), parse_text(_SHAPES)) is None
+    )
+
+
+@pytest.mark.unit
+def test_plan_inference_caches_ontology_inference(caches: Any) -> None:
+    """Should find the entailments of the ontology graph once per shapes graph."""
+    _, _, ontology_inferences = caches
+    shapes_graph = parse_text(_SHAPES)
+    expected = plan_inference(parse_text(_DATA), parse_text(_ONTOLOGY), shapes_graph)
+
+    entailments = [
+        plan_inference(parse_text(_DATA), parse_text(_ONTOLOGY), shapes_graph)
+        for _ in range(2)
+    ]
+
+    assert entailments == [expected, expected]
+    assert len(ontology_inferences) == 1
+    (inference,) = ontology_inferences.values()
+    assert (EX.headline, RDFS.subPropertyOf, EX.title) in inference.schema_triples
+    # Data graphs without schema triples are not read for entailments of the ontology:
+    assert (EX.dataset1, RDF.type, EX.Dataset) not in inference.entailments
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "remote",
+    [
+        "<http://example.com/contactPoint1> <http://example.com/title> 'Kind' .",
+        "<http://example.com/name> rdfs:subPropertyOf <http://example.com/title> .",
+    ],
+)
+def test_plan_inference_graph_union(caches: Any, remote: str) -> None:
+    """Should give the entailments of the graphs of the union merged."""
+    shapes_graph = parse_text(_SHAPES)
+    ontology_graph = parse_text(_ONTOLOGY)
+    remote_graph = parse_text(
+        "@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .\n" + remote
+    )
+    data_graph = parse_text(_DATA)
+    data_graph.add((EX.publisher2, EX.name, Literal("Publisher")))
+    merged_graph = Graph()
+    merged_graph += ontology_graph
+    merged_graph += remote_graph
+
+    entailments = plan_inference(
+        data_graph, GraphUnion([ontology_graph, remote_graph]), shapes_graph
+    )
+
+    assert entailments == plan_inference(data_graph, merged_graph, shapes_graph)
+    assert entailments is not None and len(entailments) > 5
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("ontology", [_ONTOLOGY, ""])
+def test_run_validation_gives_same_results(ontology: str) -> None:
+    """Should give the results of validating with RDFS inference."""
+    data_graph = parse_text(_DATA)
+    ontology_graph = parse_text(ontology)
+    shapes_graph = parse_text(_SHAPES)
+
+    conforms, results_graph = run_validation(data_graph, ontology_graph, shapes_graph)
+
+    expected = _validate_with_rdfs_inference(data_graph, ontology_graph, shapes_graph)
+    assert conforms is expected[0] is False
+    assert isomorphic(results_graph, expected[1])
+    # The data graph given is not changed:
+    assert len(data_graph) == len(parse_text(_DATA))
+
+
+@pytest.mark.unit
+def test_run_validation_with_rdfs_inference() -> None:
+    """Should validate with RDFS inference when the shapes may read any triple."""
+    data_graph = parse_text(_DATA)
+    ontology_graph = parse_text(_ONTOLOGY)
+    shapes_graph = parse_text(
+        _SHAPES.replace("sh:targetClass ex:Dataset ;", "sh:closed true ;")
+    )
+
+    conforms, results_graph = run_validation(data_graph, ontology_graph, shapes_graph)
+
+    expected = _validate_with_rdfs_inference(data_graph, ontology_graph, shapes_graph)
+    assert conforms is expected[0]
+    assert isomorphic(results_graph, expected[1])
+
+
+@pytest.mark.unit
+def test_caches(caches: Any) -> None:
+    """Should keep the most recently used dependencies, schemas and inferences."""
+    shape_dependencies, rdfs_schemas, ontology_inferences = caches
+    shapes_graphs = [parse_text(_SHAPES + f"\n# {i}\n") for i in range(18)]
+    schemas = [frozenset({(EX[f"p{i}"], RDFS.range, EX.Agent)}) for i in range(18)]
+
+    for shapes_graph, schema in zip(shapes_graphs, schemas, strict=True):
+        get_shape_dependencies(shapes_graph)
+        get_rdfs_schema(schema)
+        plan_inference(Graph(), parse_text(_ONTOLOGY), shapes_graph)
+
+    assert len(shape_dependencies) == len(rdfs_schemas) == 16
+    assert len(ontology_inferences) == 16
+    assert get_shape_dependencies(shapes_graphs[-1]) is get_shape_dependencies(
+        shapes_graphs[-1]
+    )
+    assert get_rdfs_schema(schemas[-1]) is get_rdfs_schema(schemas[-1])
+    # Shapes graphs without a content identifier are not cached:
+    get_shape_dependencies(Graph().parse(data=_SHAPES, format="text/turtle"))
+    assert len(shape_dependencies) == 16
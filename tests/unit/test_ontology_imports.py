@@ -0,0 +1,158 @@
+"""Unit test cases for importing the ontologies of an ontology graph."""
+
+from typing import Any
+
+from aiohttp_client_cache import CachedSession
+from aioresponses import aioresponses
+import pytest
+from pytest_mock import MockFixture
+from rdflib import Namespace, OWL, RDF
+
+from dcat_ap_no_validator_service.adapter import FetchScheduler, parse_text
+from dcat_ap_no_validator_service.service import ValidatorService
+from dcat_ap_no_validator_service.service.shapes_graph_cache import content_key
+
+EX = Namespace("http://example.com/")
+
+
+@pytest.fixture
+def mock_aioresponse() -> Any:
+    """Set up aioresponses as fixture."""
+    with aioresponses() as m:
+        yield m
+
+
+def _mock_ontology(uri: str, imports: str) -> str:
+    # The documents do not describe their own uri:
+    return (
+        "@prefix owl: <http://www.w3.org/2002/07/owl#> .\n"
+        f"<{uri}#ontology> a owl:Ontology ; owl:imports {imports} .\n"
+    )
+
+
+@pytest.mark.unit
+async def test_import_ontologies_importing_each_other(
+    mock_aioresponse: Any, mocker: MockFixture
+) -> None:
+    """Should fetch each imported ontology once."""
+    mock_aioresponse.get(EX.a, body=_mock_ontology(EX.a, f"<{EX.b}>"), repeat=True)
+    mock_aioresponse.get(
+        EX.b, body=_mock_ontology(EX.b, f"<{EX.a}>, <{EX.c}>"), repeat=True
+    )
+    mock_aioresponse.get(EX.c, status=404, repeat=True)
+    fetch_graph = mocker.spy(FetchScheduler, "fetch_graph")
+    ontology_graph = parse_text(f"<{EX.ontology}> <{OWL.imports}> <{EX.a}> .")
+
+    async with CachedSession(cache=None) as session:
+        g, complete = await ValidatorService.resolve_ontology_graph(
+            session, ontology_graph, FetchScheduler()
+        )
+    assert sorted(str(call.args[2]) for call in fetch_graph.call_args_list) == [
+        str(EX.a),
+        str(EX.b),
+        str(EX.c),
+    ]
+    # The import of the ontology not found is kept, to be tried again:
+    assert complete is False
+    assert set(g.triples((None, OWL.imports, None))) == {
+        (EX["b#ontology"], OWL.imports, EX.c)
+    }
+    assert (EX["a#ontology"], RDF.type, OWL.Ontology) in g
+    assert (EX["b#ontology"], RDF.type, OWL.Ontology) in g
+
+
+@pytest.mark.unit
+async def test_import_ontologies_max_depth(
+    mock_aioresponse: Any, mocker: MockFixture
+) -> None:
+    """Should leave out the imports deeper than the max depth."""
+    mocker.patch(
+        "dcat_ap_no_validator_service.service.validator_service."
+        "ONTOLOGY_IMPORT_MAX_DEPTH",
+        2,
+    )
+    for level in range(3):
+        mock_aioresponse.get(
+            EX[f"level{level}"],
+            body=_mock_ontology(EX[f"level{level}"], f"<{EX[f'level{level + 1}']}>"),
+        )
+    ontology_graph = parse_text(f"<{EX.ontology}> <{OWL.imports}> <{EX.level0}> .")
+
+    async with CachedSession(cache=None) as session:
+        g, complete = await ValidatorService.resolve_ontology_graph(
+            session, ontology_graph, FetchScheduler()
+        )
+    assert complete is True
+    assert (None, OWL.imports, None) not in g
+    assert (EX["level1#ontology"], RDF.type, OWL.Ontology) in g
+    assert (EX["level2#ontology"], RDF.type, OWL.Ontology) not in g
+
+
+@pytest.mark.unit
+async def test_import_ontologies_already_known(mocker: MockFixture) -> None:
+    """Should not fetch ontologies already in the ontology graph."""
+    fetch_graph = mocker.spy(FetchScheduler, "fetch_graph")
+    text = f"<{EX.ontology}> <{OWL.imports}> <{EX.a}> .\n<{EX.a}> a <{OWL.Ontology}> ."
+
+    async with CachedSession(cache=None) as session:
+        g, complete = await ValidatorService.resolve_ontology_graph(
+            session, parse_text(text), FetchScheduler()
+        )
+        again, _ = await ValidatorService.resolve_ontology_graph(
+            session, parse_text(text), FetchScheduler()
+        )
+    assert complete is True
+    assert fetch_graph.call_count == 0
+    assert (None, OWL.imports, None) not in g
+    # The graph without the import statements is named by its content:
+    assert content_key(g) is not None
+    assert g.identifier != parse_text(text).identifier
+    assert g.identifier == again.identifier
+
+
+@pytest.mark.unit
+async def test_validate_does_not_change_registry_graph(
+    mock_aioresponse: Any, mocker: MockFixture
+) -> None:
+    """Should add the imported ontologies to the remote graph of each service."""
+    mock_aioresponse.get(EX.a, body=_mock_ontology(EX.a, f"<{EX.b}>"), repeat=True)
+    mock_aioresponse.get(EX.b, body=_mock_ontology(EX.b, f"<{EX.a}>"), repeat=True)
+    mock_aioresponse.get(EX.graph, body="", content_type="text/turtle", repeat=True)
+    registry_graph = parse_text(f"<{EX.ontology}> <{OWL.imports}> <{EX.a}> .")
+    registry = mocker.AsyncMock()
+    registry.get.return_value = registry_graph
+    fetch_graph = mocker.spy(FetchScheduler, "fetch_graph")
+
+    async with CachedSession(cache=None) as session:
+        service = await ValidatorService.create(
+            session=session,
+            data_graph_url=None,
+            data_graph=None,
+            shapes_graph_url=str(EX.graph),
+            shapes_graph=None,
+            ontology_graph_url=None,
+            ontology_graph=None,
+            ontology_graph_id="1",
+            ontology_graph_registry=registry,
+        )
+        await service.import_ontologies(session)
+        other = await service.with_data_graph(session, str(EX.graph), None)
+        _, _, ontology_graph, _ = await other.validate(session)
+    assert service.ontology_graph is registry_graph
+    assert set(registry_graph) == {(EX.ontology, OWL.imports, EX.a)}
+    assert fetch_graph.call_count == 2
+    assert (EX["a#ontology"], RDF.type, OWL.Ontology) in ontology_graph
+    assert (EX["b#ontology"], RDF.type, OWL.Ontology) in ontology_graph
+
+
+@pytest.mark.unit
+async def test_resolve_ontology_graph_without_imports() -> None:
+    """Should return the ontology graph itself, when it imports no ontologies."""
+    ontology_graph = parse_text(f"<{EX.a}> a <{OWL.Ontology}> .")
+
+    async with CachedSession(cache=None) as session:
+        g, complete = await ValidatorService.resolve_ontology_graph(
+            session, ontology_graph, FetchScheduler()
+        )
+    assert complete is True
+    assert g is ontology_graph
@@ -1,14 +1,37 @@
 """Integration test cases for the graph_adapter."""
 
+import asyncio
+import os
+import tempfile
+import threading
+import time
 from typing import Any
 
+from aiohttp import ClientConnectionError
 from aiohttp_client_cache import CachedSession
 from aioresponses import aioresponses
 import pytest
+from pytest_mock import MockFixture
 from rdflib import Graph
-from rdflib.compare import graph_diff
+from rdflib.compare import graph_diff, isomorphic
+from yarl import URL
 
-from dcat_ap_no_validator_service.adapter import fetch_graph, FetchError
+from dcat_ap_no_validator_service.adapter import (
+    circuit_breaker_states,
+    CircuitBreakers,
+    CircuitOpenError,
+    clear_graph_cache,
+    content_identifier,
+    DeadlineExceededError,
+    fetch_graph,
+    FetchError,
+    GraphCache,
+    memory_graph_cache_metrics,
+    MemoryGraphCache,
+    open_circuit_hosts,
+    parse_file,
+    parse_text,
+)
 
 
 @pytest.fixture
@@ -78,6 +101,376 @@ async def test_fetch_graph_that_gives_unsuccessful_response(
             _ = await fetch_graph(session, url)
 
 
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_fetch_graph_that_times_out(mock_aioresponse: Any) -> None:
+    """Should raise FetchError caused by the timeout."""
+    url = "https://data.brreg.no/enhetsregisteret/api/enheter/961181399"
+    # Set up the mock
+    mock_aioresponse.get(url, exception=asyncio.TimeoutError())
+
+    async with CachedSession(cache=None) as session:
+        with pytest.raises(FetchError) as e:
+            _ = await fetch_graph(session, url)
+    assert isinstance(e.value.__cause__, asyncio.TimeoutError)
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_fetch_graph_after_deadline(mock_aioresponse: Any) -> None:
+    """Should give up without a request when the deadline has passed."""
+    url = "https://data.brreg.no/enhetsregisteret/api/enheter/961181399"
+
+    async with CachedSession(cache=None) as session:
+        with pytest.raises(DeadlineExceededError):
+            _ = await fetch_graph(session, url, deadline=time.monotonic())
+    assert len(mock_aioresponse.requests) == 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_fetch_graph_that_times_out_at_deadline(mock_aioresponse: Any) -> None:
+    """Should raise DeadlineExceededError when the deadline cut the fetch short."""
+    url = "https://data.brreg.no/enhetsregisteret/api/enheter/961181399"
+
+    async def time_out(*args: Any, **kwargs: Any) -> None:
+        await asyncio.sleep(0.1)
+        raise asyncio.TimeoutError()
+
+    mock_aioresponse.get(url, callback=time_out)
+
+    async with CachedSession(cache=None) as session:
+        with pytest.raises(DeadlineExceededError):
+            _ = await fetch_graph(session, url, deadline=time.monotonic() + 0.05)
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_fetch_graph_from_host_that_is_down(
+    mock_aioresponse: Any, mocker: MockFixture
+) -> None:
+    """Should fail right away, without a request, when the host has failed."""
+    mocker.patch(
+        "dcat_ap_no_validator_service.adapter.remote_graph_adapter._CIRCUIT_BREAKERS",
+        CircuitBreakers(failure_threshold=2, reset_timeout=60),
+    )
+    url = "https://data.brreg.no/enhetsregisteret/api/enheter/961181399"
+    mock_aioresponse.get(url, status=503)
+    mock_aioresponse.get(url, exception=ClientConnectionError())
+
+    async with CachedSession(cache=None) as session:
+        for _ in range(2):
+            with pytest.raises(FetchError):
+                _ = await fetch_graph(session, url)
+        with pytest.raises(CircuitOpenError):
+            _ = await fetch_graph(session, url)
+    assert len(mock_aioresponse.requests[("GET", URL(url))]) == 2
+    assert open_circuit_hosts() == ["data.brreg.no"]
+    assert circuit_breaker_states() == {"data.brreg.no": "open"}
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_fetch_graph_closes_circuit_when_host_answers(
+    mock_aioresponse: Any, mocker: MockFixture
+) -> None:
+    """Should count any answer from the host as a success."""
+    mocker.patch(
+        "dcat_ap_no_validator_service.adapter.remote_graph_adapter._CIRCUIT_BREAKERS",
+        CircuitBreakers(failure_threshold=2, reset_timeout=60),
+    )
+    url = "https://example.com/graph"
+    mock_aioresponse.get(url, exception=asyncio.TimeoutError())
+    mock_aioresponse.get(url, body=b"\xff\xfe")
+    mock_aioresponse.get(url, exception=asyncio.TimeoutError())
+    mock_aioresponse.get(url, exception=asyncio.CancelledError())
+    mock_aioresponse.get(url, body=_mock_rdf_response())
+
+    async with CachedSession(cache=None) as session:
+        for _ in range(3):
+            with pytest.raises(FetchError):
+                _ = await fetch_graph(session, url)
+        with pytest.raises(asyncio.CancelledError):
+            _ = await fetch_graph(session, url)
+        assert len(await fetch_graph(session, url)) > 0
+    assert open_circuit_hosts() == []
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_fetch_graph_at_deadline_keeps_circuit_closed(
+    mock_aioresponse: Any, mocker: MockFixture
+) -> None:
+    """Should not count a timeout cut short by the deadline as a host failure."""
+    mocker.patch(
+        "dcat_ap_no_validator_service.adapter.remote_graph_adapter._CIRCUIT_BREAKERS",
+        CircuitBreakers(failure_threshold=2, reset_timeout=60),
+    )
+    url = "https://example.com/graph"
+
+    async def time_out(*args: Any, **kwargs: Any) -> None:
+        await asyncio.sleep(0.1)
+        raise asyncio.TimeoutError()
+
+    mock_aioresponse.get(url, callback=time_out, repeat=True)
+
+    async with CachedSession(cache=None) as session:
+        for _ in range(3):
+            with pytest.raises(DeadlineExceededError):
+                _ = await fetch_graph(session, url, deadline=time.monotonic() + 0.05)
+    assert open_circuit_hosts() == []
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_fetch_graph_parses_according_to_content_type(
+    mock_aioresponse: Any, mocker: MockFixture
+) -> None:
+    """Should parse the response once, in the format of the content type."""
+    url = "https://example.com/catalogs/1"
+    with open("tests/files/valid_catalog.json", "r") as file:
+        body = file.read()
+    mock_aioresponse.get(url, status=200, body=body, content_type="application/ld+json")
+    parse = mocker.spy(Graph, "parse")
+
+    async with CachedSession(cache=None) as session:
+        o = await fetch_graph(session, url)
+    assert len(o) > 0
+    assert parse.call_count == 1
+    assert parse.call_args.kwargs["format"] == "application/ld+json"
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+@pytest.mark.parametrize("etag", ['"v1"', None])
+async def test_fetch_graph_parses_same_graph_once(
+    mock_aioresponse: Any, mocker: MockFixture, tmp_path: Any, etag: Any
+) -> None:
+    """Should parse the graph once, and then return it from the graph cache."""
+    mocker.patch(
+        "dcat_ap_no_validator_service.adapter.remote_graph_adapter._GRAPH_CACHE",
+        GraphCache(str(tmp_path), 1024 * 1024),
+    )
+    url = "https://example.com/catalogs/1"
+    with open("tests/files/valid_catalog.ttl", "r") as file:
+        body = file.read()
+    headers = {"ETag": etag} if etag else None
+    mock_aioresponse.get(
+        url,
+        status=200,
+        body=body,
+        content_type="text/turtle",
+        headers=headers,
+        repeat=True,
+    )
+    parse = mocker.spy(Graph, "parse")
+
+    async with CachedSession(cache=None) as session:
+        g1 = await fetch_graph(session, url)
+        g2 = await fetch_graph(session, url)
+    assert parse.call_count == 1
+    assert g1 is not g2
+    assert g1.identifier == g2.identifier
+    assert isomorphic(g1, g2)
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_fetch_graph_reads_graph_cache_off_event_loop(
+    mock_aioresponse: Any, mocker: MockFixture, tmp_path: Any
+) -> None:
+    """Should read the graph cache in another thread than the event loop."""
+    mocker.patch(
+        "dcat_ap_no_validator_service.adapter.remote_graph_adapter._GRAPH_CACHE",
+        GraphCache(str(tmp_path), 1024 * 1024),
+    )
+    threads = []
+    get = GraphCache.get
+
+    def recording_get(graph_cache: GraphCache, key: str) -> Any:
+        threads.append(threading.current_thread())
+        return get(graph_cache, key)
+
+    mocker.patch.object(GraphCache, "get", autospec=True, side_effect=recording_get)
+    url = "https://example.com/catalogs/1"
+    mock_aioresponse.get(
+        url, status=200, body="", content_type="text/turtle", repeat=True
+    )
+
+    async with CachedSession(cache=None) as session:
+        await fetch_graph(session, url)
+        await fetch_graph(session, url)
+    assert len(threads) == 2
+    assert threading.current_thread() not in threads
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_fetch_graph_without_cache_not_kept(
+    mock_aioresponse: Any, mocker: MockFixture, tmp_path: Any
+) -> None:
+    """Should not keep graphs fetched without the cache in the graph cache."""
+    mocker.patch(
+        "dcat_ap_no_validator_service.adapter.remote_graph_adapter._GRAPH_CACHE",
+        GraphCache(str(tmp_path), 1024 * 1024),
+    )
+    url = "https://example.com/catalogs/1"
+    with open("tests/files/valid_catalog.ttl", "r") as file:
+        body = file.read()
+    mock_aioresponse.get(
+        url, status=200, body=body, content_type="text/turtle", repeat=True
+    )
+    parse = mocker.spy(Graph, "parse")
+
+    async with CachedSession(cache=None) as session:
+        await fetch_graph(session, url, use_cache=False)
+        await fetch_graph(session, url, use_cache=False)
+    assert parse.call_count == 2
+    assert os.listdir(tmp_path) == []
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_fetch_graph_from_memory(
+    mock_aioresponse: Any, mocker: MockFixture
+) -> None:
+    """Should fetch the graph once, and then return it from memory if use_cache."""
+    mocker.patch(
+        "dcat_ap_no_validator_service.adapter.remote_graph_adapter._MEMORY_GRAPH_CACHE",
+        MemoryGraphCache(max_size=1024 * 1024, ttl=60),
+    )
+    url = "https://www.w3.org/ns/regorg"
+    mock_aioresponse.get(url, status=200, body=_mock_rdf_response(), repeat=True)
+
+    async with CachedSession(cache=None) as session:
+        g1 = await fetch_graph(session, url)
+        g2 = await fetch_graph(session, url)
+        g3 = await fetch_graph(session, url, use_cache=False)
+    assert g1 is g2
+    assert g3 is not g1
+    assert len(mock_aioresponse.requests[("GET", URL(url))]) == 2
+    assert memory_graph_cache_metrics() == {
+        "hits": 1,
+        "misses": 1,
+        "entries": 1,
+        "size": len(_mock_rdf_response()),
+    }
+
+    clear_graph_cache()
+    assert memory_graph_cache_metrics()["entries"] == 0  # type: ignore
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "filename, content_type, expected_format",
+    [
+        ("tests/files/valid_catalog.ttl", None, "text/turtle"),
+        ("tests/files/valid_catalog.json", None, "application/ld+json"),
+        ("tests/files/valid_catalog.xml", None, "application/rdf+xml"),
+        ("tests/files/valid_catalog.ttl", "text/turtle; charset=utf-8", "text/turtle"),
+        ("tests/files/valid_catalog.xml", "application/rdf+xml", "application/rdf+xml"),
+    ],
+)
+def test_parse_text_once(
+    mocker: MockFixture,
+    filename: str,
+    content_type: Any,
+    expected_format: str,
+) -> None:
+    """Should parse the text once, in the expected format."""
+    with open(filename, "r") as file:
+        text = file.read()
+    parse = mocker.spy(Graph, "parse")
+
+    g = parse_text(text, content_type=content_type, filename=filename)
+    assert len(g) > 0
+    assert parse.call_count == 1
+    assert parse.call_args.kwargs["format"] == expected_format
+
+
+@pytest.mark.unit
+def test_parse_text_without_hints(mocker: MockFixture) -> None:
+    """Should parse the text once, in the format given by its first characters."""
+    with open("tests/files/valid_catalog.json", "r") as file:
+        text = file.read()
+    parse = mocker.spy(Graph, "parse")
+
+    g = parse_text(text)
+    assert len(g) > 0
+    assert parse.call_count == 1
+    assert parse.call_args.kwargs["format"] == "application/ld+json"
+
+
+@pytest.mark.unit
+def test_parse_text_with_wrong_content_type() -> None:
+    """Should parse the text in the format given by its first characters."""
+    with open("tests/files/valid_catalog.ttl", "r") as file:
+        text = file.read()
+
+    g = parse_text(text, content_type="application/rdf+xml", filename="catalog.rdf")
+    assert isomorphic(g, Graph().parse(data=text, format="text/turtle"))
+
+
+@pytest.mark.unit
+def test_parse_text_turtle_starting_as_json_ld(mocker: MockFixture) -> None:
+    """Should parse the text as Turtle, when it is not JSON-LD as it starts."""
+    parse = mocker.spy(Graph, "parse")
+
+    g = parse_text("[] <http://example.com/p> <http://example.com/o> .")
+    assert len(g) == 1
+    assert [call.kwargs["format"] for call in parse.call_args_list] == [
+        "application/ld+json",
+        "text/turtle",
+    ]
+
+
+@pytest.mark.unit
+def test_parse_text_that_is_not_parsable() -> None:
+    """Should raise SyntaxError."""
+    with open("tests/files/invalid_rdf.txt", "r") as file:
+        text = file.read()
+
+    with pytest.raises(SyntaxError):
+        _ = parse_text(text, content_type="text/turtle")
+
+
+@pytest.mark.unit
+def test_parse_file_with_wrong_content_type() -> None:
+    """Should parse the file in the format given by its first characters."""
+    with open("tests/files/valid_catalog.json", "r") as file:
+        text = file.read()
+    identifier = content_identifier(text)
+
+    with tempfile.TemporaryFile() as f:
+        f.write(text.encode())
+        g = parse_file(f, identifier, content_type="text/turtle")
+        assert not f.closed
+    assert g.identifier == identifier
+    assert isomorphic(g, parse_text(text))
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_fetch_graph_without_cache_in_shared_session(
+    mock_aioresponse: Any,
+) -> None:
+    """Should bypass the response cache for the fetch only, not for the session."""
+    url = "https://www.w3.org/ns/regorg"
+    async with CachedSession(cache=None) as session:
+        cache_disabled = []
+        mock_aioresponse.get(
+            url,
+            status=200,
+            body=_mock_rdf_response(),
+            callback=lambda *args, **kwargs: cache_disabled.append(
+                session.cache.disabled
+            ),
+        )
+        g = await fetch_graph(session, url, use_cache=False)
+    assert len(g) > 0
+    assert cache_disabled == [False]
+
+
 # --- mocks
 def _mock_rdf_response() -> str:
     with open("tests/files/valid_catalog.ttl", "r") as file:
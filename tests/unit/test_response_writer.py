@@ -0,0 +1,72 @@
+"""Unit test cases for the response writer module."""
+
+from typing import List
+
+import pytest
+from pytest_mock import MockFixture
+from rdflib import BNode, Graph, Literal, URIRef
+from rdflib.compare import isomorphic
+
+from dcat_ap_no_validator_service.view.response_writer import (
+    is_streamable,
+    serialize_graphs,
+    write_graphs,
+)
+
+_EX = "http://example.com/"
+
+
+@pytest.mark.unit
+def test_is_streamable() -> None:
+    """Should return True only for line based formats."""
+    assert is_streamable("application/n-triples")
+    assert is_streamable("application/n-quads")
+    assert not is_streamable("text/turtle")
+    assert not is_streamable("application/ld+json")
+
+
+@pytest.mark.unit
+def test_serialize_graphs_shared_blank_node() -> None:
+    """Should keep a blank node shared between the graphs as one node."""
+    g1, g2 = _graphs_with_shared_blank_node()
+
+    body = serialize_graphs([g1, g2], format="text/turtle")
+
+    assert isomorphic(Graph().parse(data=body, format="text/turtle"), g1 + g2)
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("format", ["application/trig", "application/n-quads"])
+def test_serialize_graphs_dataset_format(format: str) -> None:
+    """Should write the graphs as the default graph of the dataset."""
+    g1, g2 = _graphs_with_shared_blank_node()
+
+    body = serialize_graphs([g1, g2], format=format)
+
+    assert isomorphic(Graph().parse(data=body, format=format), g1 + g2)
+
+
+@pytest.mark.unit
+async def test_write_graphs_in_chunks(mocker: MockFixture) -> None:
+    """Should write all triples of all graphs, in more than one chunk."""
+    g1, g2 = _graphs_with_shared_blank_node()
+    for i in range(2000):
+        g2.add((URIRef(f"{_EX}s{i}"), URIRef(f"{_EX}p"), Literal("x" * 32)))
+    chunks: List[bytes] = []
+    response = mocker.MagicMock()
+    response.write = mocker.AsyncMock(side_effect=chunks.append)
+
+    await write_graphs(response, [g1, g2])
+
+    assert len(chunks) > 1
+    body = b"".join(chunks).decode()
+    assert isomorphic(Graph().parse(data=body, format="nt"), g1 + g2)
+
+
+def _graphs_with_shared_blank_node() -> List[Graph]:
+    node = BNode()
+    g1 = Graph()
+    g1.add((URIRef(f"{_EX}report"), URIRef(f"{_EX}focusNode"), node))
+    g2 = Graph()
+    g2.add((node, URIRef(f"{_EX}name"), Literal("shared")))
+    return [g1, g2]
@@ -0,0 +1,92 @@
+"""Unit test cases for the result cache."""
+
+from typing import Any
+
+import pytest
+from pytest_mock import MockFixture
+from redis.exceptions import ConnectionError
+
+from dcat_ap_no_validator_service.adapter import result_key, ResultCache
+
+
+def _result_cache(redis: Any, max_entries: int = 10) -> ResultCache:
+    return ResultCache(
+        redis, "results", ttl=60, max_entries=max_entries, max_entry_size=10
+    )
+
+
+@pytest.mark.unit
+async def test_get_result(fake_redis: Any) -> None:
+    """Should return the result cached by key, and None for other keys."""
+    result_cache = _result_cache(fake_redis)
+
+    await result_cache.put("a", b"report")
+
+    assert await result_cache.get("a") == b"report"
+    assert await result_cache.get("b") is None
+
+
+@pytest.mark.unit
+async def test_put_result_too_large(fake_redis: Any) -> None:
+    """Should not cache results larger than the maximum entry size."""
+    result_cache = _result_cache(fake_redis)
+
+    await result_cache.put("a", b"a large report")
+
+    assert await result_cache.get("a") is None
+
+
+@pytest.mark.unit
+async def test_put_result_evicts_oldest(fake_redis: Any) -> None:
+    """Should remove the oldest results when there are too many."""
+    result_cache = _result_cache(fake_redis, max_entries=2)
+
+    for key in "abc":
+        await result_cache.put(key, key.encode())
+
+    assert await result_cache.get("a") is None
+    assert await result_cache.get("b") == b"b"
+    assert await result_cache.get("c") == b"c"
+
+
+@pytest.mark.unit
+async def test_clear(fake_redis: Any) -> None:
+    """Should not return results cached before the cache was cleared."""
+    result_cache = _result_cache(fake_redis)
+    await result_cache.put("a", b"report")
+
+    assert await result_cache.clear() is True
+
+    assert await result_cache.get("a") is None
+    await result_cache.put("a", b"report 2")
+    assert await result_cache.get("a") == b"report 2"
+
+
+@pytest.mark.unit
+async def test_redis_errors(fake_redis: Any, mocker: MockFixture) -> None:
+    """Should count errors from redis as misses, and not cache the result."""
+    result_cache = _result_cache(fake_redis)
+    mocker.patch.object(fake_redis, "get", side_effect=ConnectionError())
+
+    await result_cache.put("a", b"report")
+
+    assert await result_cache.get("a") is None
+    assert fake_redis.values == dict()
+
+
+@pytest.mark.unit
+async def test_clear_redis_error(fake_redis: Any, mocker: MockFixture) -> None:
+    """Should return False when redis fails, and not raise."""
+    result_cache = _result_cache(fake_redis)
+    mocker.patch.object(fake_redis, "incr", side_effect=ConnectionError())
+
+    assert await result_cache.clear() is False
+
+
+@pytest.mark.unit
+def test_result_key() -> None:
+    """Should return the same key for the same inputs only."""
+    key = result_key(dataGraph="urn:sha256:1", expand=True)
+
+    assert key == result_key(expand=True, dataGraph="urn:sha256:1")
+    assert key != result_key(dataGraph="urn:sha256:1", expand=False)
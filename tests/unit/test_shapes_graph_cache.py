@@ -0,0 +1,61 @@
+"""Unit test cases for the shapes graph cache."""
+
+from collections import OrderedDict
+
+import pytest
+from pytest_mock import MockFixture
+from rdflib import Graph
+
+from dcat_ap_no_validator_service.adapter import parse_text
+from dcat_ap_no_validator_service.service.shapes_graph_cache import get_shapes_graph
+
+
+@pytest.mark.unit
+def test_get_shapes_graph_parsed_from_same_text(mocker: MockFixture) -> None:
+    """Should return the cached shapes graph."""
+    mocker.patch(
+        "dcat_ap_no_validator_service.service.shapes_graph_cache._SHAPES_GRAPH_CACHE",
+        OrderedDict(),
+    )
+    text = _mock_shapes_graph()
+
+    sg1 = get_shapes_graph(parse_text(text))
+    sg2 = get_shapes_graph(parse_text(text))
+    assert sg1 is sg2
+    assert len(list(sg1.shapes)) > 0
+
+
+@pytest.mark.unit
+def test_get_shapes_graph_evicts_least_recently_used(mocker: MockFixture) -> None:
+    """Should keep only the most recently used shapes graphs."""
+    mocker.patch(
+        "dcat_ap_no_validator_service.service.shapes_graph_cache._SHAPES_GRAPH_CACHE",
+        OrderedDict(),
+    )
+    mocker.patch(
+        "dcat_ap_no_validator_service.service.shapes_graph_cache.SHAPES_GRAPH_CACHE_SIZE",
+        1,
+    )
+    text = _mock_shapes_graph()
+
+    sg1 = get_shapes_graph(parse_text(text))
+    _ = get_shapes_graph(parse_text(text + "\n# another text\n"))
+    sg3 = get_shapes_graph(parse_text(text))
+    assert sg1 is not sg3
+
+
+@pytest.mark.unit
+def test_get_shapes_graph_without_content_identifier() -> None:
+    """Should not cache the shapes graph."""
+    g = Graph().parse("tests/files/mock_dcat-ap-no-shacl_shapes_2.00.ttl")
+
+    sg1 = get_shapes_graph(g)
+    sg2 = get_shapes_graph(g)
+    assert sg1 is not sg2
+
+
+# --- mocks
+def _mock_shapes_graph() -> str:
+    with open("tests/files/mock_dcat-ap-no-shacl_shapes_2.00.ttl", "r") as file:
+        text = file.read()
+    return text
@@ -0,0 +1,75 @@
+"""Unit test cases for sharded validation."""
+
+import pytest
+from rdflib import Graph
+from rdflib.compare import isomorphic
+
+from dcat_ap_no_validator_service.adapter import parse_text
+from dcat_ap_no_validator_service.service.focus_graph import ShapePaths
+from dcat_ap_no_validator_service.service.sharded_validation import (
+    merge_shard_results,
+    shard_data_graph,
+)
+from dcat_ap_no_validator_service.service.validation_pool import run_validation
+
+
+def _read(filename: str) -> Graph:
+    with open(filename, "r") as file:
+        return parse_text(file.read(), filename=filename)
+
+
+@pytest.mark.unit
+def test_shard_data_graph() -> None:
+    """Should split the nodes of the data graph into shards of at most shard size."""
+    data_graph = _read("tests/files/valid_catalog.ttl")
+    paths = ShapePaths(_read("tests/files/mock_dcat-ap-no-shacl_shapes_2.00.ttl"))
+
+    shards = shard_data_graph(data_graph, paths, 2)
+
+    assert len(shards) > 1
+    assert all(len(shard.nodes) <= 2 for shard in shards)
+    assert any(len(shard.data_graph) < len(data_graph) for shard in shards)
+    all_nodes = [node for shard in shards for node in shard.nodes]
+    assert len(all_nodes) == len(set(all_nodes))
+
+
+@pytest.mark.unit
+def test_shard_small_data_graph() -> None:
+    """Should return the whole data graph as one shard."""
+    data_graph = _read("tests/files/valid_catalog.ttl")
+    paths = ShapePaths(_read("tests/files/mock_dcat-ap-no-shacl_shapes_2.00.ttl"))
+
+    shards = shard_data_graph(data_graph, paths, 1000)
+
+    assert len(shards) == 1
+    assert shards[0].data_graph is data_graph
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "filename",
+    [
+        "tests/files/valid_catalog.ttl",
+        "tests/files/valid_catalog_with_distribution.ttl",
+        "tests/files/invalid_catalog.ttl",
+    ],
+)
+def test_merge_shard_results(filename: str) -> None:
+    """Should give the results of validating the whole data graph."""
+    data_graph = _read(filename)
+    shapes_graph = _read("tests/files/mock_dcat-ap-no-shacl_shapes_2.00.ttl")
+    ontology_graph = _read("tests/files/mock_organization_catalog_961181399.ttl")
+    shards = shard_data_graph(data_graph, ShapePaths(shapes_graph), 1)
+
+    conforms, results_graph = merge_shard_results(
+        data_graph,
+        shards,
+        [
+            run_validation(shard.data_graph, ontology_graph, shapes_graph)[1]
+            for shard in shards
+        ],
+    )
+
+    expected = run_validation(data_graph, ontology_graph, shapes_graph)
+    assert conforms is expected[0]
+    assert isomorphic(results_graph, expected[1])
@@ -0,0 +1,155 @@
+"""Unit test cases for the validation pool."""
+
+import asyncio
+
+import pytest
+from rdflib import Graph
+from rdflib.compare import isomorphic
+
+from dcat_ap_no_validator_service.adapter import parse_text
+from dcat_ap_no_validator_service.service import (
+    ValidationPool,
+    ValidationQueueFullError,
+)
+from dcat_ap_no_validator_service.service.graph_union import GraphUnion
+from dcat_ap_no_validator_service.service.validation_pool import run_validation
+
+
+@pytest.mark.unit
+async def test_validate_in_worker_process() -> None:
+    """Should return the validation result from the worker."""
+    data_graph = Graph().parse("tests/files/valid_catalog.ttl")
+    shapes_graph = Graph().parse("tests/files/mock_dcat-ap-no-shacl_shapes_2.00.ttl")
+    pool = ValidationPool(max_workers=1, max_queue=0)
+    try:
+        conforms, results_graph = await pool.validate(data_graph, Graph(), shapes_graph)
+    finally:
+        pool.shutdown()
+    assert isinstance(conforms, bool)
+    assert isinstance(results_graph, Graph)
+    assert len(results_graph) > 0
+    assert pool.pending == 0
+
+
+@pytest.mark.unit
+async def test_validate_when_queue_is_full() -> None:
+    """Should reject the validation that does not fit in the queue."""
+    data_graph = Graph().parse("tests/files/valid_catalog.ttl")
+    shapes_graph = Graph().parse("tests/files/mock_dcat-ap-no-shacl_shapes_2.00.ttl")
+    pool = ValidationPool(max_workers=1, max_queue=0)
+    try:
+        results = await asyncio.gather(
+            pool.validate(data_graph, Graph(), shapes_graph),
+            pool.validate(data_graph, Graph(), shapes_graph),
+            return_exceptions=True,
+        )
+    finally:
+        pool.shutdown()
+    assert isinstance(results[0], tuple)
+    assert isinstance(results[1], ValidationQueueFullError)
+
+
+@pytest.mark.unit
+async def test_validate_shards_in_worker_processes() -> None:
+    """Should return the validation result of each data graph, in order."""
+    data_graphs = [
+        Graph().parse("tests/files/valid_catalog.ttl"),
+        Graph().parse("tests/files/valid_catalog_no_remote_triples.ttl"),
+    ]
+    shapes_graph = Graph().parse("tests/files/mock_dcat-ap-no-shacl_shapes_2.00.ttl")
+    pool = ValidationPool(max_workers=2, max_queue=0)
+    try:
+        results = await pool.validate_shards(data_graphs, Graph(), shapes_graph)
+    finally:
+        pool.shutdown()
+    assert len(results) == 2
+    assert all(isinstance(results_graph, Graph) for _, results_graph in results)
+    assert len(results[0][1]) != len(results[1][1])
+    assert pool.pending == 0
+
+
+@pytest.mark.unit
+async def test_validate_shards_when_queue_is_full() -> None:
+    """Should reject the shards when the queue is full."""
+    data_graph = Graph().parse("tests/files/valid_catalog.ttl")
+    shapes_graph = Graph().parse("tests/files/mock_dcat-ap-no-shacl_shapes_2.00.ttl")
+    pool = ValidationPool(max_workers=1, max_queue=0)
+    try:
+        results = await asyncio.gather(
+            pool.validate(data_graph, Graph(), shapes_graph),
+            pool.validate_shards([data_graph], Graph(), shapes_graph),
+            return_exceptions=True,
+        )
+    finally:
+        pool.shutdown()
+    assert isinstance(results[0], tuple)
+    assert isinstance(results[1], ValidationQueueFullError)
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "closed",
+    [
+        "",
+        "<http://example.com/Shape> a sh:NodeShape ; sh:closed true ; "
+        "sh:targetClass dcat:Catalog .",
+    ],
+)
+def test_run_validation_in_place(closed: str) -> None:
+    """Should give the results of validating a copy, and keep the asserted triples."""
+    with open("tests/files/mock_dcat-ap-no-shacl_shapes_2.00.ttl", "r") as file:
+        shapes_graph = parse_text(file.read() + closed)
+    ontology_graph = Graph().parse("tests/files/mock_org.ttl")
+    data_graph = Graph().parse("tests/files/valid_catalog.ttl")
+    # A triple both asserted and in the ontology graph is kept:
+    triple = next(iter(ontology_graph))
+    data_graph.add(triple)
+    asserted = set(data_graph)
+
+    conforms, results_graph = run_validation(
+        data_graph, ontology_graph, shapes_graph, inplace=True
+    )
+
+    assert set(data_graph) == asserted
+    expected = run_validation(data_graph, ontology_graph, shapes_graph)
+    assert conforms is expected[0]
+    assert isomorphic(results_graph, expected[1])
+
+
+@pytest.mark.unit
+def test_run_validation_graph_union() -> None:
+    """Should give the results of validating with the graphs merged."""
+    shapes_graph = Graph().parse("tests/files/mock_dcat-ap-no-shacl_shapes_2.00.ttl")
+    ontology_graph = parse_text(
+        "<https://organization-catalog.fellesdatakatalog.digdir.no/organizations/"
+        '961181399> <http://xmlns.com/foaf/0.1/name> "Organization" .'
+    )
+    data_graph = Graph().parse("tests/files/valid_catalog.ttl")
+    asserted = set(data_graph)
+
+    conforms, results_graph = run_validation(
+        data_graph, GraphUnion([Graph(), ontology_graph]), shapes_graph
+    )
+
+    assert set(data_graph) == asserted
+    expected = run_validation(data_graph, ontology_graph, shapes_graph)
+    assert conforms is expected[0]
+    assert isomorphic(results_graph, expected[1])
+
+
+@pytest.mark.unit
+async def test_validate_graph_union_in_worker_process() -> None:
+    """Should pickle the graphs of the union to the worker."""
+    data_graph = Graph().parse("tests/files/valid_catalog.ttl")
+    shapes_graph = Graph().parse("tests/files/mock_dcat-ap-no-shacl_shapes_2.00.ttl")
+    ontology_graph = Graph().parse("tests/files/mock_org.ttl")
+    pool = ValidationPool(max_workers=1, max_queue=0)
+    try:
+        conforms, results_graph = await pool.validate(
+            data_graph, GraphUnion([Graph(), ontology_graph]), shapes_graph
+        )
+    finally:
+        pool.shutdown()
+    expected = run_validation(data_graph, ontology_graph, shapes_graph)
+    assert conforms is expected[0]
+    assert isomorphic(results_graph, expected[1])